@@ -0,0 +1,162 @@
+import asyncio
+import zlib
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore[import-untyped]
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Server-sent events are small, latency-sensitive frames that some proxies
+# mishandle when compressed; archives and images are already compressed.
+DEFAULT_EXCLUDED_MEDIA_TYPES = (
+    "text/event-stream",
+    "application/gzip",
+    "application/zip",
+    "image/",
+)
+
+# Bodies above this size are compressed in a worker thread.
+_THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = True) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, honouring q-values.
+
+    Brotli wins ties when the brotli package is installed. Returns None when
+    the client accepts neither.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            weights[coding] = quality
+    candidates = ("br", "gzip") if brotli_available else ("gzip",)
+    scored = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in candidates]
+    quality, coding = max(scored, key=lambda item: item[0])
+    return coding if quality > 0 else None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk; non-final chunks are flushed so they can be sent immediately."""
+        if self._zlib is None:
+            output: bytes = self._brotli.process(data)
+            tail: bytes = self._brotli.finish() if final else self._brotli.flush()
+            return output + tail
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip response compression with a size threshold.
+
+    Complete responses smaller than ``minimum_size`` are sent as-is. Streamed
+    responses (e.g. the NDJSON repo-info stream) are compressed chunk by
+    chunk with a sync flush after each one, so every chunk still reaches the
+    client as soon as it is produced. Responses that already carry a
+    Content-Encoding, partial responses and excluded media types pass through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_media_types: Tuple[str, ...] = DEFAULT_EXCLUDED_MEDIA_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_media_types = exclude_media_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), brotli is not None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                start = start_message
+                if start is None:
+                    raise RuntimeError("Response body sent before http.response.start")
+                headers = MutableHeaders(raw=start["headers"])
+                if not self._should_compress(start["status"], headers, body, more_body):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    compressed = await self._compress(compressor, body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start)
+
+            await send({
+                "type": "http.response.body",
+                "body": await self._compress(compressor, body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, status: int, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if status == 206 or "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        if any(media_type.startswith(excluded) for excluded in self.exclude_media_types):
+            return False
+        return more_body or len(body) >= self.minimum_size
+
+    @staticmethod
+    async def _compress(compressor: _Compressor, body: bytes, final: bool = True) -> bytes:
+        if len(body) >= _THREAD_MINIMUM_SIZE:
+            return await asyncio.to_thread(compressor.compress, body, final)
+        return compressor.compress(body, final)
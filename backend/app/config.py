@@ -1,18 +1,143 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Azure AI Agents Configuration (following official sample patterns)
 PROJECT_ENDPOINT = os.getenv("PROJECT_ENDPOINT")
-MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME") or os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME", "gpt-4o")
+MODEL_DEPLOYMENT_NAME = os.getenv("MODEL_DEPLOYMENT_NAME") or os.getenv("AZURE_AI_MODEL_DEPLOYMENT_NAME") or "gpt-4o"
 
 # Legacy support for old environment variable names
 AZURE_AI_PROJECT_CONNECTION_STRING = os.getenv("AZURE_AI_PROJECT_CONNECTION_STRING") or PROJECT_ENDPOINT
 AZURE_AI_AGENTS_API_KEY = os.getenv("AZURE_AI_AGENTS_API_KEY")
 
+# One AgentsClient is shared by the whole process. Its keep-alive connection
+# pool to the Azure AI Agents endpoint holds at most this many connections,
+# and idle connections are kept open for AZURE_AGENTS_KEEPALIVE_SECONDS.
+AZURE_AGENTS_MAX_CONNECTIONS = int(os.getenv("AZURE_AGENTS_MAX_CONNECTIONS", "20"))
+AZURE_AGENTS_KEEPALIVE_SECONDS = float(os.getenv("AZURE_AGENTS_KEEPALIVE_SECONDS", "60"))
+
+# Upper bound on agent runs in progress at once across the whole process, so
+# bursts of analyses queue here instead of exhausting the project's quota.
+AZURE_AGENTS_MAX_CONCURRENT_RUNS = int(os.getenv("AZURE_AGENTS_MAX_CONCURRENT_RUNS", "16"))
+
+# Agents are created once per (name, instructions, model) and reused; ones
+# left unused for this long are deleted (0 = keep until shutdown).
+AGENT_IDLE_TTL_SECONDS = float(os.getenv("AGENT_IDLE_TTL_SECONDS", "3600"))
+
+# On startup, delete agents tagged by the registry that this process did not
+# create: leftovers of a crash or redeploy that skipped the shutdown cleanup.
+AGENT_STALE_CLEANUP_ON_STARTUP = os.getenv("AGENT_STALE_CLEANUP_ON_STARTUP", "true").lower() == "true"
+
+# Step 2 picks configuration files with a local rule-based scorer and only
+# asks a model when the scorer's confidence (0-1) is below this threshold.
+CONFIG_SCORER_MIN_CONFIDENCE = float(os.getenv("CONFIG_SCORER_MIN_CONFIDENCE", "0.5"))
+
+# Step 3 reads setup commands straight from manifests, task runners and CI
+# workflows; a model is only asked when more categories than this are missing.
+SETUP_EXTRACTOR_MAX_GAPS = int(os.getenv("SETUP_EXTRACTOR_MAX_GAPS", "1"))
+
+# Token budgets of the user message sent to the agent in each step. README
+# sections, manifests, configuration files and the file tree are packed into
+# them by priority.
+PROMPT_TOKEN_BUDGET_ANALYSIS = int(os.getenv("PROMPT_TOKEN_BUDGET_ANALYSIS", "12000"))
+PROMPT_TOKEN_BUDGET_CONFIG_FILES = int(os.getenv("PROMPT_TOKEN_BUDGET_CONFIG_FILES", "4000"))
+PROMPT_TOKEN_BUDGET_SETUP = int(os.getenv("PROMPT_TOKEN_BUDGET_SETUP", "12000"))
+
+# Token budget of the repository outline (directory counts, extensions and
+# configuration file paths) shown to the agent in steps 1 and 2.
+TREE_SUMMARY_TOKEN_BUDGET = int(os.getenv("TREE_SUMMARY_TOKEN_BUDGET", "1500"))
+
+# READMEs are compacted (badges, HTML and changelogs removed, setup sections
+# first) before they go into a prompt; results are cached by git blob SHA.
+README_CACHE_MAX_BYTES = int(os.getenv("README_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Dependency manifests (package.json, pyproject.toml, go.mod, pom.xml, ...)
+# parsed per repository, shallowest first: by /api/dependencies, and for the
+# dependency summary the agent sees in step 1.
+DEPENDENCY_MANIFESTS_MAX = int(os.getenv("DEPENDENCY_MANIFESTS_MAX", "100"))
+DEPENDENCY_MANIFESTS_PROMPT_MAX = int(os.getenv("DEPENDENCY_MANIFESTS_PROMPT_MAX", "20"))
+
+# How often a non-streaming agent run is polled for completion.
+AGENT_RUN_POLL_INTERVAL_SECONDS = float(os.getenv("AGENT_RUN_POLL_INTERVAL_SECONDS", "1"))
+
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_API_URL = "https://api.github.com"
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# Upper bound on GitHub REST calls in flight at once across the whole process,
+# and the size of the shared keep-alive connection pool they go out on.
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "8"))
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+
+# Repository snapshots are cached in-process, keyed by the head commit SHA.
+# The default branch of each repository is remembered for a short while so the
+# head commit can be resolved with a single get_branch call.
+SNAPSHOT_CACHE_MAX_BYTES = int(os.getenv("SNAPSHOT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DEFAULT_BRANCH_TTL_SECONDS = float(os.getenv("DEFAULT_BRANCH_TTL_SECONDS", "600"))
+
+# Query indexes (basename, extension, substring) over cached file trees, one
+# per commit.
+TREE_INDEX_CACHE_MAX_BYTES = int(os.getenv("TREE_INDEX_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+
+# Conditional-request (ETag) cache underneath the GitHub client. 304 responses
+# do not count against the GitHub rate limit.
+GITHUB_HTTP_CACHE_MAX_BYTES = int(os.getenv("GITHUB_HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# How file contents are fetched: "api" reads each file through the contents
+# API, "archive" downloads the commit tarball once and extracts only the files
+# the analysis needs, within per-file and total byte caps, and "mirror" keeps a
+# local blob-filtered bare clone per repository and reads trees and files
+# with git.
+GITHUB_FETCH_MODE = os.getenv("GITHUB_FETCH_MODE", "api").lower()
+ARCHIVE_MAX_FILE_BYTES = int(os.getenv("ARCHIVE_MAX_FILE_BYTES", str(512 * 1024)))
+ARCHIVE_MAX_TOTAL_BYTES = int(os.getenv("ARCHIVE_MAX_TOTAL_BYTES", str(8 * 1024 * 1024)))
+ARCHIVE_MAX_DOWNLOAD_BYTES = int(os.getenv("ARCHIVE_MAX_DOWNLOAD_BYTES", str(512 * 1024 * 1024)))
+GIT_MIRROR_DIR = os.getenv("GIT_MIRROR_DIR", os.path.join(tempfile.gettempdir(), "gitagu-mirrors"))
+GIT_MIRROR_REMOTE_TEMPLATE = os.getenv("GIT_MIRROR_REMOTE_TEMPLATE", "https://github.com/{owner}/{repo}.git")
+
+# File tree delivery for large repositories: entries per NDJSON chunk on the
+# streaming repo-info endpoint, and default/maximum page sizes for the
+# cursor-paginated file listing.
+REPO_INFO_STREAM_CHUNK_SIZE = int(os.getenv("REPO_INFO_STREAM_CHUNK_SIZE", "1000"))
+REPO_FILES_PAGE_SIZE = int(os.getenv("REPO_FILES_PAGE_SIZE", "1000"))
+REPO_FILES_MAX_PAGE_SIZE = int(os.getenv("REPO_FILES_MAX_PAGE_SIZE", "10000"))
+
+# An SSE comment is sent on progress streams after this many idle seconds, so
+# proxies keep the connection open and dead clients are noticed.
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Analyses run as jobs on at most JOB_MAX_WORKERS concurrent workers; up to
+# JOB_MAX_QUEUE further jobs wait for a worker before new ones are rejected.
+# Finished jobs stay queryable for JOB_RETENTION_SECONDS (at most
+# JOB_HISTORY_MAX of them).
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_HISTORY_MAX = int(os.getenv("JOB_HISTORY_MAX", "1000"))
+
+# Bulk analysis: repositories analyzed at once per request (a request may ask
+# for fewer, never more than BULK_ANALYSIS_MAX_CONCURRENCY) and the most
+# repositories accepted in one request.
+BULK_ANALYSIS_CONCURRENCY = int(os.getenv("BULK_ANALYSIS_CONCURRENCY", "4"))
+BULK_ANALYSIS_MAX_CONCURRENCY = int(os.getenv("BULK_ANALYSIS_MAX_CONCURRENCY", "16"))
+BULK_ANALYSIS_MAX_REPOSITORIES = int(os.getenv("BULK_ANALYSIS_MAX_REPOSITORIES", "500"))
+
+# Responses of at least this many bytes are compressed with brotli (when the
+# brotli package is installed) or gzip, as negotiated with the client.
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESSION_LEVEL = int(os.getenv("GZIP_COMPRESSION_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Completed analyses are cached per (repository, commit SHA, agent, agent
+# instructions and model). "sqlite" persists them in ANALYSIS_CACHE_PATH,
+# "memory" keeps them in-process and "none" disables caching. Entries expire
+# after ANALYSIS_CACHE_TTL_SECONDS (0 = never).
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "sqlite").lower()
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", os.path.join(tempfile.gettempdir(), "gitagu-analysis-cache.sqlite3"))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
 
 CORS_ORIGINS = [
     "http://localhost:5173",  # Development frontend
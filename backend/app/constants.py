@@ -14,6 +14,18 @@ LEGACY_AGENT_ID_MAP = {
 
 DEPENDENCY_FILES = ["requirements.txt", "package.json", "pom.xml", "build.gradle"]
 
+# Well-known configuration files worth reading when working out how to set up
+# a repository. Matched against the file name at any depth.
+CONFIG_FILE_NAMES = [
+    "README.md", "readme.md", "README.rst", "INSTALL.md", "CONTRIBUTING.md",
+    "package.json", "requirements.txt", "requirements-dev.txt", "pyproject.toml",
+    "setup.py", "setup.cfg", "Pipfile", "Cargo.toml", "go.mod", "pom.xml",
+    "build.gradle", "build.gradle.kts", "Dockerfile", "docker-compose.yml",
+    "docker-compose.yaml", "Makefile", "CMakeLists.txt", "tsconfig.json",
+    "webpack.config.js", "vite.config.js", "vite.config.ts", ".env.example",
+    ".env.template", "jest.config.js", "pytest.ini", "tox.ini", "noxfile.py",
+]
+
 LANGUAGE_MAP = {
     "requirements.txt": "Python",
     "package.json": "JavaScript/TypeScript",
@@ -1,21 +1,57 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-import json
+from fastapi.responses import Response, StreamingResponse
 import asyncio
+import base64
 import os
-from .models.schemas import RepositoryAnalysisRequest, RepositoryAnalysisResponse, RepositoryInfoResponse, AnalysisProgressUpdate, TaskBreakdownRequest, TaskBreakdownResponse, Task, DevinSessionRequest, DevinSessionResponse
-from .services.github import GitHubService
-from .services.agent import AzureAgentService
-from .config import CORS_ORIGINS
+import posixpath
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Tuple
+from .models.schemas import RepositoryAnalysisRequest, RepositoryAnalysisResponse, RepositoryBatchAnalysisRequest, BulkAnalysisRequest, AnalysisJobResponse, RepositoryInfoResponse, RepositoryFilesPage, RepositoryTreeResponse, RepositoryDependenciesResponse, AnalysisProgressUpdate, TaskBreakdownRequest, TaskBreakdownResponse, Task, DevinSessionRequest, DevinSessionResponse
+from .services.dependency_parser import is_manifest_name, parse_manifests, workspace_manifests
+from .services.file_tree import FileTree
+from .services.git_mirror import is_commit_sha
+from .services.github import GitHubService, RepositoryNotFoundError, close_github_transport, github_transport, snapshot_cache, tree_index_cache, tree_index_for
+from .services.agent import AzureAgentService, close_agent_service, shared_agent_service
+from .services.analysis_cache import analysis_cache, analysis_cache_key, replay_progress
+from .services.jobs import Job, JobQueueFull, analysis_jobs
+from .services.readme_compactor import readme_cache
+from .services.single_flight import FLIGHT_END, Flight
+from .services.tree_index import TreeIndex
+from .config import AGENT_STALE_CLEANUP_ON_STARTUP, CORS_ORIGINS, SSE_HEARTBEAT_SECONDS, BULK_ANALYSIS_CONCURRENCY, BULK_ANALYSIS_MAX_CONCURRENCY, BULK_ANALYSIS_MAX_REPOSITORIES, REPO_INFO_STREAM_CHUNK_SIZE, REPO_FILES_PAGE_SIZE, REPO_FILES_MAX_PAGE_SIZE, COMPRESSION_MINIMUM_SIZE, GZIP_COMPRESSION_LEVEL, BROTLI_QUALITY
+from .compression import CompressionMiddleware
+from .serialization import ORJSONResponse, dumps, sse_event
 from .logging_config import setup_logging, get_api_logger
+from .metrics import latency_metrics
 
 # Set up logging
 log_level = os.getenv("LOG_LEVEL", "INFO")
 setup_logging(level=log_level, format_style="detailed")
 logger = get_api_logger()
 
-app = FastAPI(title="gitagu Backend", description="Backend API for gitagu")
+async def _delete_stale_agents() -> None:
+    try:
+        await shared_agent_service().delete_stale_agents()
+    except Exception as e:
+        print(f"Could not clean up stale agents: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Runs in the background so a slow agent listing does not delay startup
+    cleanup = asyncio.create_task(_delete_stale_agents()) if AGENT_STALE_CLEANUP_ON_STARTUP else None
+    yield
+    if cleanup is not None and not cleanup.done():
+        cleanup.cancel()
+    # Shared clients live for the whole process; release their connection
+    # pools and credentials on shutdown.
+    logger.info("Shutting down gitagu Backend API")
+    await close_agent_service()
+    await close_github_transport()
+    analysis_cache().close()
+
+app = FastAPI(title="gitagu Backend", description="Backend API for gitagu", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 logger.info("Starting gitagu Backend API")
 
@@ -27,11 +63,374 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=GZIP_COMPRESSION_LEVEL,
+    brotli_quality=BROTLI_QUALITY,
+)
+
+# SSE comment line; ignored by clients, keeps the connection alive
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
 def get_github_service():
     return GitHubService()
 
-def get_agent_service():
-    return AzureAgentService()
+async def get_agent_service() -> AzureAgentService:
+    # Resolved on the event loop rather than in a worker thread, so concurrent
+    # first requests cannot each build a service.
+    return shared_agent_service()
+
+async def _fetch_analysis_inputs(github_service: GitHubService, owner: str, repo: str, commit_sha: Optional[str]) -> Tuple[Optional[str], Dict[str, str], FileTree, TreeIndex, bool]:
+    """
+    Fetch README, dependency files, the file tree and its query index for an analysis, reusing the commit-keyed caches.
+    
+    Also returns whether the snapshot was complete; an analysis built from a
+    partial snapshot (failed tree, README or languages fetch) is not cached.
+    """
+    fetched = await asyncio.gather(
+        github_service.get_repository_snapshot(owner, repo, commit_sha=commit_sha),
+        github_service.get_requirements(owner, repo, ref=commit_sha),
+        return_exceptions=True,
+    )
+    snapshot_result, dependencies = fetched
+    if isinstance(dependencies, BaseException):
+        raise dependencies
+    snapshot: Dict[str, Any]
+    if isinstance(snapshot_result, RuntimeError):
+        print(f"Repository not found: {owner}/{repo}")
+        snapshot = {}
+    elif isinstance(snapshot_result, BaseException):
+        raise snapshot_result
+    else:
+        snapshot = snapshot_result
+    
+    readme_content = snapshot.get("readme") or None
+    # The FileTree reads like a list of {"path", "type", "size"} dicts without
+    # materialising one per entry.
+    files = snapshot.get("files") or FileTree()
+    tree_index = tree_index_for(owner, repo, snapshot.get("commit_sha"), files)
+    return readme_content, dependencies, files, tree_index, bool(snapshot.get("complete"))
+
+async def _get_cached_analysis(request: RepositoryAnalysisRequest, agent_service: AzureAgentService, commit_sha: Optional[str]) -> Tuple[Optional[str], Optional[dict]]:
+    """Return the analysis cache key for a request and the cached result, if any."""
+    if not commit_sha:
+        return None, None
+    cache_key = analysis_cache_key(f"{request.owner}/{request.repo}", commit_sha, request.agent_id, agent_service.analysis_fingerprint(request.agent_id))
+    if request.refresh:
+        return cache_key, None
+    try:
+        cached = await analysis_cache().get(cache_key)
+    except Exception as e:
+        print(f"Analysis cache lookup failed: {str(e)}")
+        return cache_key, None
+    if cached:
+        print(f"Analysis cache hit for {request.owner}/{request.repo}@{commit_sha[:7]} with agent: {request.agent_id}")
+    return cache_key, cached
+
+async def _store_analysis(cache_key: Optional[str], commit_sha: Optional[str], analysis_result: dict, complete_inputs: bool) -> None:
+    """Cache a completed analysis unless it fell back to generic guidance or was built from a partial snapshot."""
+    if not cache_key or analysis_result.get("fallback_used"):
+        return
+    if not complete_inputs:
+        print(f"Not caching analysis of commit {(commit_sha or 'unknown')[:7]}: built from an incomplete snapshot")
+        return
+    try:
+        await analysis_cache().set(cache_key, {
+            "analysis": analysis_result.get("analysis", ""),
+            "setup_commands": analysis_result.get("setup_commands", {}),
+            "commit_sha": commit_sha,
+            "created_at": time.time(),
+        })
+    except Exception as e:
+        print(f"Could not store analysis in cache: {str(e)}")
+
+async def _run_analysis(flight: Flight, request: RepositoryAnalysisRequest, github_service: GitHubService, agent_service: AzureAgentService, commit_sha: Optional[str], cache_key: Optional[str]) -> dict:
+    """Fetch the inputs, run the agent pipeline publishing its progress to the flight, and cache the result."""
+    readme_content, dependencies, files_dict, tree_index, complete_inputs = await _fetch_analysis_inputs(github_service, request.owner, request.repo, commit_sha)
+    print(f"README content found: {readme_content is not None}")
+    print(f"Dependencies found: {len(dependencies)}")
+    print(f"Repository files found: {len(files_dict)}")
+    
+    async def progress_callback(update: AnalysisProgressUpdate) -> None:
+        flight.publish(update)
+    
+    # Text of the analysis (step 1) and setup reply (step 3) as the model generates it
+    async def delta_callback(event_type: str, text: str) -> None:
+        flight.publish({"type": event_type, "delta": text})
+    
+    analysis_result = await agent_service.analyze_repository(
+        request.agent_id,
+        f"{request.owner}/{request.repo}",
+        readme_content or "No README found",  # Provide default if None
+        dependencies or {},  # Provide empty dict if None
+        files_dict,
+        progress_callback=progress_callback,
+        fetch_file_contents=partial(github_service.get_files_content, request.owner, request.repo, ref=commit_sha),
+        tree_index=tree_index,
+        delta_callback=delta_callback
+    )
+    await _store_analysis(cache_key, commit_sha, analysis_result, complete_inputs)
+    return analysis_result
+
+async def _start_analysis_job(request: RepositoryAnalysisRequest, github_service: GitHubService, agent_service: AzureAgentService, background: bool = False) -> Job:
+    """
+    Return the analysis job for a request.
+    
+    A cached analysis is recorded as an already completed job; otherwise the
+    analysis is queued for a worker, or the queued or running job for the same
+    repository, commit and agent is joined. Raises JobQueueFull when the queue
+    is at capacity.
+    """
+    commit_sha = await github_service.get_head_sha(request.owner, request.repo)
+    cache_key, cached = await _get_cached_analysis(request, agent_service, commit_sha)
+    key = cache_key or "\0".join((f"{request.owner}/{request.repo}".lower(), request.agent_id))
+    params = {"owner": request.owner, "repo": request.repo, "agent_id": request.agent_id, "commit_sha": commit_sha}
+    if cached:
+        # Replay the step structure so streaming clients render the same progress UI
+        return analysis_jobs().record(key, "analysis", {**params, "cached": True}, cached, replay_progress(cached))
+    job, joined = analysis_jobs().submit(
+        key, "analysis", params,
+        lambda flight: _run_analysis(flight, request, github_service, agent_service, commit_sha, cache_key),
+        background=background,
+    )
+    if joined:
+        print(f"Joining in-flight analysis of {request.owner}/{request.repo} with agent: {request.agent_id}")
+    return job
+
+async def _run_batch_analysis(flight: Flight, params: dict, github_service: GitHubService, agent_service: AzureAgentService, cache_keys: Dict[str, Optional[str]], cached: Dict[str, dict]) -> Dict[str, dict]:
+    """Analyze one repository for the agents without a cached result, publishing each agent's result to the flight as it completes."""
+    owner, repo, commit_sha = params["owner"], params["repo"], params["commit_sha"]
+    readme_content, dependencies, files_dict, tree_index, complete_inputs = await _fetch_analysis_inputs(github_service, owner, repo, commit_sha)
+    
+    async def progress_callback(update: AnalysisProgressUpdate) -> None:
+        flight.publish(update)
+    
+    async def result_callback(agent_id: str, result: dict) -> None:
+        await _store_analysis(cache_keys[agent_id], commit_sha, result, complete_inputs)
+        flight.publish({"type": "agent_result", "data": _analysis_response(params, agent_id, result).model_dump()})
+    
+    results = await agent_service.analyze_repository_batch(
+        [agent_id for agent_id in params["agent_ids"] if agent_id not in cached],
+        f"{owner}/{repo}",
+        readme_content or "No README found",
+        dependencies or {},
+        files_dict,
+        fetch_file_contents=partial(github_service.get_files_content, owner, repo, ref=commit_sha),
+        tree_index=tree_index,
+        progress_callback=progress_callback,
+        result_callback=result_callback
+    )
+    return {agent_id: cached.get(agent_id) or results[agent_id] for agent_id in params["agent_ids"]}
+
+async def _start_batch_analysis_job(request: RepositoryBatchAnalysisRequest, github_service: GitHubService, agent_service: AzureAgentService) -> Job:
+    """
+    Return the batch analysis job for a request.
+    
+    Cached per-agent analyses are published straight away and only the other
+    agents are analyzed; identical batches in flight are joined. Raises
+    JobQueueFull when the queue is at capacity.
+    """
+    agent_ids = list(dict.fromkeys(request.agent_ids))
+    commit_sha = await github_service.get_head_sha(request.owner, request.repo)
+    lookups = await asyncio.gather(*(
+        _get_cached_analysis(RepositoryAnalysisRequest(owner=request.owner, repo=request.repo, agent_id=agent_id, refresh=request.refresh), agent_service, commit_sha)
+        for agent_id in agent_ids
+    ))
+    cache_keys = {agent_id: cache_key for agent_id, (cache_key, _) in zip(agent_ids, lookups)}
+    cached = {agent_id: {**entry, "cached": True} for agent_id, (_, entry) in zip(agent_ids, lookups) if entry}
+    params = {"owner": request.owner, "repo": request.repo, "agent_ids": agent_ids, "commit_sha": commit_sha}
+    cached_events = [{"type": "agent_result", "data": _analysis_response(params, agent_id, entry).model_dump()} for agent_id, entry in cached.items()]
+    
+    key = "\0".join(("batch", f"{request.owner}/{request.repo}".lower(), commit_sha or "", *sorted(agent_ids)))
+    if len(cached) == len(agent_ids):
+        return analysis_jobs().record(key, "analysis_batch", params, cached, cached_events)
+    job, joined = analysis_jobs().submit(
+        key, "analysis_batch", params,
+        lambda flight: _run_batch_analysis(flight, params, github_service, agent_service, cache_keys, cached)
+    )
+    if joined:
+        print(f"Joining in-flight batch analysis of {request.owner}/{request.repo}")
+    else:
+        for event in cached_events:
+            job.flight.publish(event)
+    return job
+
+async def _bulk_analyze_repository(repository: str, request: BulkAnalysisRequest, slots: asyncio.Semaphore, github_service: GitHubService, agent_service: AzureAgentService) -> dict:
+    """Analyze one repository of a bulk request once a slot is free; returns its NDJSON result line."""
+    owner, repo = repository.split("/")
+    async with slots:
+        started = time.time()
+        line: Dict[str, Any] = {"type": "result", "repository": repository, "commit_sha": None, "queue_wait_seconds": None, "results": [], "error": None}
+        try:
+            job = await _start_batch_analysis_job(RepositoryBatchAnalysisRequest(owner=owner, repo=repo, agent_ids=request.agent_ids, refresh=request.refresh), github_service, agent_service)
+            await job.flight.wait()
+            queue_wait = job.queue_wait_seconds
+            line.update(
+                commit_sha=job.params["commit_sha"],
+                queue_wait_seconds=round(queue_wait, 3) if queue_wait is not None else None,
+                results=[_analysis_response(job.params, agent_id, result).model_dump() for agent_id, result in job.result.items()]
+            )
+        except Exception as e:
+            print(f"Bulk analysis of {repository} failed: {str(e)}")
+            line["error"] = str(e)
+        line["elapsed_seconds"] = round(time.time() - started, 3)
+        return line
+
+def _analysis_response(params: dict, agent_id: str, result: dict) -> RepositoryAnalysisResponse:
+    """RepositoryAnalysisResponse for one agent's result of an analysis job with the given params."""
+    return RepositoryAnalysisResponse(
+        agent_id=agent_id,
+        repo_name=f"{params['owner']}/{params['repo']}",
+        analysis=result.get("analysis", ""),
+        setup_commands=result.get("setup_commands", {}),
+        commit_sha=params["commit_sha"],
+        cached=result.get("cached", params.get("cached", False))
+    )
+
+def _analysis_result_response(job: Job) -> RepositoryAnalysisResponse:
+    """RepositoryAnalysisResponse for a completed single analysis job."""
+    return _analysis_response(job.params, job.params["agent_id"], job.result)
+
+def _analysis_job_response(job: Job) -> AnalysisJobResponse:
+    completed = job.status == "completed"
+    batch = job.kind == "analysis_batch"
+    return AnalysisJobResponse(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        owner=job.params["owner"],
+        repo=job.params["repo"],
+        agent_id=job.params.get("agent_id"),
+        agent_ids=job.params.get("agent_ids"),
+        commit_sha=job.params["commit_sha"],
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        queue_wait_seconds=job.queue_wait_seconds,
+        run_seconds=job.run_seconds,
+        error=job.error,
+        result=_analysis_result_response(job) if completed and not batch else None,
+        results=[_analysis_response(job.params, agent_id, result) for agent_id, result in job.result.items()] if completed and batch else None
+    )
+
+async def _analysis_job_events(job: Job) -> AsyncIterator[bytes]:
+    """
+    SSE events of an analysis job: its progress so far and as it happens, then
+    "final_result" (single analyses) and "complete", or "error".
+    
+    Besides step updates, "analysis_delta" and "setup_delta" events carry the
+    model's reply text as it is generated, "agent_result" events carry each
+    agent's result of a batch analysis as soon as it is ready, and "job"
+    events report when the job was queued and picked up by a worker.
+    """
+    repo_name = f"{job.params['owner']}/{job.params['repo']}"
+    updates = job.flight.subscribe()
+    started = time.time()
+    try:
+        while True:
+            try:
+                update = await asyncio.wait_for(updates.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield SSE_HEARTBEAT
+                continue
+            
+            if update is FLIGHT_END:
+                break
+            
+            # AnalysisProgressUpdate models, text deltas and job status
+            yield sse_event(update)
+    finally:
+        # If the client went away before the analysis finished and nobody else
+        # holds the job, unsubscribing cancels it with its agent runs
+        if not job.flight.task.done():
+            print(f"Client disconnected from analysis of {repo_name} after {time.time() - started:.1f} seconds")
+            latency_metrics().increment("analysis_stream.disconnected")
+            latency_metrics().observe("analysis_stream.disconnected_after", time.time() - started)
+        job.flight.unsubscribe(updates)
+    
+    if job.status == "completed":
+        if job.kind == "analysis":
+            yield sse_event({"type": "final_result", "data": _analysis_result_response(job).model_dump()})
+        yield sse_event({"type": "complete"})
+    else:
+        print(f"Error in streaming analysis: {job.error or job.status}")
+        yield sse_event({
+            "type": "error",
+            "error": job.error or f"Analysis {job.status}",
+            "agent_id": job.params.get("agent_id"),
+            "repo_name": repo_name
+        })
+
+def _sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/plain",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream",
+        }
+    )
+
+def _repository_info_response(repo_data: dict) -> Response:
+    """Encode a repository snapshot as RepositoryInfoResponse JSON, writing the file tree directly."""
+    files = repo_data.get("files")
+    meta = RepositoryInfoResponse(**{key: value for key, value in repo_data.items() if key != "files"})
+    body = meta.model_dump_json(exclude={"files"})
+    files_json = files.to_json() if files is not None else "null"
+    return Response(content=f'{body[:-1]},"files":{files_json}}}', media_type="application/json")
+
+def _repository_metadata(repo_data: dict) -> dict:
+    """Everything in a snapshot except the file tree, validated like RepositoryInfoResponse."""
+    metadata = RepositoryInfoResponse(**{key: value for key, value in repo_data.items() if key != "files"}).model_dump(exclude={"files"})
+    metadata["commit_sha"] = repo_data.get("commit_sha")
+    return metadata
+
+def _chunks(items: Iterable[str], size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _encode_files_cursor(commit_sha: Optional[str], offset: int) -> str:
+    # The cursor pins the commit so every page comes from the same tree even if
+    # the branch moves while the client is paging.
+    raw = f"{commit_sha or ''}:{offset}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_files_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        commit_sha, _, offset_text = raw.rpartition(":")
+        offset = int(offset_text)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0 or (commit_sha and not is_commit_sha(commit_sha)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return commit_sha or None, offset
+
+async def _get_repository_snapshot(github_service: GitHubService, owner: str, repo: str, commit_sha: Optional[str] = None) -> dict:
+    """Load a repository snapshot, mapping failures to HTTP errors."""
+    try:
+        print(f"Fetching repository data for {owner}/{repo}...")
+        repo_data = await github_service.get_repository_snapshot(owner, repo, commit_sha=commit_sha)
+    except RepositoryNotFoundError:
+        print(f"Repository not found: {owner}/{repo}")
+        raise HTTPException(status_code=404, detail="Repository not found")
+    except RuntimeError as e:
+        error_msg = f"Error fetching repository info: {str(e)}"
+        print(error_msg)
+        raise HTTPException(status_code=500, detail=error_msg)
+    except Exception as e:
+        error_msg = f"Unexpected error: {str(e)}"
+        print(error_msg)
+        raise HTTPException(status_code=500, detail=error_msg)
+    return repo_data
 
 @app.get("/")
 async def root():
@@ -52,53 +451,50 @@ async def health_check():
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unavailable")
 
+@app.get("/api/github/cache-stats")
+async def github_cache_stats() -> Dict[str, Any]:
+    """Report cache effectiveness: GitHub conditional requests, snapshots, tree indexes, compacted READMEs and analyses."""
+    return {
+        "conditional_requests": github_transport().stats(),
+        "snapshots": snapshot_cache().stats(),
+        "tree_indexes": tree_index_cache().stats(),
+        "readmes": readme_cache().stats(),
+        "analyses": analysis_cache().stats(),
+    }
+
+@app.get("/api/metrics")
+async def metrics() -> Dict[str, Any]:
+    """Report per-step latency of agent calls and job queue waits, event counters, the job queue and the shared agents client."""
+    return {
+        "latency": latency_metrics().snapshot(),
+        "counters": latency_metrics().counters(),
+        "analysis_jobs": analysis_jobs().stats(),
+        "agents_client": shared_agent_service().stats() if shared_agent_service.cache_info().currsize else None,
+    }
+
 @app.post("/api/analyze", response_model=RepositoryAnalysisResponse)
 async def analyze_repository(
     request: RepositoryAnalysisRequest,
     github_service: GitHubService = Depends(get_github_service),
     agent_service: AzureAgentService = Depends(get_agent_service)
 ):
+    """Analyze a repository and wait for the result; runs as a job on the bounded worker pool."""
     try:
         logger.info(f"Starting analysis for repository: {request.owner}/{request.repo} with agent: {request.agent_id}")
         print(f"Analyzing repository: {request.owner}/{request.repo} with agent: {request.agent_id}")
         
-        repo_info = await github_service.get_repository_info(request.owner, request.repo)
-        if not repo_info:
-            print(f"Repository not found: {request.owner}/{request.repo}")
-            repo_info = {"name": request.repo, "full_name": f"{request.owner}/{request.repo}"}
-        
-        readme_content = await github_service.get_readme_content(request.owner, request.repo)
-        print(f"README content found: {readme_content is not None}")
-        
-        dependencies = await github_service.get_requirements(request.owner, request.repo)
-        print(f"Dependencies found: {len(dependencies)}")
-        
-        files = await github_service.get_repository_files(request.owner, request.repo)
-        print(f"Repository files found: {len(files)}")
-        
-        files_dict = [{"path": file.path, "type": file.type, "size": file.size} for file in files]
+        job = await _start_analysis_job(request, github_service, agent_service)
+        await job.flight.wait()
+        response = _analysis_result_response(job)
         
-        analysis_result = await agent_service.analyze_repository(
-            request.agent_id,
-            f"{request.owner}/{request.repo}",
-            readme_content or "No README found",  # Provide default if None
-            dependencies or {},  # Provide empty dict if None
-            files_dict
-        )
-        
-        analysis = analysis_result.get("analysis", "")
-        setup_commands = analysis_result.get("setup_commands", {})
-        
-        print(f"Analysis result length: {len(analysis)}")
-        print(f"Setup commands found: {len(setup_commands)}")
+        print(f"Analysis result length: {len(response.analysis)}")
+        print(f"Setup commands found: {len(response.setup_commands or {})}")
         
         logger.info(f"Analysis completed successfully for {request.owner}/{request.repo}")
-        return RepositoryAnalysisResponse(
-            agent_id=request.agent_id,
-            repo_name=f"{request.owner}/{request.repo}",
-            analysis=analysis,
-            setup_commands=setup_commands
-        )
+        return response
+    except JobQueueFull as e:
+        logger.warning(f"Rejected analysis of {request.owner}/{request.repo}: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing repository {request.owner}/{request.repo}: {str(e)}", exc_info=True)
         print(f"Error analyzing repository: {str(e)}")
@@ -115,137 +511,347 @@ async def analyze_repository_stream(
     github_service: GitHubService = Depends(get_github_service),
     agent_service: AzureAgentService = Depends(get_agent_service)
 ):
-    """Stream real-time progress updates during repository analysis."""
+    """
+    Stream real-time progress updates during repository analysis.
+    
+    The analysis runs as a job (see /api/jobs/{job_id}/events for the event
+    format); "final_result" holds the authoritative result (a step that falls
+    back replaces its streamed text). Unlike a job submitted to
+    /api/jobs/analyze, the analysis is cancelled when the client disconnects
+    and no other request is waiting for it.
+    """
     
     async def generate_progress_stream():
+        print(f"Starting streaming analysis for repository: {request.owner}/{request.repo} with agent: {request.agent_id}")
         try:
-            print(f"Starting streaming analysis for repository: {request.owner}/{request.repo} with agent: {request.agent_id}")
-            
-            # Create a queue to collect progress updates
-            import asyncio
-            progress_queue = asyncio.Queue()
-            analysis_complete = False
-            
-            async def progress_callback(update: AnalysisProgressUpdate):
-                await progress_queue.put(update)
-            
-            # Start the analysis in a background task
-            async def run_analysis():
-                nonlocal analysis_complete
-                try:
-                    # Fetch repository data
-                    repo_info = await github_service.get_repository_info(request.owner, request.repo)
-                    if not repo_info:
-                        print(f"Repository not found: {request.owner}/{request.repo}")
-                        repo_info = {"name": request.repo, "full_name": f"{request.owner}/{request.repo}"}
-                    
-                    readme_content = await github_service.get_readme_content(request.owner, request.repo)
-                    dependencies = await github_service.get_requirements(request.owner, request.repo)
-                    files = await github_service.get_repository_files(request.owner, request.repo)
-                    
-                    files_dict = [{"path": file.path, "type": file.type, "size": file.size} for file in files]
-                    
-                    # Perform analysis with progress callback
-                    analysis_result = await agent_service.analyze_repository(
-                        request.agent_id,
-                        f"{request.owner}/{request.repo}",
-                        readme_content or "No README found",
-                        dependencies or {},
-                        files_dict,
-                        progress_callback=progress_callback
-                    )
-                    
-                    # Send final result to queue
-                    final_response = RepositoryAnalysisResponse(
-                        agent_id=request.agent_id,
-                        repo_name=f"{request.owner}/{request.repo}",
-                        analysis=analysis_result.get("analysis", ""),
-                        setup_commands=analysis_result.get("setup_commands", {})
-                    )
-                    
-                    await progress_queue.put({"type": "final_result", "data": final_response.model_dump()})
-                    await progress_queue.put({"type": "complete"})
-                    
-                except Exception as e:
-                    print(f"Error in analysis task: {str(e)}")
-                    await progress_queue.put({
-                        "type": "error",
-                        "error": str(e),
-                        "agent_id": request.agent_id,
-                        "repo_name": f"{request.owner}/{request.repo}"
-                    })
-                finally:
-                    analysis_complete = True
-            
-            # Start the analysis task
-            analysis_task = asyncio.create_task(run_analysis())
-            
-            # Stream progress updates as they come in
-            while not analysis_complete or not progress_queue.empty():
-                try:
-                    # Wait for next update with timeout
-                    update = await asyncio.wait_for(progress_queue.get(), timeout=1.0)
-                    
-                    if hasattr(update, 'model_dump'):  # It's an AnalysisProgressUpdate
-                        yield f"data: {json.dumps(update.model_dump())}\n\n"
-                    else:  # It's a dict (final result, error, etc.)
-                        yield f"data: {json.dumps(update)}\n\n"
-                        
-                        if update.get("type") in ["complete", "error"]:
-                            break
-                            
-                except asyncio.TimeoutError:
-                    # Check if analysis is still running
-                    if analysis_complete:
-                        break
-                    continue
-            
-            # Ensure the analysis task completes
-            if not analysis_task.done():
-                await analysis_task
-            
+            job = await _start_analysis_job(request, github_service, agent_service)
         except Exception as e:
             print(f"Error in streaming analysis: {str(e)}")
-            error_response = {
+            yield sse_event({
                 "type": "error",
                 "error": str(e),
                 "agent_id": request.agent_id,
                 "repo_name": f"{request.owner}/{request.repo}"
-            }
-            yield f"data: {json.dumps(error_response)}\n\n"
+            })
+            return
+        async for event in _analysis_job_events(job):
+            yield event
+    
+    return _sse_response(generate_progress_stream())
+
+@app.post("/api/analyze-batch")
+async def analyze_repository_batch(
+    request: RepositoryBatchAnalysisRequest,
+    github_service: GitHubService = Depends(get_github_service),
+    agent_service: AzureAgentService = Depends(get_agent_service)
+) -> StreamingResponse:
+    """
+    Analyze one repository for several agents, streaming each agent's result as SSE.
+    
+    The repository is fetched and its configuration files identified and
+    loaded once; only the agent-specific steps run per agent, concurrently.
+    Each agent's RepositoryAnalysisResponse arrives as an "agent_result" event
+    as soon as it is ready (cached ones first), followed by "complete". The
+    shared step 2 reports progress as for /api/analyze-stream. The batch runs
+    as one job on the analysis worker pool.
+    """
+    if not request.agent_ids:
+        raise HTTPException(status_code=400, detail="agent_ids must not be empty")
+    
+    async def generate_results_stream() -> AsyncIterator[bytes]:
+        print(f"Starting batch analysis for repository: {request.owner}/{request.repo} with agents: {', '.join(request.agent_ids)}")
+        try:
+            job = await _start_batch_analysis_job(request, github_service, agent_service)
+        except Exception as e:
+            print(f"Error in batch analysis: {str(e)}")
+            yield sse_event({"type": "error", "error": str(e), "repo_name": f"{request.owner}/{request.repo}"})
+            return
+        async for event in _analysis_job_events(job):
+            yield event
+    
+    return _sse_response(generate_results_stream())
+
+@app.post("/api/analyze-bulk")
+async def analyze_repositories_bulk(
+    request: BulkAnalysisRequest,
+    github_service: GitHubService = Depends(get_github_service),
+    agent_service: AzureAgentService = Depends(get_agent_service)
+) -> StreamingResponse:
+    """
+    Analyze many repositories for a list of agents, streaming results as NDJSON.
+    
+    Up to ``concurrency`` repositories are analyzed at once, each as a batch
+    analysis (see /api/analyze-batch). Beyond that, GitHub calls and agent
+    runs are bounded process-wide by GITHUB_MAX_CONCURRENCY and
+    AZURE_AGENTS_MAX_CONCURRENT_RUNS. Each repository produces one
+    {"type": "result", "repository", "commit_sha", "results", "error",
+    "queue_wait_seconds", "elapsed_seconds"} line as soon as it is done, in
+    completion order, so a slow repository does not hold back the others. A
+    final {"type": "end"} line summarises the run.
+    """
+    repositories = list(dict.fromkeys(request.repositories))
+    invalid = [repository for repository in repositories if repository.count("/") != 1 or not all(repository.split("/"))]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Repositories must be given as owner/repo: {', '.join(invalid[:10])}")
+    if not repositories or not request.agent_ids:
+        raise HTTPException(status_code=400, detail="repositories and agent_ids must not be empty")
+    if len(repositories) > BULK_ANALYSIS_MAX_REPOSITORIES:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_ANALYSIS_MAX_REPOSITORIES} repositories can be analyzed per request")
+    concurrency = max(1, min(request.concurrency or BULK_ANALYSIS_CONCURRENCY, BULK_ANALYSIS_MAX_CONCURRENCY))
+    
+    async def generate_ndjson() -> AsyncIterator[bytes]:
+        print(f"Starting bulk analysis of {len(repositories)} repositories with agents: {', '.join(request.agent_ids)} ({concurrency} at a time)")
+        started = time.time()
+        slots = asyncio.Semaphore(concurrency)
+        tasks = [asyncio.create_task(_bulk_analyze_repository(repository, request, slots, github_service, agent_service)) for repository in repositories]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                failed += line["error"] is not None
+                yield dumps(line) + b"\n"
+            yield dumps({"type": "end", "total": len(repositories), "failed": failed, "elapsed_seconds": round(time.time() - started, 3)}) + b"\n"
+        finally:
+            # The client went away: stop the analyses nobody else is waiting for
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
     
     return StreamingResponse(
-        generate_progress_stream(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        }
+        generate_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
     )
 
+@app.post("/api/jobs/analyze", response_model=AnalysisJobResponse, status_code=202)
+async def submit_analysis_job(
+    request: RepositoryAnalysisRequest,
+    github_service: GitHubService = Depends(get_github_service),
+    agent_service: AzureAgentService = Depends(get_agent_service)
+) -> AnalysisJobResponse:
+    """
+    Queue a repository analysis and return its job without waiting for it.
+    
+    The job runs to completion whether or not anyone follows it; poll
+    /api/jobs/{job_id} or follow /api/jobs/{job_id}/events. Responds 429 when
+    the job queue is full.
+    """
+    try:
+        job = await _start_analysis_job(request, github_service, agent_service, background=True)
+    except JobQueueFull as e:
+        logger.warning(f"Rejected analysis job for {request.owner}/{request.repo}: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e))
+    logger.info(f"Analysis job {job.id} for {request.owner}/{request.repo} with agent {request.agent_id} is {job.status}")
+    return _analysis_job_response(job)
+
+@app.get("/api/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(job_id: str) -> AnalysisJobResponse:
+    """Status of an analysis job, with its result once completed."""
+    job = analysis_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _analysis_job_response(job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_analysis_job_events(job_id: str) -> StreamingResponse:
+    """
+    Stream an analysis job's events as SSE.
+    
+    Events emitted before the client connected are replayed first (text
+    deltas merged), so this can be opened at any point of the job's life.
+    """
+    job = analysis_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _sse_response(_analysis_job_events(job))
+
 @app.get("/api/repo-info/{owner}/{repo}", response_model=RepositoryInfoResponse)
 async def get_repository_info(
     owner: str,
     repo: str,
     github_service: GitHubService = Depends(get_github_service)
 ):
+    repo_data = await _get_repository_snapshot(github_service, owner, repo)
+    return _repository_info_response(repo_data)
+
+@app.get("/api/repo-info/{owner}/{repo}/stream")
+async def stream_repository_info(
+    owner: str,
+    repo: str,
+    prefix: str = "",
+    github_service: GitHubService = Depends(get_github_service)
+) -> StreamingResponse:
+    """
+    Stream repository info as NDJSON.
+    
+    The first line is {"type": "meta", "data": {...}} with everything but the
+    file tree, sent as soon as metadata and README are available. It is
+    followed by {"type": "files", "offset": n, "files": [...]} lines of up to
+    REPO_INFO_STREAM_CHUNK_SIZE entries and a final {"type": "end"} line.
+    Failures after the first line are reported as {"type": "error"}.
+    
+    Args:
+        prefix: Only list entries at or below this directory
+    """
+    print(f"Streaming repository data for {owner}/{repo}...")
+    parts = github_service.iter_repository_snapshot(owner, repo)
     try:
-        print(f"Fetching repository data for {owner}/{repo}...")
-        repo_data = await github_service.get_repository_snapshot(owner, repo)
-        if not repo_data:
-            print(f"Repository not found: {owner}/{repo}")
-            raise HTTPException(status_code=404, detail="Repository not found")
-        
-        return RepositoryInfoResponse(**repo_data)
+        metadata = await anext(parts)
+    except RepositoryNotFoundError:
+        print(f"Repository not found: {owner}/{repo}")
+        raise HTTPException(status_code=404, detail="Repository not found")
     except RuntimeError as e:
         error_msg = f"Error fetching repository info: {str(e)}"
         print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
-    except Exception as e:
-        error_msg = f"Unexpected error: {str(e)}"
-        print(error_msg)
-        raise HTTPException(status_code=500, detail=error_msg)
+    
+    async def generate_ndjson() -> AsyncIterator[bytes]:
+        try:
+            yield dumps({"type": "meta", "data": _repository_metadata(metadata)}) + b"\n"
+            
+            snapshot = await anext(parts)
+            files = snapshot.get("files") or FileTree()
+            offset = 0
+            for chunk in _chunks(files.iter_json(files.iter_prefix(prefix)), REPO_INFO_STREAM_CHUNK_SIZE):
+                yield f'{{"type":"files","offset":{offset},"files":[{",".join(chunk)}]}}\n'.encode()
+                offset += len(chunk)
+            
+            yield dumps({"type": "end", "total_files": offset, "commit_sha": snapshot.get("commit_sha")}) + b"\n"
+        except Exception as e:
+            print(f"Error streaming repository info: {str(e)}")
+            yield dumps({"type": "error", "error": str(e)}) + b"\n"
+        finally:
+            await parts.aclose()
+    
+    return StreamingResponse(
+        generate_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+@app.get("/api/repo-info/{owner}/{repo}/files", response_model=RepositoryFilesPage)
+async def list_repository_files(
+    owner: str,
+    repo: str,
+    cursor: Optional[str] = None,
+    limit: int = REPO_FILES_PAGE_SIZE,
+    prefix: str = "",
+    github_service: GitHubService = Depends(get_github_service)
+) -> Response:
+    """
+    Page through a repository's file tree.
+    
+    Pass the returned next_cursor to get the following page; it is omitted on
+    the last page. Cursors pin the commit of the first page, so a listing stays
+    consistent even if the branch moves in between.
+    """
+    if not 1 <= limit <= REPO_FILES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {REPO_FILES_MAX_PAGE_SIZE}")
+    commit_sha, offset = _decode_files_cursor(cursor) if cursor else (None, 0)
+    
+    repo_data = await _get_repository_snapshot(github_service, owner, repo, commit_sha=commit_sha)
+    files = repo_data.get("files") or FileTree()
+    commit_sha = repo_data.get("commit_sha")
+    indices = list(files.iter_prefix(prefix)) if prefix else range(len(files))
+    page = indices[offset:offset + limit]
+    next_offset = offset + len(page)
+    
+    body = RepositoryFilesPage(
+        commit_sha=commit_sha,
+        total=len(indices),
+        files=[],
+        next_cursor=_encode_files_cursor(commit_sha, next_offset) if next_offset < len(indices) else None,
+    ).model_dump_json(exclude={"files"})
+    return Response(content=f'{body[:-1]},"files":{files.to_json(page)}}}', media_type="application/json")
+
+@app.get("/api/repo-tree/{owner}/{repo}", response_model=RepositoryTreeResponse)
+async def query_repository_tree(
+    owner: str,
+    repo: str,
+    path: Optional[str] = None,
+    glob: Optional[str] = None,
+    ext: Optional[str] = None,
+    q: Optional[str] = None,
+    ref: Optional[str] = None,
+    limit: int = REPO_FILES_PAGE_SIZE,
+    github_service: GitHubService = Depends(get_github_service)
+) -> Response:
+    """
+    Query a repository's file tree through an index built once per commit.
+    
+    Either lists one directory (``path``, directories first) or filters the
+    whole tree by ``glob`` (e.g. ``**/package.json``), file extension ``ext``
+    and case-insensitive substring ``q``; several filters are intersected.
+    Without any parameter the root directory is listed.
+    
+    Args:
+        ref: Commit SHA to query; defaults to the head of the default branch
+        limit: Maximum number of entries returned; ``total`` counts all matches
+    """
+    if not 1 <= limit <= REPO_FILES_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {REPO_FILES_MAX_PAGE_SIZE}")
+    if ref is not None and not is_commit_sha(ref):
+        raise HTTPException(status_code=400, detail="ref must be a full commit SHA")
+    filters = [(query, value) for query, value in (("glob", glob), ("ext", ext), ("q", q)) if value]
+    if path is not None and filters:
+        raise HTTPException(status_code=400, detail="path cannot be combined with glob, ext or q")
+    
+    repo_data = await _get_repository_snapshot(github_service, owner, repo, commit_sha=ref)
+    index = tree_index_for(owner, repo, repo_data.get("commit_sha"), repo_data.get("files") or FileTree())
+    
+    if not filters:
+        matches = index.list_dir(path or "")
+        if matches is None:
+            raise HTTPException(status_code=404, detail=f"Directory not found: {path}")
+    else:
+        queries = {"glob": index.glob, "ext": index.find_extension, "q": index.search}
+        (query, value), *other_filters = filters
+        matches = queries[query](value)
+        for query, value in other_filters:
+            found_set = set(queries[query](value))
+            matches = [i for i in matches if i in found_set]
+    
+    body = RepositoryTreeResponse(
+        commit_sha=index.commit_sha,
+        total=len(matches),
+        truncated=len(matches) > limit,
+        files=[],
+    ).model_dump_json(exclude={"files"})
+    return Response(content=f'{body[:-1]},"files":{index.tree.to_json(matches[:limit])}}}', media_type="application/json")
+
+@app.get("/api/dependencies/{owner}/{repo}", response_model=RepositoryDependenciesResponse)
+async def get_repository_dependencies(
+    owner: str,
+    repo: str,
+    ref: Optional[str] = None,
+    github_service: GitHubService = Depends(get_github_service)
+) -> RepositoryDependenciesResponse:
+    """
+    List a repository's dependencies, parsed from every manifest in its tree.
+    
+    Covers requirements files, pyproject.toml, Pipfile, package.json (with
+    npm, yarn and pnpm workspaces), go.mod, Cargo.toml, pom.xml and Gradle
+    build files at any depth outside vendored directories. Each dependency
+    has its name, version spec as written, scope and ecosystem.
+    
+    Args:
+        ref: Commit SHA to read; defaults to the head of the default branch
+    """
+    if ref is not None and not is_commit_sha(ref):
+        raise HTTPException(status_code=400, detail="ref must be a full commit SHA")
+    
+    repo_data = await _get_repository_snapshot(github_service, owner, repo, commit_sha=ref)
+    commit_sha = repo_data.get("commit_sha")
+    index = tree_index_for(owner, repo, commit_sha, repo_data.get("files") or FileTree())
+    manifests, truncated = await github_service.get_dependency_manifests(owner, repo, index, ref=commit_sha)
+    
+    return RepositoryDependenciesResponse(
+        commit_sha=commit_sha,
+        manifests=sorted((path for path in manifests if is_manifest_name(posixpath.basename(path))), key=lambda path: (path.count("/"), path)),
+        truncated=truncated,
+        workspaces=workspace_manifests(manifests, index),
+        dependencies=parse_manifests(manifests),
+    )
 
 @app.post("/api/breakdown-tasks", response_model=TaskBreakdownResponse)
 async def breakdown_tasks(
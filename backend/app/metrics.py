@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterator, List
+
+# Latency samples kept per operation; percentiles are computed over this
+# sliding window.
+_WINDOW = 1024
+
+
+class LatencyMetrics:
+    """
+    Per-operation latency recorder.
+
+    Keeps the most recent ``window`` samples of each named operation plus
+    lifetime call and error counts, and reports count, mean, p50, p95 and
+    max in milliseconds. Plain event counters (e.g. cancelled runs) are kept
+    alongside.
+    """
+
+    def __init__(self, window: int = _WINDOW) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._calls: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._calls[name] = self._calls.get(name, 0) + 1
+            if error:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def time(self, name: str) -> Iterator[None]:
+        """Record the duration of the ``with`` block under ``name``; exceptions count as errors."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - start, error=True)
+            raise
+        self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            calls = dict(self._calls)
+            errors = dict(self._errors)
+        report = {}
+        for name in sorted(samples):
+            values = samples[name]
+            report[name] = {
+                "calls": calls[name],
+                "errors": errors.get(name, 0),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return report
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._calls.clear()
+            self._errors.clear()
+            self._counters.clear()
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@lru_cache
+def latency_metrics() -> LatencyMetrics:
+    """Process-wide latency recorder reported by /api/metrics."""
+    return LatencyMetrics()
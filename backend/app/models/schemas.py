@@ -5,6 +5,7 @@ class RepositoryAnalysisRequest(BaseModel):
     owner: str
     repo: str
     agent_id: str
+    refresh: bool = False  # Bypass the analysis cache
     
 class RepositoryAnalysisResponse(BaseModel):
     agent_id: str
@@ -12,6 +13,38 @@ class RepositoryAnalysisResponse(BaseModel):
     analysis: str
     error: Optional[str] = None
     setup_commands: Optional[Dict[str, str]] = None
+    commit_sha: Optional[str] = None
+    cached: bool = False
+
+class RepositoryBatchAnalysisRequest(BaseModel):
+    owner: str
+    repo: str
+    agent_ids: List[str]
+    refresh: bool = False  # Bypass the analysis cache
+
+class BulkAnalysisRequest(BaseModel):
+    repositories: List[str]  # "owner/repo"
+    agent_ids: List[str]
+    refresh: bool = False  # Bypass the analysis cache
+    concurrency: Optional[int] = None  # Repositories analyzed at once; defaults to BULK_ANALYSIS_CONCURRENCY
+
+class AnalysisJobResponse(BaseModel):
+    job_id: str
+    kind: str  # "analysis" or "analysis_batch"
+    status: str  # "queued", "running", "completed", "failed", "cancelled"
+    owner: str
+    repo: str
+    agent_id: Optional[str] = None  # Single analyses
+    agent_ids: Optional[List[str]] = None  # Batch analyses
+    commit_sha: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    queue_wait_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[RepositoryAnalysisResponse] = None  # Once a single analysis completed
+    results: Optional[List[RepositoryAnalysisResponse]] = None  # Once a batch analysis completed
 
 class RepositoryFileInfo(BaseModel):
     path: str
@@ -27,6 +60,32 @@ class RepositoryInfoResponse(BaseModel):
     readme: Optional[str] = None
     files: Optional[List[RepositoryFileInfo]] = None
 
+class RepositoryFilesPage(BaseModel):
+    commit_sha: Optional[str] = None
+    total: int
+    files: List[RepositoryFileInfo]
+    next_cursor: Optional[str] = None  # Opaque; absent on the last page
+
+class RepositoryTreeResponse(BaseModel):
+    commit_sha: Optional[str] = None
+    total: int
+    truncated: bool = False
+    files: List[RepositoryFileInfo]
+
+class DependencyInfo(BaseModel):
+    name: str  # Package name; "group:artifact" for Maven and Gradle
+    version_spec: Optional[str] = None  # As written in the manifest, e.g. ">=2.0", "^18.2.0", "v1.9.1"
+    scope: str  # "runtime", "dev", "optional", "peer", "build" or "indirect"
+    ecosystem: str  # "pypi", "npm", "go", "cargo" or "maven"
+    manifest: str  # Path of the manifest declaring it
+
+class RepositoryDependenciesResponse(BaseModel):
+    commit_sha: Optional[str] = None
+    manifests: List[str]  # Manifests parsed, shallowest first
+    truncated: bool = False  # More manifests in the tree than DEPENDENCY_MANIFESTS_MAX
+    workspaces: List[str] = []  # Workspace member manifests declared by the root package.json or pnpm-workspace.yaml
+    dependencies: List[DependencyInfo]
+
 class DevinSetupCommand(BaseModel):
     step: str
     description: str
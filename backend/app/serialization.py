@@ -0,0 +1,44 @@
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as UTF-8 JSON bytes.
+
+    Pydantic models are encoded by pydantic's own serializer; everything else
+    (including models nested in dicts and lists) goes through orjson.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+def sse_event(payload: Any) -> bytes:
+    """Build one server-sent events frame carrying ``payload`` as JSON."""
+    return b"data: " + dumps(payload) + b"\n\n"
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with ``dumps``.
+
+    Returning it from an endpoint skips FastAPI's jsonable_encoder pass and
+    the response_model re-validation of an already validated model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,7 +1,10 @@
 import asyncio
+import hashlib
 import time
-from typing import Dict, List, Optional, Any, Union, Callable, Awaitable
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Any, Tuple, Union, Callable, Awaitable, Container
 
+import aiohttp
 from azure.ai.agents.aio import AgentsClient
 from azure.ai.agents.models import (
     AgentThreadCreationOptions,
@@ -10,11 +13,22 @@ from azure.ai.agents.models import (
     ListSortOrder,
 )
 from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.identity.aio import DefaultAzureCredential
 
-from ..config import PROJECT_ENDPOINT, MODEL_DEPLOYMENT_NAME, AZURE_AI_PROJECT_CONNECTION_STRING, AZURE_AI_AGENTS_API_KEY
+from ..config import PROJECT_ENDPOINT, MODEL_DEPLOYMENT_NAME, AZURE_AI_PROJECT_CONNECTION_STRING, AZURE_AI_AGENTS_API_KEY, AZURE_AGENTS_MAX_CONNECTIONS, AZURE_AGENTS_KEEPALIVE_SECONDS, CONFIG_SCORER_MIN_CONFIDENCE, SETUP_EXTRACTOR_MAX_GAPS, PROMPT_TOKEN_BUDGET_ANALYSIS, PROMPT_TOKEN_BUDGET_CONFIG_FILES, PROMPT_TOKEN_BUDGET_SETUP, DEPENDENCY_MANIFESTS_PROMPT_MAX
+from ..metrics import latency_metrics
 from ..models.schemas import AnalysisProgressUpdate
 from ..logging_config import get_agent_logger
+from .agent_registry import AgentRegistry
+from .config_scorer import score_config_files, shallowest_paths
+from .dependency_parser import find_manifests, parse_manifests, summarize_dependencies, workspace_manifests
+from .file_tree import FileTree
+from .pipeline import Stage, monotonic_progress, run_stages
+from .prompt_packer import PRIORITY_FILE_LIST, PRIORITY_MANIFEST, PRIORITY_README_KEY, PRIORITY_TREE, PromptPart, file_parts, pack_prompt, readme_parts
+from .setup_extractor import SetupExtraction, extract_setup_commands
+from .tree_index import TreeIndex
+from .tree_summary import tree_summary_for
 from ..constants import (
     AGENT_ID_GITHUB_COPILOT_COMPLETIONS,
     AGENT_ID_GITHUB_COPILOT_AGENT,
@@ -27,6 +41,37 @@ from ..constants import (
 )
 
 
+def _path_lookup(files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex] = None) -> Container[str]:
+    """Membership test over repository paths, answered by the tree index when one is available."""
+    if tree_index is not None:
+        return tree_index
+    if isinstance(files, FileTree):
+        return set(files.paths())
+    return {file["path"] for file in files}
+
+
+# Shown for a setup category that neither the local extractor nor the model found commands for.
+_SETUP_NOT_FOUND = {
+    "prerequisites": "No specific prerequisites identified",
+    "dependencies": "Dependency installation commands not found",
+    "run_app": "Run application commands not found",
+    "linting": "No linting commands identified",
+    "testing": "No testing commands identified",
+}
+
+
+def _is_setup_placeholder(value: Any) -> bool:
+    """True if a model's setup value says nothing was found rather than giving commands."""
+    if not isinstance(value, str) or not value.strip():
+        return True
+    text = value.strip().lower()
+    return text.startswith(("no ", "unable to", "n/a", "none")) or "not found" in text
+
+
+def _complete_setup_commands(extraction: SetupExtraction) -> Dict[str, str]:
+    return {category: extraction.commands.get(category, not_found) for category, not_found in _SETUP_NOT_FOUND.items()}
+
+
 class AzureAgentService:
     """Service for interacting with Azure AI Agents."""
     
@@ -34,12 +79,14 @@ class AzureAgentService:
         """Initialize the Azure Agent Service with credentials."""
         self.logger = get_agent_logger()
         # Use the new PROJECT_ENDPOINT format (following official samples)
-        self.endpoint = PROJECT_ENDPOINT or AZURE_AI_PROJECT_CONNECTION_STRING
+        endpoint = PROJECT_ENDPOINT or AZURE_AI_PROJECT_CONNECTION_STRING
         self.model_deployment = MODEL_DEPLOYMENT_NAME
         
-        if not self.endpoint:
+        if not endpoint:
             raise ValueError("PROJECT_ENDPOINT environment variable is required. Set it to your Azure AI Project endpoint (e.g., https://your-project.services.ai.azure.com/api/projects/your-project-id)")
         
+        self.endpoint: str = endpoint
+        
         # Ensure the endpoint uses HTTPS and fix common formatting issues
         if self.endpoint and not self.endpoint.startswith('https://'):
             if self.endpoint.startswith('http://'):
@@ -54,14 +101,77 @@ class AzureAgentService:
         except Exception:
             # Fall back to API key authentication if DefaultAzureCredential fails
             self.credential = None if not AZURE_AI_AGENTS_API_KEY or AZURE_AI_AGENTS_API_KEY == "your_api_key" else AzureKeyCredential(AZURE_AI_AGENTS_API_KEY)
+        
+        # One AgentsClient (and its keep-alive connection pool and bearer token
+        # cache) is shared by every request; it is opened on first use.
+        self._client: Optional[AgentsClient] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._client_lock = asyncio.Lock()
+        self.clients_created = 0
+        # Agent definitions are created once and reused across requests.
+        self.agents = AgentRegistry()
+    
+    async def _get_client(self) -> AgentsClient:
+        """
+        Return the shared AgentsClient, opening it on first use.
+        
+        The client's pipeline caches the bearer token until shortly before it
+        expires and its aiohttp session keeps connections to the endpoint
+        alive, so later calls skip both token acquisition and the TLS
+        handshake.
+        """
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                with latency_metrics().time("agent.client_open"):
+                    self._session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(limit=AZURE_AGENTS_MAX_CONNECTIONS, keepalive_timeout=AZURE_AGENTS_KEEPALIVE_SECONDS)
+                    )
+                    transport = AioHttpTransport(session=self._session, session_owner=False)
+                    client = AgentsClient(self.endpoint, self.credential, transport=transport)
+                    await client.__aenter__()
+                self._client = client
+                self.clients_created += 1
+        return self._client
+    
+    async def close(self) -> None:
+        """Close the shared client, its connection pool and the credential (application shutdown)."""
+        async with self._client_lock:
+            if self._client is not None:
+                await self.agents.delete_all(self._client)
+                await self._client.close()
+                self._client = None
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+            if isinstance(self.credential, DefaultAzureCredential):
+                await self.credential.close()
+    
+    async def delete_stale_agents(self) -> int:
+        """Delete registry agents left behind by earlier processes (application startup)."""
+        return await self.agents.delete_stale(await self._get_client())
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client_open": self._client is not None,
+            "clients_created": self.clients_created,
+            "max_connections": AZURE_AGENTS_MAX_CONNECTIONS,
+            "agent_registry": self.agents.stats(),
+        }
     
-    async def identify_config_files(self, repo_name: str, files: List[Dict[str, Any]]) -> List[str]:
+    async def identify_config_files(self, repo_name: str, files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex] = None) -> List[str]:
         """
         First step of the two-phase analysis: Identify configuration and dependency files.
         
+        The local scorer answers when it is confident enough
+        (CONFIG_SCORER_MIN_CONFIDENCE); otherwise a model picks from the
+        entries closest to the repository root.
+        
         Args:
             repo_name: The repository name in owner/repo format
             files: List of files in the repository
+            tree_index: Query index over the same files, used to validate the identified paths
             
         Returns:
             List of file paths that are relevant for configuration
@@ -69,6 +179,15 @@ class AzureAgentService:
         print(f"[CONFIG] Identifying configuration files for {repo_name}...")
         start_time = time.time()
         
+        with latency_metrics().time("config_files.scorer"):
+            selection = score_config_files(files, tree_index)
+        if selection.paths and selection.confidence >= CONFIG_SCORER_MIN_CONFIDENCE:
+            latency_metrics().increment("config_files.scorer_selected")
+            print(f"[CONFIG] Scorer selected {len(selection.paths)} config files (confidence {selection.confidence:.2f}) in {time.time() - start_time:.3f} seconds: {', '.join(selection.paths[:5])}" + ("..." if len(selection.paths) > 5 else ""))
+            return selection.paths
+        latency_metrics().increment("config_files.model_selected")
+        print(f"[CONFIG] Scorer confidence {selection.confidence:.2f} is below {CONFIG_SCORER_MIN_CONFIDENCE:.2f}, asking Azure AI Agents")
+        
         if not self.endpoint or self.endpoint == "your_endpoint":
             raise ValueError("Azure AI Project endpoint is not configured. Please set AZURE_AI_PROJECT_CONNECTION_STRING in your environment.")
         
@@ -78,16 +197,9 @@ class AzureAgentService:
         try:
             print(f"[CONFIG] Connecting to Azure AI Agents service...")
             
-            # Use DefaultAzureCredential as async context manager if available
-            credential_context = self.credential if isinstance(self.credential, DefaultAzureCredential) else None
-            
-            if credential_context:
-                async with credential_context:
-                    async with AgentsClient(self.endpoint, credential_context) as client:
-                        return await self._process_config_identification(client, repo_name, files, start_time)
-            else:
-                async with AgentsClient(self.endpoint, self.credential) as client:
-                    return await self._process_config_identification(client, repo_name, files, start_time)
+            client = await self._get_client()
+            with latency_metrics().time("agent.config_files"):
+                return await self._process_config_identification(client, repo_name, files, start_time, tree_index)
         except asyncio.TimeoutError:
             print(f"[CONFIG] Timeout during config file identification after {time.time() - start_time:.2f} seconds")
             raise RuntimeError("Config file identification timed out")
@@ -96,9 +208,9 @@ class AzureAgentService:
             print(f"[CONFIG] Error type: {type(e).__name__}")
             raise RuntimeError(f"Error identifying configuration files: {str(e)}")
 
-    async def _process_config_identification(self, client: AgentsClient, repo_name: str, files: List[Dict[str, Any]], start_time: float) -> List[str]:
+    async def _process_config_identification(self, client: AgentsClient, repo_name: str, files: Union[FileTree, List[Dict[str, Any]]], start_time: float, tree_index: Optional[TreeIndex] = None) -> List[str]:
         """Process config file identification using the new Azure AI Agents API."""
-        print(f"[CONFIG] Creating agent for config file identification...")
+        print(f"[CONFIG] Preparing config file identification...")
         agent_instructions = """
         You are an AI assistant that helps identify configuration and dependency files in a GitHub repository.
         Your task is to analyze the list of files in a repository and identify the most important files for understanding:
@@ -125,22 +237,28 @@ class AzureAgentService:
         `tsconfig.json`
         """
         
-        agent = await client.create_agent(
-            model=self.model_deployment,
-            name="config-file-identifier",
-            instructions=agent_instructions,
-        )
-        
         print(f"[CONFIG] Preparing file list for analysis ({len(files)} files)...")
-        file_list = "\n".join([f"{file['path']} ({file['type']})" for file in files[:100]])  # Limit to first 100 files
-        
-        content = f"Repository: {repo_name}\n\n"
-        content += "Files in repository:\n```\n" + file_list + "\n```\n\n"
-        content += "Please identify the most important configuration and dependency files from this list."
+        # The outline covers the whole tree; the files nearest the root fill what budget is left
+        tree_summary = await tree_summary_for(files, tree_index)
+        file_list = "\n".join([f"{file['path']} ({file['type']})" for file in shallowest_paths(files, 5000)])
+        
+        content = pack_prompt(
+            "config_files",
+            f"Repository: {repo_name}\n\n",
+            [
+                PromptPart("Repository structure", tree_summary, PRIORITY_TREE),
+                PromptPart("Files nearest the root", file_list, PRIORITY_FILE_LIST),
+            ],
+            "Please identify the most important configuration and dependency files from the paths above.",
+            PROMPT_TOKEN_BUDGET_CONFIG_FILES,
+        ).text
         
         print(f"[CONFIG] Starting config file identification with create_thread_and_process_run...")
-        run = await client.create_thread_and_process_run(
-            agent_id=agent.id,
+        run = await self.agents.create_thread_and_process_run(
+            client,
+            name="config-file-identifier",
+            instructions=agent_instructions,
+            model=self.model_deployment,
             thread=AgentThreadCreationOptions(
                 messages=[ThreadMessageOptions(role="user", content=content)]
             ),
@@ -154,19 +272,7 @@ class AzureAgentService:
         print(f"[CONFIG] Config file identification completed after {time.time() - start_time:.2f} seconds")
         print(f"[CONFIG] Retrieving config file identification results...")
         
-        # List all messages in the thread, in ascending order of creation
-        messages = client.messages.list(
-            thread_id=run.thread_id,
-            order=ListSortOrder.ASCENDING,
-        )
-        
-        response = ""
-        async for msg in messages:
-            if msg.role == "assistant":
-                last_part = msg.content[-1]
-                if isinstance(last_part, MessageTextContent):
-                    response = last_part.text.value
-                    break
+        response = await self._read_reply(client, run.thread_id)
         
         if response:
             import re
@@ -174,16 +280,9 @@ class AzureAgentService:
             file_paths = [path[0] or path[1] or path[2] for path in file_paths if any(path)]
             
             # Filter to ensure they exist in the repository
-            repo_files = [file["path"] for file in files]
+            repo_files = _path_lookup(files, tree_index)
             valid_files = [path for path in file_paths if path in repo_files]
             
-            # Clean up the agent
-            try:
-                await client.delete_agent(agent.id)
-                print(f"[CONFIG] Deleted agent {agent.id}")
-            except Exception as e:
-                print(f"[CONFIG] Warning: Could not delete agent {agent.id}: {str(e)}")
-            
             if valid_files:
                 valid_files = valid_files[:10]  # Limit to 10 most important files
                 print(f"[CONFIG] Identified {len(valid_files)} config files in {time.time() - start_time:.2f} seconds: {', '.join(valid_files[:5])}" + ("..." if len(valid_files) > 5 else ""))
@@ -191,15 +290,22 @@ class AzureAgentService:
         
         print(f"[CONFIG] No valid configuration files identified after {time.time() - start_time:.2f} seconds")
         raise RuntimeError("No valid configuration files identified by the agent")
-        
-    async def extract_setup_instructions(self, agent_id: str, repo_name: str, file_contents: Dict[str, str]) -> Dict[str, str]:
+    
+    async def extract_setup_instructions(self, agent_id: str, repo_name: str, file_contents: Dict[str, str], on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, str]:
         """
         Second step of the two-phase analysis: Extract setup instructions from config files.
         
+        Commands are first read from the files locally (package.json scripts,
+        pyproject.toml, Makefile targets, CI steps, ...). The model is only
+        asked when more than SETUP_EXTRACTOR_MAX_GAPS categories are still
+        missing; it then fills the gaps, and the local commands are kept if
+        it fails.
+        
         Args:
             agent_id: The type of AI agent ("github-copilot", "devin", etc.)
             repo_name: The repository name in owner/repo format
             file_contents: Dictionary mapping file paths to their contents
+            on_delta: Called with each fragment of the agent's reply as it streams in (optional)
             
         Returns:
             Dictionary of setup commands for Devin
@@ -207,6 +313,15 @@ class AzureAgentService:
         print(f"[SETUP] Extracting setup instructions for {repo_name} with agent: {agent_id}...")
         start_time = time.time()
         
+        with latency_metrics().time("setup_commands.extractor"):
+            extraction = extract_setup_commands(file_contents)
+        if len(extraction.missing) <= SETUP_EXTRACTOR_MAX_GAPS:
+            latency_metrics().increment("setup_commands.local")
+            print(f"[SETUP] Extracted setup commands locally in {time.time() - start_time:.3f} seconds" + (f" (missing: {', '.join(extraction.missing)})" if extraction.missing else ""))
+            return _complete_setup_commands(extraction)
+        latency_metrics().increment("setup_commands.model")
+        print(f"[SETUP] Local extraction is missing {', '.join(extraction.missing)}, asking Azure AI Agents")
+        
         if not self.endpoint or self.endpoint == "your_endpoint":
             raise ValueError("Azure AI Project endpoint is not configured. Please set AZURE_AI_PROJECT_CONNECTION_STRING in your environment.")
         
@@ -216,30 +331,29 @@ class AzureAgentService:
         try:
             print(f"[SETUP] Connecting to Azure AI Agents service...")
             
-            # Use DefaultAzureCredential as async context manager if available
-            credential_context = self.credential if isinstance(self.credential, DefaultAzureCredential) else None
-            
-            if credential_context:
-                async with credential_context:
-                    async with AgentsClient(self.endpoint, credential_context) as client:
-                        return await self._process_setup_extraction(client, agent_id, repo_name, file_contents, start_time)
-            else:
-                async with AgentsClient(self.endpoint, self.credential) as client:
-                    return await self._process_setup_extraction(client, agent_id, repo_name, file_contents, start_time)
+            client = await self._get_client()
+            with latency_metrics().time("agent.setup_commands"):
+                return await self._process_setup_extraction(client, agent_id, repo_name, file_contents, start_time, on_delta, extraction)
         except asyncio.TimeoutError:
             print(f"[SETUP] Timeout during setup instruction extraction after {time.time() - start_time:.2f} seconds")
+            if extraction.commands:
+                print(f"[SETUP] Returning the locally extracted commands instead")
+                return _complete_setup_commands(extraction)
             raise RuntimeError("Setup instruction extraction timed out")
         except Exception as e:
+            if extraction.commands:
+                print(f"[SETUP] Error during setup instruction extraction, returning the locally extracted commands: {str(e)}")
+                return _complete_setup_commands(extraction)
             print(f"[SETUP] Error during setup instruction extraction: {str(e)}")
             print(f"[SETUP] Error type: {type(e).__name__}")
             if hasattr(e, '__traceback__'):
                 import traceback
                 print(f"[SETUP] Traceback: {traceback.format_exc()}")
             raise RuntimeError(f"Error extracting setup instructions: {str(e)}")
-
-    async def _process_setup_extraction(self, client: AgentsClient, agent_id: str, repo_name: str, file_contents: Dict[str, str], start_time: float) -> Dict[str, str]:
-        """Process setup instruction extraction using the new Azure AI Agents API."""
-        print(f"[SETUP] Creating agent for setup instruction extraction...")
+    
+    async def _process_setup_extraction(self, client: AgentsClient, agent_id: str, repo_name: str, file_contents: Dict[str, str], start_time: float, on_delta: Optional[Callable[[str], Awaitable[None]]] = None, extraction: Optional[SetupExtraction] = None) -> Dict[str, str]:
+        """Process setup instruction extraction using the new Azure AI Agents API; ``extraction`` holds commands already found locally."""
+        print(f"[SETUP] Preparing setup instruction extraction...")
         agent_instructions = """
         You are an AI assistant that helps extract setup instructions from repository configuration files.
         Your task is to analyze the content of configuration files and extract commands for:
@@ -270,28 +384,44 @@ class AzureAgentService:
         - Do not include any text outside the JSON object
         """
         
-        agent = await client.create_agent(
-            model=self.model_deployment,
-            name="setup-instruction-extractor",
-            instructions=agent_instructions,
-        )
-        
         print(f"[SETUP] Preparing configuration files for analysis ({len(file_contents)} files)...")
-        content = f"Repository: {repo_name}\n\n"
-        content += "Configuration Files:\n\n"
-        
-        for file_path, file_content in file_contents.items():
-            content += f"File: {file_path}\n```\n{file_content[:5000]}\n```\n\n"  # Limit file content to 5000 chars
-        
-        content += "Please extract setup instructions from these files in the format specified."
-        
-        print(f"[SETUP] Starting setup instruction extraction with create_thread_and_process_run...")
-        run = await client.create_thread_and_process_run(
-            agent_id=agent.id,
-            thread=AgentThreadCreationOptions(
-                messages=[ThreadMessageOptions(role="user", content=content)]
-            ),
-        )
+        footer = ""
+        if extraction is not None and extraction.commands:
+            import json
+            footer += "Commands already extracted from these files (keep them unless they are wrong; focus on the missing categories: " + ", ".join(extraction.missing) + "):\n"
+            footer += f"```json\n{json.dumps(extraction.commands, indent=2)}\n```\n\n"
+        footer += "Please extract setup instructions from these files in the format specified."
+        
+        # No single file may take more than a quarter of the budget
+        content = pack_prompt(
+            "setup_commands",
+            f"Repository: {repo_name}\n\nConfiguration Files:\n\n",
+            file_parts(file_contents, max_tokens=PROMPT_TOKEN_BUDGET_SETUP // 4),
+            footer,
+            PROMPT_TOKEN_BUDGET_SETUP,
+        ).text
+        
+        messages = [ThreadMessageOptions(role="user", content=content)]
+        response = None
+        if on_delta:
+            print(f"[SETUP] Starting setup instruction extraction with a streaming run...")
+            run, response = await self.agents.stream_run(
+                client,
+                name="setup-instruction-extractor",
+                instructions=agent_instructions,
+                model=self.model_deployment,
+                messages=messages,
+                on_delta=on_delta,
+            )
+        else:
+            print(f"[SETUP] Starting setup instruction extraction with create_thread_and_process_run...")
+            run = await self.agents.create_thread_and_process_run(
+                client,
+                name="setup-instruction-extractor",
+                instructions=agent_instructions,
+                model=self.model_deployment,
+                thread=AgentThreadCreationOptions(messages=messages),
+            )
         
         if run.status == "failed":
             error_msg = f"Setup extraction failed: {run.last_error if run.last_error else 'Unknown error'}"
@@ -299,21 +429,10 @@ class AzureAgentService:
             raise RuntimeError(error_msg)
         
         print(f"[SETUP] Setup instruction extraction completed after {time.time() - start_time:.2f} seconds")
-        print(f"[SETUP] Retrieving setup instruction extraction results...")
         
-        # List all messages in the thread, in ascending order of creation
-        messages = client.messages.list(
-            thread_id=run.thread_id,
-            order=ListSortOrder.ASCENDING,
-        )
-        
-        response = ""
-        async for msg in messages:
-            if msg.role == "assistant":
-                last_part = msg.content[-1]
-                if isinstance(last_part, MessageTextContent):
-                    response = last_part.text.value
-                    break
+        if response is None:
+            print(f"[SETUP] Retrieving setup instruction extraction results...")
+            response = await self._read_reply(client, run.thread_id)
         
         if response:
             import json
@@ -386,24 +505,18 @@ class AzureAgentService:
                     parsing_errors.append(error_msg)
                     print(f"[SETUP] {error_msg}")
             
-            # Clean up the agent
-            try:
-                await client.delete_agent(agent.id)
-                print(f"[SETUP] Deleted agent {agent.id}")
-            except Exception as e:
-                print(f"[SETUP] Warning: Could not delete agent {agent.id}: {str(e)}")
-            
             if setup_instructions:
                 print(f"[SETUP] Successfully extracted setup instructions in {time.time() - start_time:.2f} seconds: {', '.join(setup_instructions.keys())}")
                 
                 # Ensure we have the expected structure with fallbacks
-                final_instructions = {
-                    "prerequisites": setup_instructions.get("prerequisites", "No specific prerequisites identified"),
-                    "dependencies": setup_instructions.get("dependencies", "Dependency installation commands not found"),
-                    "run_app": setup_instructions.get("run_app", "Run application commands not found"),
-                    "linting": setup_instructions.get("linting", "No linting commands identified"),
-                    "testing": setup_instructions.get("testing", "No testing commands identified")
-                }
+                # Locally extracted commands stand wherever the model found nothing
+                local_commands = extraction.commands if extraction is not None else {}
+                final_instructions: Dict[str, str] = {}
+                for category, not_found in _SETUP_NOT_FOUND.items():
+                    value: Any = setup_instructions.get(category)
+                    if _is_setup_placeholder(value):
+                        value = local_commands.get(category, value if isinstance(value, str) and value.strip() else not_found)
+                    final_instructions[category] = value
                 
                 print(f"[SETUP] Final instructions structure: {', '.join(final_instructions.keys())}")
                 return final_instructions
@@ -413,6 +526,10 @@ class AzureAgentService:
                 for error in parsing_errors:
                     print(f"[SETUP]   - {error}")
                 
+                if extraction is not None and extraction.commands:
+                    print(f"[SETUP] Returning the locally extracted commands due to parsing failures")
+                    return _complete_setup_commands(extraction)
+                
                 # Return a fallback response instead of failing
                 fallback_instructions = {
                     "prerequisites": "Unable to automatically extract prerequisites. Please check the repository's README and documentation.",
@@ -427,8 +544,8 @@ class AzureAgentService:
         
         print(f"[SETUP] No setup instructions found in agent response after {time.time() - start_time:.2f} seconds")
         raise RuntimeError("No setup instructions found in agent response")
-            
-    async def analyze_repository(self, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], files: Optional[List[Dict[str, Any]]] = None, progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]] = None) -> Dict[str, Any]:
+    
+    async def analyze_repository(self, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], files: Optional[Union[FileTree, List[Dict[str, Any]]]] = None, progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]] = None, fetch_file_contents: Optional[Callable[[List[str]], Awaitable[Dict[str, str]]]] = None, tree_index: Optional[TreeIndex] = None, delta_callback: Optional[Callable[[str, str], Awaitable[None]]] = None) -> Dict[str, Any]:
         """
         Analyze a repository using Azure AI Agents with a two-step process.
         
@@ -438,18 +555,22 @@ class AzureAgentService:
             readme_content: The README content of the repository
             dependencies: Dictionary of dependency files and their contents
             files: List of files in the repository (optional)
+            progress_callback: Called with an AnalysisProgressUpdate as each step advances (optional)
+            fetch_file_contents: Loads the contents of the configuration files identified in
+                step 2 that are not already among ``dependencies`` (optional)
+            tree_index: Query index over ``files`` used for path lookups in step 2 (optional)
+            delta_callback: Called with ("analysis_delta" or "setup_delta", text) for each
+                fragment of the step 1 and step 3 replies as they are generated. Passing it
+                switches those steps to the streaming run API (optional)
             
         Returns:
-            Dictionary with analysis results and setup commands
+            Dictionary with analysis results and setup commands. "fallback_used" is True
+            when step 1 or step 3 fell back to generic guidance.
         """
         print(f"[ANALYSIS] Starting analysis for repository: {repo_name} with agent: {agent_id}")
         print(f"[ANALYSIS] Azure AI Agents endpoint configured: {self.endpoint != 'your_endpoint'}, Credentials available: {self.credential is not None}")
         
-        if not self.endpoint or self.endpoint == "your_endpoint":
-            raise ValueError("Azure AI Project endpoint is not configured. Please set AZURE_AI_PROJECT_CONNECTION_STRING in your environment.")
-        
-        if not self.credential:
-            raise ValueError("Azure AI Agents credentials are not configured. Please run 'az login' for DefaultAzureCredential or set AZURE_AI_AGENTS_API_KEY in your environment.")
+        self._require_configuration()
         
         # Send initial progress update
         if progress_callback:
@@ -461,6 +582,147 @@ class AzureAgentService:
                 progress_percentage=0
             ))
         
+        analysis_start_time = time.time()
+        # Step 1 and step 2 are independent and run concurrently; step 3 waits for step 2.
+        report = monotonic_progress(progress_callback)
+        on_analysis_delta = partial(delta_callback, "analysis_delta") if delta_callback else None
+        on_setup_delta = partial(delta_callback, "setup_delta") if delta_callback else None
+        stages = []
+        if files:
+            # The outline takes a fraction of a second to build once per commit; step 1 shows it to the agent
+            stages.append(Stage("tree_summary", lambda _: tree_summary_for(files, tree_index)))
+            # Manifests below the root (workspace packages, services of a monorepo) join the root ones
+            stages.append(Stage("dependency_manifests", lambda _: self._load_dependency_manifests(dependencies, files, tree_index, fetch_file_contents)))
+        stages.append(Stage(
+            "analysis",
+            lambda results: self._run_analysis_step(agent_id, repo_name, readme_content, results.get("dependency_manifests", dependencies), report, on_analysis_delta, results.get("tree_summary")),
+            depends_on=("tree_summary", "dependency_manifests") if files else (),
+        ))
+        if files:
+            stages.append(Stage("config_files", lambda _: self._run_config_step(repo_name, files, tree_index, report)))
+            stages.append(Stage(
+                "config_contents",
+                lambda results: self._load_config_contents(results["config_files"], readme_content, dependencies, fetch_file_contents),
+                depends_on=("config_files",),
+            ))
+            stages.append(Stage(
+                "setup_commands",
+                lambda results: self._run_setup_step(agent_id, repo_name, results["config_contents"], analysis_start_time, report, on_setup_delta),
+                depends_on=("config_contents",),
+            ))
+        results = await run_stages(stages)
+        analysis, fallback_used = results["analysis"]
+        total_duration = time.time() - analysis_start_time
+        
+        if files:
+            setup_commands, setup_failed = results["setup_commands"]
+            print(f"[ANALYSIS] Total analysis completed in {total_duration:.2f} seconds for {repo_name}")
+            return {
+                "analysis": analysis,
+                "setup_commands": setup_commands,
+                "fallback_used": fallback_used or setup_failed
+            }
+        
+        print(f"[ANALYSIS] Analysis completed for {repo_name} (without setup commands)")
+        
+        if report:
+            await report(AnalysisProgressUpdate(
+                step=1,
+                step_name="Analysis Complete",
+                status="completed",
+                message="Repository analysis completed successfully",
+                progress_percentage=100,
+                elapsed_time=total_duration,
+                details={"analysis_length": len(analysis)}
+            ))
+        
+        return {
+            "analysis": analysis,
+            "fallback_used": fallback_used
+        }
+    
+    async def analyze_repository_batch(self, agent_ids: List[str], repo_name: str, readme_content: str, dependencies: Dict[str, str], files: Optional[Union[FileTree, List[Dict[str, Any]]]] = None, fetch_file_contents: Optional[Callable[[List[str]], Awaitable[Dict[str, str]]]] = None, tree_index: Optional[TreeIndex] = None, progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]] = None, result_callback: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze a repository for several agents at once.
+        
+        Identifying the configuration files (step 2), loading them and
+        extracting the setup commands from them (step 3) do not depend on the
+        agent, so they run once; the agent-specific step 1 runs for all agents
+        concurrently.
+        
+        Args:
+            agent_ids: The types of AI agent to analyze the repository for
+            repo_name: The repository name in owner/repo format
+            readme_content: The README content of the repository
+            dependencies: Dictionary of dependency files and their contents
+            files: List of files in the repository (optional)
+            fetch_file_contents: As for analyze_repository (optional)
+            tree_index: As for analyze_repository (optional)
+            progress_callback: Called with the progress updates of the shared step 2 (optional)
+            result_callback: Called with (agent_id, result) as soon as each agent's
+                analysis is finished (optional)
+        
+        Returns:
+            Dictionary mapping each agent_id to the result analyze_repository would return
+        """
+        print(f"[ANALYSIS] Starting batch analysis for repository: {repo_name} with agents: {', '.join(agent_ids)}")
+        self._require_configuration()
+        
+        analysis_start_time = time.time()
+        stages = []
+        if files:
+            stages.append(Stage("tree_summary", lambda _: tree_summary_for(files, tree_index)))
+            stages.append(Stage("dependency_manifests", lambda _: self._load_dependency_manifests(dependencies, files, tree_index, fetch_file_contents)))
+            stages.append(Stage("config_files", lambda _: self._run_config_step(repo_name, files, tree_index, progress_callback)))
+            stages.append(Stage(
+                "config_contents",
+                lambda results: self._load_config_contents(results["config_files"], readme_content, dependencies, fetch_file_contents),
+                depends_on=("config_files",),
+            ))
+            stages.append(Stage(
+                "setup_commands",
+                lambda results: self._run_setup_step(", ".join(agent_ids), repo_name, results["config_contents"], analysis_start_time, None),
+                depends_on=("config_contents",),
+            ))
+        
+        async def analyze(agent_id: str, results: Dict[str, Any]) -> Tuple[str, bool]:
+            return await self._run_analysis_step(agent_id, repo_name, readme_content, results.get("dependency_manifests", dependencies), None, tree_summary=results.get("tree_summary"))
+        
+        async def finish(agent_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+            analysis, fallback_used = results[f"analysis:{agent_id}"]
+            result: Dict[str, Any] = {"analysis": analysis, "fallback_used": fallback_used}
+            if files:
+                setup_commands, setup_failed = results["setup_commands"]
+                result.update(setup_commands=dict(setup_commands), fallback_used=fallback_used or setup_failed)
+            print(f"[ANALYSIS] Batch analysis for {agent_id} completed after {time.time() - analysis_start_time:.2f} seconds")
+            if result_callback:
+                await result_callback(agent_id, result)
+            return result
+        
+        for agent_id in agent_ids:
+            stages.append(Stage(
+                f"analysis:{agent_id}",
+                partial(analyze, agent_id),
+                depends_on=("tree_summary", "dependency_manifests") if files else (),
+            ))
+            depends_on: Tuple[str, ...] = (f"analysis:{agent_id}",)
+            if files:
+                depends_on += ("setup_commands",)
+            stages.append(Stage(f"result:{agent_id}", partial(finish, agent_id), depends_on=depends_on))
+        
+        results = await run_stages(stages)
+        print(f"[ANALYSIS] Batch analysis of {repo_name} for {len(agent_ids)} agents completed in {time.time() - analysis_start_time:.2f} seconds")
+        return {agent_id: results[f"result:{agent_id}"] for agent_id in agent_ids}
+    
+    def _require_configuration(self) -> None:
+        if not self.endpoint or self.endpoint == "your_endpoint":
+            raise ValueError("Azure AI Project endpoint is not configured. Please set AZURE_AI_PROJECT_CONNECTION_STRING in your environment.")
+        
+        if not self.credential:
+            raise ValueError("Azure AI Agents credentials are not configured. Please run 'az login' for DefaultAzureCredential or set AZURE_AI_AGENTS_API_KEY in your environment.")
+    
+    async def _run_analysis_step(self, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]], on_delta: Optional[Callable[[str], Awaitable[None]]] = None, tree_summary: Optional[str] = None) -> Tuple[str, bool]:
+        """Step 1: analyze README, dependencies and the repository outline. Returns the analysis and whether the fallback was used."""
         print(f"[ANALYSIS] Step 1/3: Analyzing repository content for {repo_name}...")
         analysis_start_time = time.time()
         
@@ -474,7 +736,7 @@ class AzureAgentService:
             ))
         
         try:
-            analysis = await self._analyze_with_azure_agents(agent_id, repo_name, readme_content, dependencies)
+            analysis = await self._analyze_with_azure_agents(agent_id, repo_name, readme_content, dependencies, on_delta, tree_summary)
             analysis_duration = time.time() - analysis_start_time
             print(f"[ANALYSIS] Step 1/3 completed in {analysis_duration:.2f} seconds. Generated analysis length: {len(analysis)}")
             
@@ -488,6 +750,7 @@ class AzureAgentService:
                     elapsed_time=analysis_duration,
                     details={"analysis_length": len(analysis)}
                 ))
+            return analysis, False
         except Exception as e:
             analysis_duration = time.time() - analysis_start_time
             print(f"[ANALYSIS] Step 1/3 failed in {analysis_duration:.2f} seconds: {str(e)}")
@@ -544,181 +807,175 @@ GitHub Copilot supports this repository's programming languages and can provide:
                     elapsed_time=analysis_duration,
                     details={"analysis_length": len(analysis), "fallback_used": True, "error": str(e)}
                 ))
+            return analysis, True
+    
+    async def _run_config_step(self, repo_name: str, files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex], progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]]) -> List[str]:
+        """Step 2: identify configuration files, falling back to well-known names."""
+        if progress_callback:
+            await progress_callback(AnalysisProgressUpdate(
+                step=2,
+                step_name="Identifying Configuration Files",
+                status="starting",
+                message="Scanning repository files to identify configuration and dependency files",
+                progress_percentage=35
+            ))
         
-        # Step 2: If files are provided, perform the two-step analysis for setup commands
-        if files:
-            # Step 2: Identify configuration files
+        print(f"[ANALYSIS] Step 2/3: Identifying configuration files for {repo_name}...")
+        config_start_time = time.time()
+        
+        if progress_callback:
+            await progress_callback(AnalysisProgressUpdate(
+                step=2,
+                step_name="Identifying Configuration Files",
+                status="in_progress",
+                message=f"Scoring {len(files)} files to identify important configuration files",
+                progress_percentage=45
+            ))
+        
+        try:
+            config_files = await self.identify_config_files(repo_name, files, tree_index=tree_index)
+            config_duration = time.time() - config_start_time
+            print(f"[ANALYSIS] Step 2/3 completed in {config_duration:.2f} seconds. Identified {len(config_files)} configuration files: {', '.join(config_files[:5])}" + ("..." if len(config_files) > 5 else ""))
+            
             if progress_callback:
                 await progress_callback(AnalysisProgressUpdate(
                     step=2,
                     step_name="Identifying Configuration Files",
-                    status="starting",
-                    message="Scanning repository files to identify configuration and dependency files",
-                    progress_percentage=35
+                    status="completed",
+                    message=f"Identified {len(config_files)} configuration files in {config_duration:.1f} seconds",
+                    progress_percentage=66,
+                    elapsed_time=config_duration,
+                    details={"config_files_count": len(config_files), "config_files": config_files[:5]}
                 ))
+        except Exception as e:
+            config_duration = time.time() - config_start_time
+            print(f"[ANALYSIS] Step 2/3 failed in {config_duration:.2f} seconds: {str(e)}")
+            print(f"[ANALYSIS] Using fallback config file identification")
+            
+            # Fallback: the scorer's pick, however unsure it is
+            config_files = score_config_files(files, tree_index).paths
             
-            print(f"[ANALYSIS] Step 2/3: Identifying configuration files for {repo_name}...")
-            config_start_time = time.time()
+            print(f"[ANALYSIS] Fallback identified {len(config_files)} configuration files: {', '.join(config_files[:5])}" + ("..." if len(config_files) > 5 else ""))
             
             if progress_callback:
                 await progress_callback(AnalysisProgressUpdate(
                     step=2,
                     step_name="Identifying Configuration Files",
-                    status="in_progress",
-                    message=f"Azure AI Agents is analyzing {len(files)} files to identify important configuration files",
-                    progress_percentage=45
+                    status="completed",
+                    message=f"Used fallback method to identify {len(config_files)} configuration files",
+                    progress_percentage=66,
+                    elapsed_time=config_duration,
+                    details={"config_files_count": len(config_files), "config_files": config_files[:5], "fallback_used": True}
                 ))
-            
+        return config_files
+    
+    async def _load_dependency_manifests(self, dependencies: Dict[str, str], files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex], fetch_file_contents: Optional[Callable[[List[str]], Awaitable[Dict[str, str]]]]) -> Dict[str, str]:
+        """The root dependency files plus the shallowest manifests elsewhere in the tree, the input of step 1."""
+        if not fetch_file_contents:
+            return dependencies
+        if tree_index is None:
+            tree_index = TreeIndex(files if isinstance(files, FileTree) else FileTree.from_entries((f["path"], f["type"], f.get("size")) for f in files))
+        paths, _ = find_manifests(tree_index, DEPENDENCY_MANIFESTS_PROMPT_MAX)
+        # Workspace members go before other nested manifests such as examples or fixtures
+        root_paths = [file_path for file_path in paths if "/" not in file_path]
+        candidates = list(dict.fromkeys(root_paths + workspace_manifests(dependencies, tree_index) + paths))[:DEPENDENCY_MANIFESTS_PROMPT_MAX]
+        missing = [file_path for file_path in candidates if file_path not in dependencies]
+        if not missing:
+            return dependencies
+        try:
+            with latency_metrics().time("dependency_manifests"):
+                manifests = await fetch_file_contents(missing)
+        except Exception as e:
+            print(f"[ANALYSIS] Could not load dependency manifests {', '.join(missing[:5])}: {str(e)}")
+            return dependencies
+        print(f"[ANALYSIS] Loaded {len(manifests)} nested dependency manifests")
+        return {**dependencies, **manifests}
+    
+    async def _load_config_contents(self, config_files: List[str], readme_content: str, dependencies: Dict[str, str], fetch_file_contents: Optional[Callable[[List[str]], Awaitable[Dict[str, str]]]]) -> Dict[str, str]:
+        """Contents of the configuration files found in step 2, the input of step 3. Files that cannot be loaded are skipped."""
+        file_contents = {file_path: dependencies.get(file_path, "") for file_path in config_files if file_path in dependencies}
+        
+        missing_files = [file_path for file_path in config_files if file_path not in file_contents and file_path != "README.md"]
+        if fetch_file_contents and missing_files:
             try:
-                config_files = await self.identify_config_files(repo_name, files)
-                config_duration = time.time() - config_start_time
-                print(f"[ANALYSIS] Step 2/3 completed in {config_duration:.2f} seconds. Identified {len(config_files)} configuration files: {', '.join(config_files[:5])}" + ("..." if len(config_files) > 5 else ""))
-                
-                if progress_callback:
-                    await progress_callback(AnalysisProgressUpdate(
-                        step=2,
-                        step_name="Identifying Configuration Files",
-                        status="completed",
-                        message=f"Identified {len(config_files)} configuration files in {config_duration:.1f} seconds",
-                        progress_percentage=66,
-                        elapsed_time=config_duration,
-                        details={"config_files_count": len(config_files), "config_files": config_files[:5]}
-                    ))
+                file_contents.update(await fetch_file_contents(missing_files))
+                print(f"[ANALYSIS] Loaded {len(file_contents)} configuration files for setup extraction")
             except Exception as e:
-                config_duration = time.time() - config_start_time
-                print(f"[ANALYSIS] Step 2/3 failed in {config_duration:.2f} seconds: {str(e)}")
-                print(f"[ANALYSIS] Using fallback config file identification")
-                
-                # Fallback: Use common config file patterns
-                all_file_paths = [file["path"] for file in files]
-                config_files = []
-                
-                # Common config files to look for
-                common_configs = [
-                    "README.md", "readme.md", "README.rst",
-                    "package.json", "requirements.txt", "pyproject.toml", "Pipfile",
-                    "Cargo.toml", "go.mod", "pom.xml", "build.gradle",
-                    "Dockerfile", "docker-compose.yml", "docker-compose.yaml",
-                    ".gitignore", "Makefile", "CMakeLists.txt",
-                    "tsconfig.json", "webpack.config.js", "vite.config.js",
-                    ".env.example", ".env.template", "config.json",
-                    "jest.config.js", "pytest.ini", "tox.ini"
-                ]
-                
-                for config_file in common_configs:
-                    if config_file in all_file_paths:
-                        config_files.append(config_file)
-                
-                print(f"[ANALYSIS] Fallback identified {len(config_files)} configuration files: {', '.join(config_files[:5])}" + ("..." if len(config_files) > 5 else ""))
-                
-                if progress_callback:
-                    await progress_callback(AnalysisProgressUpdate(
-                        step=2,
-                        step_name="Identifying Configuration Files",
-                        status="completed",
-                        message=f"Used fallback method to identify {len(config_files)} configuration files",
-                        progress_percentage=66,
-                        elapsed_time=config_duration,
-                        details={"config_files_count": len(config_files), "config_files": config_files[:5], "fallback_used": True}
-                    ))
+                print(f"[ANALYSIS] Could not load configuration files {', '.join(missing_files[:5])}: {str(e)}")
+        
+        if readme_content:
+            file_contents["README.md"] = readme_content
+        return file_contents
+    
+    async def _run_setup_step(self, agent_id: str, repo_name: str, file_contents: Dict[str, str], analysis_start_time: float, progress_callback: Optional[Callable[[AnalysisProgressUpdate], Awaitable[None]]], on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Tuple[Dict[str, str], bool]:
+        """Step 3: extract setup instructions. Returns the setup commands and whether extraction failed."""
+        if progress_callback:
+            await progress_callback(AnalysisProgressUpdate(
+                step=3,
+                step_name="Extracting Setup Instructions",
+                status="starting",
+                message="Extracting detailed setup instructions from configuration files",
+                progress_percentage=70
+            ))
+        
+        print(f"[ANALYSIS] Step 3/3: Extracting setup instructions from configuration files...")
+        setup_start_time = time.time()
+        
+        if progress_callback:
+            await progress_callback(AnalysisProgressUpdate(
+                step=3,
+                step_name="Extracting Setup Instructions",
+                status="in_progress",
+                message=f"Azure AI Agents is extracting setup commands from {len(file_contents)} configuration files",
+                progress_percentage=85
+            ))
+        
+        try:
+            setup_commands = await self.extract_setup_instructions(agent_id, repo_name, file_contents, on_delta)
+            setup_duration = time.time() - setup_start_time
+            print(f"[ANALYSIS] Step 3/3 completed in {setup_duration:.2f} seconds. Extracted setup commands for: {', '.join(setup_commands.keys())}")
+            
+            total_duration = time.time() - analysis_start_time
             
-            # Step 3: Extract setup instructions
             if progress_callback:
                 await progress_callback(AnalysisProgressUpdate(
                     step=3,
                     step_name="Extracting Setup Instructions",
-                    status="starting",
-                    message="Extracting detailed setup instructions from configuration files",
-                    progress_percentage=70
+                    status="completed",
+                    message=f"Setup instructions extracted successfully in {setup_duration:.1f} seconds",
+                    progress_percentage=100,
+                    elapsed_time=total_duration,
+                    details={"setup_commands": list(setup_commands.keys()), "total_duration": total_duration}
                 ))
             
-            print(f"[ANALYSIS] Step 3/3: Extracting setup instructions from configuration files...")
-            setup_start_time = time.time()
-            file_contents = {file_path: dependencies.get(file_path, "") for file_path in config_files if file_path in dependencies}
-            
-            if readme_content:
-                file_contents["README.md"] = readme_content
+            return setup_commands, False
+        except Exception as e:
+            setup_duration = time.time() - setup_start_time
+            total_duration = time.time() - analysis_start_time
+            print(f"[ANALYSIS] Step 3/3 failed in {setup_duration:.2f} seconds: {str(e)}")
+            print(f"[ANALYSIS] Continuing with analysis only (without setup commands) after {total_duration:.2f} seconds")
             
             if progress_callback:
                 await progress_callback(AnalysisProgressUpdate(
                     step=3,
                     step_name="Extracting Setup Instructions",
-                    status="in_progress",
-                    message=f"Azure AI Agents is extracting setup commands from {len(file_contents)} configuration files",
-                    progress_percentage=85
+                    status="failed",
+                    message=f"Setup instruction extraction failed, continuing with analysis only",
+                    progress_percentage=100,
+                    elapsed_time=total_duration,
+                    details={"error": str(e), "total_duration": total_duration}
                 ))
             
-            try:
-                setup_commands = await self.extract_setup_instructions(agent_id, repo_name, file_contents)
-                setup_duration = time.time() - setup_start_time
-                print(f"[ANALYSIS] Step 3/3 completed in {setup_duration:.2f} seconds. Extracted setup commands for: {', '.join(setup_commands.keys())}")
-                
-                total_duration = time.time() - analysis_start_time
-                print(f"[ANALYSIS] Total analysis completed in {total_duration:.2f} seconds for {repo_name}")
-                
-                if progress_callback:
-                    await progress_callback(AnalysisProgressUpdate(
-                        step=3,
-                        step_name="Extracting Setup Instructions",
-                        status="completed",
-                        message=f"Setup instructions extracted successfully in {setup_duration:.1f} seconds",
-                        progress_percentage=100,
-                        elapsed_time=total_duration,
-                        details={"setup_commands": list(setup_commands.keys()), "total_duration": total_duration}
-                    ))
-                
-                return {
-                    "analysis": analysis,
-                    "setup_commands": setup_commands
-                }
-            except Exception as e:
-                setup_duration = time.time() - setup_start_time
-                total_duration = time.time() - analysis_start_time
-                print(f"[ANALYSIS] Step 3/3 failed in {setup_duration:.2f} seconds: {str(e)}")
-                print(f"[ANALYSIS] Continuing with analysis only (without setup commands) after {total_duration:.2f} seconds")
-                
-                if progress_callback:
-                    await progress_callback(AnalysisProgressUpdate(
-                        step=3,
-                        step_name="Extracting Setup Instructions",
-                        status="failed",
-                        message=f"Setup instruction extraction failed, continuing with analysis only",
-                        progress_percentage=100,
-                        elapsed_time=total_duration,
-                        details={"error": str(e), "total_duration": total_duration}
-                    ))
-                
-                # Return analysis without setup commands if extraction fails
-                return {
-                    "analysis": analysis,
-                    "setup_commands": {
-                        "prerequisites": "Setup instruction extraction failed. Please check the repository documentation.",
-                        "dependencies": "Setup instruction extraction failed. Please check package.json, requirements.txt, or similar files.",
-                        "run_app": "Setup instruction extraction failed. Please check the repository's README for startup instructions.",
-                        "linting": "Setup instruction extraction failed. Check for linting configuration files.",
-                        "testing": "Setup instruction extraction failed. Check for testing configuration files."
-                    }
-                }
-        
-        print(f"[ANALYSIS] Analysis completed for {repo_name} (without setup commands)")
-        
-        if progress_callback:
-            total_duration = time.time() - analysis_start_time
-            await progress_callback(AnalysisProgressUpdate(
-                step=1,
-                step_name="Analysis Complete",
-                status="completed",
-                message="Repository analysis completed successfully",
-                progress_percentage=100,
-                elapsed_time=total_duration,
-                details={"analysis_length": len(analysis)}
-            ))
-        
-        return {
-            "analysis": analysis
-        }
+            # Return analysis without setup commands if extraction fails
+            return {
+                "prerequisites": "Setup instruction extraction failed. Please check the repository documentation.",
+                "dependencies": "Setup instruction extraction failed. Please check package.json, requirements.txt, or similar files.",
+                "run_app": "Setup instruction extraction failed. Please check the repository's README for startup instructions.",
+                "linting": "Setup instruction extraction failed. Check for linting configuration files.",
+                "testing": "Setup instruction extraction failed. Check for testing configuration files."
+            }, True
     
-    async def _analyze_with_azure_agents(self, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str]) -> str:
+    async def _analyze_with_azure_agents(self, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], on_delta: Optional[Callable[[str], Awaitable[None]]] = None, tree_summary: Optional[str] = None) -> str:
         """
         Analyze a repository using Azure AI Agents.
         
@@ -727,6 +984,7 @@ GitHub Copilot supports this repository's programming languages and can provide:
             repo_name: The repository name in owner/repo format
             readme_content: The README content of the repository
             dependencies: Dictionary of dependency files and their contents
+            on_delta: Called with each fragment of the analysis as it streams in (optional)
             
         Returns:
             Analysis results as a string
@@ -735,17 +993,9 @@ GitHub Copilot supports this repository's programming languages and can provide:
             print(f"[ANALYSIS] Connecting to Azure AI Agents service...")
             start_time = time.time()
             
-            # Use DefaultAzureCredential as async context manager if available
-            credential_context = self.credential if isinstance(self.credential, DefaultAzureCredential) else None
-            
-            if credential_context:
-                async with credential_context:
-                    async with AgentsClient(self.endpoint, credential_context) as client:
-                        return await self._process_analysis(client, agent_id, repo_name, readme_content, dependencies, start_time)
-            else:
-                async with AgentsClient(self.endpoint, self.credential) as client:
-                    return await self._process_analysis(client, agent_id, repo_name, readme_content, dependencies, start_time)
-                    
+            client = await self._get_client()
+            with latency_metrics().time("agent.analysis"):
+                return await self._process_analysis(client, agent_id, repo_name, readme_content, dependencies, start_time, on_delta, tree_summary)
         except asyncio.TimeoutError:
             print(f"[ANALYSIS] Timeout during analysis after {time.time() - start_time:.2f} seconds")
             raise RuntimeError("Analysis timed out")
@@ -753,33 +1003,45 @@ GitHub Copilot supports this repository's programming languages and can provide:
             print(f"[ANALYSIS] Error during analysis: {str(e)}")
             print(f"[ANALYSIS] Error type: {type(e).__name__}")
             raise RuntimeError(f"Error connecting to Azure AI Agents: {str(e)}")
-
-    async def _process_analysis(self, client: AgentsClient, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], start_time: float) -> str:
+    
+    async def _process_analysis(self, client: AgentsClient, agent_id: str, repo_name: str, readme_content: str, dependencies: Dict[str, str], start_time: float, on_delta: Optional[Callable[[str], Awaitable[None]]] = None, tree_summary: Optional[str] = None) -> str:
         """Process the analysis using the new Azure AI Agents API."""
-        print(f"[ANALYSIS] Creating agent with ID: {agent_id}...")
+        print(f"[ANALYSIS] Preparing analysis with agent: {agent_id}...")
         agent_instructions = self._get_agent_instructions(agent_id)
-        agent = await client.create_agent(
-            model=self.model_deployment,
-            name=f"{agent_id}-analyzer",
-            instructions=agent_instructions,
-        )
-        
         print(f"[ANALYSIS] Preparing repository content for analysis...")
-        content = f"Repository: {repo_name}\n\n"
-        content += "README:\n```\n" + (readme_content or "No README found") + "\n```\n\n"
-        
-        if dependencies:
-            content += f"Dependencies ({len(dependencies)} files):\n"
-            for file_name, file_content in dependencies.items():
-                content += f"{file_name}:\n```\n{file_content}\n```\n\n"
-        
-        print(f"[ANALYSIS] Starting analysis with create_thread_and_process_run...")
-        run = await client.create_thread_and_process_run(
-            agent_id=agent.id,
-            thread=AgentThreadCreationOptions(
-                messages=[ThreadMessageOptions(role="user", content=content)]
-            ),
-        )
+        parts = readme_parts(readme_content or "", "README") or [PromptPart("README", "No README found", PRIORITY_README_KEY)]
+        # Manifests go in as one compact list of packages and versions; raw text only for files that did not parse
+        parsed = parse_manifests(dependencies or {})
+        if parsed:
+            parts.append(PromptPart("Dependencies", summarize_dependencies(parsed), PRIORITY_MANIFEST, PROMPT_TOKEN_BUDGET_ANALYSIS // 4))
+        parsed_manifests = {dependency.manifest for dependency in parsed}
+        unparsed = {file_path: content for file_path, content in (dependencies or {}).items() if file_path not in parsed_manifests}
+        parts += file_parts(unparsed, max_tokens=PROMPT_TOKEN_BUDGET_ANALYSIS // 4)
+        if tree_summary:
+            parts.append(PromptPart("Repository structure", tree_summary, PRIORITY_TREE))
+        content = pack_prompt("analysis", f"Repository: {repo_name}\n\n", parts, "", PROMPT_TOKEN_BUDGET_ANALYSIS).text
+        
+        messages = [ThreadMessageOptions(role="user", content=content)]
+        result_content = None
+        if on_delta:
+            print(f"[ANALYSIS] Starting analysis with a streaming run...")
+            run, result_content = await self.agents.stream_run(
+                client,
+                name=f"{agent_id}-analyzer",
+                instructions=agent_instructions,
+                model=self.model_deployment,
+                messages=messages,
+                on_delta=on_delta,
+            )
+        else:
+            print(f"[ANALYSIS] Starting analysis with create_thread_and_process_run...")
+            run = await self.agents.create_thread_and_process_run(
+                client,
+                name=f"{agent_id}-analyzer",
+                instructions=agent_instructions,
+                model=self.model_deployment,
+                thread=AgentThreadCreationOptions(messages=messages),
+            )
         
         if run.status == "failed":
             error_msg = f"Analysis failed: {run.last_error if run.last_error else 'Unknown error'}"
@@ -787,37 +1049,50 @@ GitHub Copilot supports this repository's programming languages and can provide:
             raise RuntimeError(error_msg)
         
         print(f"[ANALYSIS] Analysis completed after {time.time() - start_time:.2f} seconds")
-        print(f"[ANALYSIS] Retrieving analysis results...")
         
+        if result_content is None:
+            print(f"[ANALYSIS] Retrieving analysis results...")
+            result_content = await self._read_reply(client, run.thread_id)
+        
+        if result_content:
+            print(f"[ANALYSIS] Analysis completed successfully in {time.time() - start_time:.2f} seconds (result length: {len(result_content)} chars)")
+            
+            return result_content
+        
+        print(f"[ANALYSIS] No analysis results found after {time.time() - start_time:.2f} seconds")
+        raise RuntimeError("No analysis results found")
+    
+    
+    async def _read_reply(self, client: AgentsClient, thread_id: str) -> str:
+        """Return the text of the first assistant message in a thread, or "" if there is none."""
         # List all messages in the thread, in ascending order of creation
         messages = client.messages.list(
-            thread_id=run.thread_id,
+            thread_id=thread_id,
             order=ListSortOrder.ASCENDING,
         )
         
-        result_content = ""
         async for msg in messages:
             if msg.role == "assistant":
                 last_part = msg.content[-1]
                 if isinstance(last_part, MessageTextContent):
-                    result_content = last_part.text.value
-                    break
+                    return last_part.text.value
+        return ""
+    
+    def analysis_fingerprint(self, agent_id: str) -> str:
+        """
+        Hash of everything besides the repository that shapes an analysis result.
         
-        if result_content:
-            print(f"[ANALYSIS] Analysis completed successfully in {time.time() - start_time:.2f} seconds (result length: {len(result_content)} chars)")
-            
-            # Clean up the agent
-            try:
-                await client.delete_agent(agent.id)
-                print(f"[ANALYSIS] Deleted agent {agent.id}")
-            except Exception as e:
-                print(f"[ANALYSIS] Warning: Could not delete agent {agent.id}: {str(e)}")
-            
-            return result_content
+        Combines the agent instructions and the model deployment, so cached
+        analyses are invalidated when either changes.
         
-        print(f"[ANALYSIS] No analysis results found after {time.time() - start_time:.2f} seconds")
-        raise RuntimeError("No analysis results found")
-    
+        Args:
+            agent_id: The type of AI agent
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        instructions = self._get_agent_instructions(agent_id)
+        return hashlib.sha256(f"{self.model_deployment}\0{instructions}".encode()).hexdigest()
 
     def _get_agent_instructions(self, agent_id: str) -> str:
         """
@@ -973,7 +1248,8 @@ GitHub Copilot supports this repository's programming languages and can provide:
             raise ValueError("Azure AI Agents credentials are not configured. Please run 'az login' for DefaultAzureCredential or set AZURE_AI_AGENTS_API_KEY in your environment.")
         
         try:
-            async with AgentsClient(endpoint=self.endpoint, credential=self.credential) as client:
+            client = await self._get_client()
+            with latency_metrics().time("agent.task_breakdown"):
                 return await self._process_task_breakdown(client, user_request, start_time)
         except Exception as e:
             print(f"[BREAKDOWN] Error during task breakdown: {str(e)}")
@@ -981,7 +1257,7 @@ GitHub Copilot supports this repository's programming languages and can provide:
 
     async def _process_task_breakdown(self, client: AgentsClient, user_request: str, start_time: float) -> Dict[str, Any]:
         """Process the task breakdown using Azure AI Agents API."""
-        print(f"[BREAKDOWN] Creating task breakdown agent...")
+        print(f"[BREAKDOWN] Preparing task breakdown...")
         
         breakdown_instructions = (
             "You are a Task Breakdown Assistant. Your job is to take a user's high-level request "
@@ -1010,17 +1286,14 @@ GitHub Copilot supports this repository's programming languages and can provide:
             "}"
         )
         
-        agent = await client.create_agent(
-            model=self.model_deployment,
-            name="task-breakdown-assistant",
-            instructions=breakdown_instructions,
-        )
-        
         print(f"[BREAKDOWN] Processing user request...")
         content = f"Please break down this user request into manageable tasks:\n\n{user_request}"
         
-        run = await client.create_thread_and_process_run(
-            agent_id=agent.id,
+        run = await self.agents.create_thread_and_process_run(
+            client,
+            name="task-breakdown-assistant",
+            instructions=breakdown_instructions,
+            model=self.model_deployment,
             thread=AgentThreadCreationOptions(
                 messages=[ThreadMessageOptions(role="user", content=content)]
             ),
@@ -1033,26 +1306,7 @@ GitHub Copilot supports this repository's programming languages and can provide:
         
         print(f"[BREAKDOWN] Retrieving breakdown results...")
         
-        # List all messages in the thread, in ascending order of creation
-        messages = client.messages.list(
-            thread_id=run.thread_id,
-            order=ListSortOrder.ASCENDING,
-        )
-        
-        result_content = ""
-        async for msg in messages:
-            if msg.role == "assistant":
-                last_part = msg.content[-1]
-                if isinstance(last_part, MessageTextContent):
-                    result_content = last_part.text.value
-                    break
-        
-        # Clean up the agent
-        try:
-            await client.delete_agent(agent.id)
-            print(f"[BREAKDOWN] Deleted agent {agent.id}")
-        except Exception as e:
-            print(f"[BREAKDOWN] Warning: Could not delete agent {agent.id}: {str(e)}")
+        result_content = await self._read_reply(client, run.thread_id)
         
         if not result_content:
             print(f"[BREAKDOWN] No breakdown results found after {time.time() - start_time:.2f} seconds")
@@ -1104,3 +1358,16 @@ GitHub Copilot supports this repository's programming languages and can provide:
             }
             print(f"[BREAKDOWN] Using fallback task breakdown")
             return fallback_result
+
+
+@lru_cache
+def shared_agent_service() -> AzureAgentService:
+    """Process-wide agent service; closed by close_agent_service at shutdown."""
+    return AzureAgentService()
+
+
+async def close_agent_service() -> None:
+    """Close the process-wide agent service if it was ever created."""
+    if shared_agent_service.cache_info().currsize:
+        await shared_agent_service().close()
+        shared_agent_service.cache_clear()
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from azure.ai.agents.aio import AgentsClient
+from azure.ai.agents.models import (
+    AgentStreamEvent,
+    AgentThreadCreationOptions,
+    MessageDeltaChunk,
+    MessageTextContent,
+    RunStatus,
+    ThreadMessage,
+    ThreadMessageOptions,
+    ThreadRun,
+)
+from azure.core.exceptions import HttpResponseError
+
+from ..config import AGENT_IDLE_TTL_SECONDS, AGENT_RUN_POLL_INTERVAL_SECONDS, AZURE_AGENTS_MAX_CONCURRENT_RUNS
+from ..metrics import latency_metrics
+
+AgentKey = Tuple[str, str, str]
+
+# Marks agents created by the registry so they can be told apart from agents
+# created by hand in the same Azure AI project, and cleaned up by
+# delete_stale after a crash or redeploy.
+REGISTRY_METADATA = {"managed_by": "gitagu-agent-registry"}
+
+_ACTIVE_RUN_STATUSES = (RunStatus.QUEUED, RunStatus.IN_PROGRESS, RunStatus.REQUIRES_ACTION)
+
+
+def _instructions_hash(instructions: str) -> str:
+    return hashlib.sha256(instructions.encode()).hexdigest()[:16]
+
+
+class AgentRegistry:
+    """
+    Azure AI agents created once per definition and reused across requests.
+
+    A definition is keyed by (name, instructions hash, model), so changing an
+    agent's instructions or the model deployment creates a new agent rather
+    than reusing a stale one. If a cached agent has been deleted server-side
+    the run fails with 404; the agent is then recreated and the run retried
+    once.
+
+    Agents unused for ``idle_ttl_seconds`` are deleted the next time the
+    registry is used, and ``delete_all`` removes the rest at shutdown.
+    ``delete_stale`` removes tagged agents left behind by processes that
+    never reached their shutdown.
+
+    If the task driving a run is cancelled (e.g. the client of a streaming
+    analysis disconnected), the run is cancelled server-side as well.
+
+    At most ``max_concurrent_runs`` runs are in progress at once; further
+    runs wait for a slot before their thread is created.
+    """
+
+    def __init__(self, idle_ttl_seconds: Optional[float] = AGENT_IDLE_TTL_SECONDS or None, max_concurrent_runs: int = AZURE_AGENTS_MAX_CONCURRENT_RUNS) -> None:
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_concurrent_runs = max_concurrent_runs
+        self._run_slots = asyncio.Semaphore(max_concurrent_runs)
+        self.runs_in_progress = 0
+        self._agents: Dict[AgentKey, str] = {}
+        self._last_used: Dict[AgentKey, float] = {}
+        self._in_use: Dict[AgentKey, int] = {}
+        self._locks: Dict[AgentKey, asyncio.Lock] = {}
+        self.created = 0
+        self.reused = 0
+        self.recreated = 0
+        self.reaped = 0
+        self.cancelled = 0
+        self.stale_deleted = 0
+
+    async def create_thread_and_process_run(
+        self,
+        client: AgentsClient,
+        name: str,
+        instructions: str,
+        model: str,
+        thread: AgentThreadCreationOptions,
+    ) -> ThreadRun:
+        """Run ``thread`` on the registered agent for this definition and poll until the run finishes."""
+        key = (name, _instructions_hash(instructions), model)
+        await self._reap_idle(client)
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            async with self._run_slot():
+                agent_id = await self._get_agent_id(client, key, instructions)
+                try:
+                    run = await client.create_thread_and_run(agent_id=agent_id, thread=thread)
+                except HttpResponseError as e:
+                    if e.status_code != 404:
+                        raise
+                    print(f"[AGENTS] Agent {agent_id} ({name}) no longer exists, recreating it")
+                    self._forget(key, agent_id)
+                    self.recreated += 1
+                    agent_id = await self._get_agent_id(client, key, instructions)
+                    run = await client.create_thread_and_run(agent_id=agent_id, thread=thread)
+                try:
+                    while run.status in _ACTIVE_RUN_STATUSES:
+                        await asyncio.sleep(AGENT_RUN_POLL_INTERVAL_SECONDS)
+                        run = await client.runs.get(thread_id=run.thread_id, run_id=run.id)
+                except asyncio.CancelledError:
+                    await self._cancel_run(client, run.thread_id, run.id)
+                    raise
+                return run
+        finally:
+            self._in_use[key] -= 1
+            self._last_used[key] = time.monotonic()
+
+    async def stream_run(
+        self,
+        client: AgentsClient,
+        name: str,
+        instructions: str,
+        model: str,
+        messages: List[ThreadMessageOptions],
+        on_delta: Callable[[str], Awaitable[None]],
+    ) -> Tuple[ThreadRun, str]:
+        """
+        Run ``messages`` on the registered agent with the streaming run API.
+
+        ``on_delta`` is awaited with each text fragment of the assistant's
+        reply as it is generated. Returns the final run and the complete reply
+        text, so no separate message listing is needed afterwards.
+        """
+        key = (name, _instructions_hash(instructions), model)
+        await self._reap_idle(client)
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            async with self._run_slot():
+                thread = await client.threads.create(messages=messages)
+                agent_id = await self._get_agent_id(client, key, instructions)
+                try:
+                    return await self._consume_stream(client, thread.id, agent_id, on_delta)
+                except HttpResponseError as e:
+                    if e.status_code != 404:
+                        raise
+                    print(f"[AGENTS] Agent {agent_id} ({name}) no longer exists, recreating it")
+                    self._forget(key, agent_id)
+                    self.recreated += 1
+                    agent_id = await self._get_agent_id(client, key, instructions)
+                    return await self._consume_stream(client, thread.id, agent_id, on_delta)
+        finally:
+            self._in_use[key] -= 1
+            self._last_used[key] = time.monotonic()
+
+    @asynccontextmanager
+    async def _run_slot(self) -> AsyncIterator[None]:
+        """Hold one of the ``max_concurrent_runs`` run slots; the wait is recorded as "agent.run_slot_wait"."""
+        with latency_metrics().time("agent.run_slot_wait"):
+            await self._run_slots.acquire()
+        self.runs_in_progress += 1
+        try:
+            yield
+        finally:
+            self.runs_in_progress -= 1
+            self._run_slots.release()
+
+    async def _consume_stream(self, client: AgentsClient, thread_id: str, agent_id: str, on_delta: Callable[[str], Awaitable[None]]) -> Tuple[ThreadRun, str]:
+        run: Optional[ThreadRun] = None
+        parts: List[str] = []
+        completed_text: Optional[str] = None
+        try:
+            async with await client.runs.stream(thread_id=thread_id, agent_id=agent_id) as stream:
+                async for event_type, event_data, _ in stream:
+                    if isinstance(event_data, MessageDeltaChunk):
+                        text = event_data.text
+                        if text:
+                            parts.append(text)
+                            await on_delta(text)
+                    elif isinstance(event_data, ThreadMessage) and event_type == AgentStreamEvent.THREAD_MESSAGE_COMPLETED:
+                        if event_data.role == "assistant" and event_data.content and isinstance(event_data.content[-1], MessageTextContent):
+                            completed_text = event_data.content[-1].text.value
+                    elif isinstance(event_data, ThreadRun):
+                        run = event_data
+                    elif event_type == AgentStreamEvent.ERROR:
+                        raise RuntimeError(f"Agent run stream failed: {event_data}")
+        except asyncio.CancelledError:
+            if run is not None and run.status in _ACTIVE_RUN_STATUSES:
+                await self._cancel_run(client, thread_id, run.id)
+            raise
+        if run is None:
+            raise RuntimeError("Agent run stream ended without a run status")
+        return run, completed_text if completed_text is not None else "".join(parts)
+
+    async def delete_all(self, client: AgentsClient) -> None:
+        """Delete every registered agent (application shutdown)."""
+        for key, agent_id in list(self._agents.items()):
+            await self._delete(client, key, agent_id)
+
+    async def delete_stale(self, client: AgentsClient) -> int:
+        """
+        Delete agents tagged with REGISTRY_METADATA that this registry did not create.
+
+        Meant for application startup. Another replica sharing the project
+        loses its agents too, but recreates them when its next run gets a 404.
+
+        Returns:
+            Number of agents deleted
+        """
+        own = set(self._agents.values())
+        stale = [
+            agent async for agent in client.list_agents()
+            if agent.id not in own and (agent.metadata or {}).get("managed_by") == REGISTRY_METADATA["managed_by"]
+        ]
+        deleted = 0
+        for agent in stale:
+            try:
+                await client.delete_agent(agent.id)
+                deleted += 1
+            except Exception as e:
+                print(f"[AGENTS] Warning: Could not delete stale agent {agent.id}: {str(e)}")
+        self.stale_deleted += deleted
+        if stale:
+            print(f"[AGENTS] Deleted {deleted} of {len(stale)} stale agents left by earlier processes")
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "agents": len(self._agents),
+            "created": self.created,
+            "reused": self.reused,
+            "recreated": self.recreated,
+            "reaped": self.reaped,
+            "cancelled_runs": self.cancelled,
+            "stale_deleted": self.stale_deleted,
+            "runs_in_progress": self.runs_in_progress,
+        }
+
+    async def _get_agent_id(self, client: AgentsClient, key: AgentKey, instructions: str) -> str:
+        agent_id = self._agents.get(key)
+        if agent_id is not None:
+            self.reused += 1
+            return agent_id
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            agent_id = self._agents.get(key)
+            if agent_id is None:
+                name, instructions_hash, model = key
+                agent = await client.create_agent(
+                    model=model,
+                    name=name,
+                    instructions=instructions,
+                    metadata={**REGISTRY_METADATA, "instructions_sha256": instructions_hash},
+                )
+                agent_id = self._agents[key] = agent.id
+                self.created += 1
+                print(f"[AGENTS] Created agent {agent_id} ({name}, model {model})")
+            else:
+                self.reused += 1
+        return agent_id
+
+    async def _cancel_run(self, client: AgentsClient, thread_id: str, run_id: str) -> None:
+        self.cancelled += 1
+        latency_metrics().increment("agent.runs_cancelled")
+        try:
+            await client.runs.cancel(thread_id=thread_id, run_id=run_id)
+            print(f"[AGENTS] Cancelled run {run_id}")
+        except Exception as e:
+            print(f"[AGENTS] Warning: Could not cancel run {run_id}: {str(e)}")
+
+    async def _reap_idle(self, client: AgentsClient) -> None:
+        if self.idle_ttl_seconds is None:
+            return
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        for key, agent_id in list(self._agents.items()):
+            if self._agents.get(key) == agent_id and not self._in_use.get(key) and self._last_used.get(key, cutoff) < cutoff:
+                await self._delete(client, key, agent_id)
+                self.reaped += 1
+
+    async def _delete(self, client: AgentsClient, key: AgentKey, agent_id: str) -> None:
+        self._forget(key, agent_id)
+        try:
+            await client.delete_agent(agent_id)
+            print(f"[AGENTS] Deleted agent {agent_id} ({key[0]})")
+        except Exception as e:
+            print(f"[AGENTS] Warning: Could not delete agent {agent_id}: {str(e)}")
+
+    def _forget(self, key: AgentKey, agent_id: str) -> None:
+        if self._agents.get(key) == agent_id:
+            del self._agents[key]
+            self._last_used.pop(key, None)
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from ..config import (
+    ANALYSIS_CACHE_BACKEND,
+    ANALYSIS_CACHE_MAX_BYTES,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_PATH,
+    ANALYSIS_CACHE_TTL_SECONDS,
+)
+from ..models.schemas import AnalysisProgressUpdate
+from .cache import LRUCache
+
+
+def analysis_cache_key(repo_name: str, commit_sha: str, agent_id: str, fingerprint: str) -> str:
+    """
+    Build the cache key of one analysis.
+
+    Args:
+        repo_name: Repository in owner/repo format (case-insensitive)
+        commit_sha: Commit the analysis inputs were read at
+        agent_id: The type of AI agent
+        fingerprint: AzureAgentService.analysis_fingerprint(agent_id), covering
+            the agent instructions and model deployment
+    """
+    raw = "\0".join((repo_name.lower(), commit_sha, agent_id, fingerprint))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class AnalysisCacheBackend:
+    """
+    Storage for completed analysis results.
+
+    Values are JSON-serialisable dicts. Backends bound their size and expire
+    entries after ``ttl_seconds``; reads refresh an entry's recency.
+    """
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class NullAnalysisCache(AnalysisCacheBackend):
+    """Backend used when caching is disabled."""
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "none"}
+
+
+class MemoryAnalysisCache(AnalysisCacheBackend):
+    """In-process backend on top of the byte-bounded LRU cache."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: Optional[float] = None) -> None:
+        self._cache: LRUCache = LRUCache(max_bytes, ttl_seconds=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._cache.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class SQLiteAnalysisCache(AnalysisCacheBackend):
+    """
+    Persistent backend in a single SQLite file.
+
+    Entries are evicted least recently used first once ``max_entries`` is
+    exceeded, and expire ``ttl_seconds`` after they were written. Queries run
+    in a worker thread so the event loop never blocks on disk I/O.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: Optional[float] = None) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS analysis_cache_accessed ON analysis_cache (accessed_at)")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = await asyncio.to_thread(self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._set, key, orjson.dumps(value))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        value: Dict[str, Any] = orjson.loads(row[0])
+        return value
+
+    def _set(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if self.ttl_seconds is not None:
+                self._db.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM analysis_cache WHERE key IN ("
+                " SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+@lru_cache
+def analysis_cache() -> AnalysisCacheBackend:
+    """Process-wide analysis result cache, selected by ANALYSIS_CACHE_BACKEND."""
+    ttl = ANALYSIS_CACHE_TTL_SECONDS or None
+    if ANALYSIS_CACHE_BACKEND == "sqlite":
+        try:
+            return SQLiteAnalysisCache(ANALYSIS_CACHE_PATH, ANALYSIS_CACHE_MAX_ENTRIES, ttl)
+        except sqlite3.Error as e:
+            print(f"Could not open analysis cache at {ANALYSIS_CACHE_PATH}, using memory: {str(e)}")
+    elif ANALYSIS_CACHE_BACKEND == "none":
+        return NullAnalysisCache()
+    return MemoryAnalysisCache(ANALYSIS_CACHE_MAX_BYTES, ttl)
+
+
+def replay_progress(entry: Dict[str, Any]) -> List[AnalysisProgressUpdate]:
+    """
+    Synthetic progress updates for an analysis served from the cache.
+
+    They mirror the step structure of a live run so streaming clients render
+    the same progress UI, completing instantly.
+    """
+    commit = (entry.get("commit_sha") or "")[:7]
+    details = {"cached": True, "commit_sha": entry.get("commit_sha"), "cached_at": entry.get("created_at")}
+    setup_commands = entry.get("setup_commands") or {}
+    return [
+        AnalysisProgressUpdate(
+            step=1,
+            step_name="Analyzing Repository Content",
+            status="completed",
+            message=f"Loaded cached analysis for commit {commit}",
+            progress_percentage=33,
+            elapsed_time=0.0,
+            details={**details, "analysis_length": len(entry.get("analysis") or "")},
+        ),
+        AnalysisProgressUpdate(
+            step=2,
+            step_name="Identifying Configuration Files",
+            status="completed",
+            message="Configuration files unchanged since the cached analysis",
+            progress_percentage=66,
+            elapsed_time=0.0,
+            details=details,
+        ),
+        AnalysisProgressUpdate(
+            step=3,
+            step_name="Extracting Setup Instructions",
+            status="completed",
+            message="Loaded cached setup instructions",
+            progress_percentage=100,
+            elapsed_time=0.0,
+            details={**details, "setup_commands": list(setup_commands.keys())},
+        ),
+    ]
@@ -0,0 +1,127 @@
+import asyncio
+import posixpath
+import tarfile
+import tempfile
+from typing import IO, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from ..constants import CONFIG_FILE_NAMES, DEPENDENCY_FILES
+from .config_scorer import is_config_path
+
+# Archives are buffered in memory up to this size and spilled to disk beyond it.
+_SPOOL_MAX_MEMORY_BYTES = 8 * 1024 * 1024
+
+# Downloaded chunks are batched up to this size before each spool write.
+_SPOOL_WRITE_BATCH_BYTES = 1024 * 1024
+
+_CANDIDATE_NAMES = frozenset(CONFIG_FILE_NAMES) | frozenset(DEPENDENCY_FILES)
+
+
+class ArchiveTooLargeError(RuntimeError):
+    """Raised when a repository archive exceeds the configured download cap."""
+
+
+def is_candidate_path(path: str) -> bool:
+    """
+    Return True for files the analysis pipeline may need from an archive.
+
+    Covers dependency manifests and configuration files at any depth (including
+    everything the step 2 scorer can select), root README variants and CI
+    workflow definitions.
+    """
+    name = posixpath.basename(path)
+    if name in _CANDIDATE_NAMES or is_config_path(path):
+        return True
+    if "/" not in path and name.lower().startswith("readme"):
+        return True
+    return path.startswith(".github/workflows/") and name.endswith((".yml", ".yaml"))
+
+
+def _extract_members(
+    archive: IO[bytes],
+    wanted: Callable[[str], bool],
+    max_file_bytes: int,
+    max_total_bytes: int,
+) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Read the wanted text files from a gzipped tar stream without seeking.
+
+    Returns the decoded files and the wanted paths that were skipped for
+    exceeding the per-file or total byte cap.
+    """
+    results: Dict[str, str] = {}
+    skipped: Set[str] = set()
+    total = 0
+    with tarfile.open(fileobj=archive, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            # GitHub archives wrap everything in a single "<owner>-<repo>-<sha>/" directory.
+            _, _, path = member.name.partition("/")
+            if not path or not wanted(path):
+                continue
+            if member.size > max_file_bytes or total + member.size > max_total_bytes:
+                skipped.add(path)
+                continue
+            handle = tar.extractfile(member)
+            if handle is None:
+                continue
+            data = handle.read()
+            try:
+                results[path] = data.decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+            total += member.size
+    return results, skipped
+
+
+async def fetch_archive_files(
+    client: httpx.AsyncClient,
+    url: str,
+    wanted: Callable[[str], bool],
+    max_file_bytes: int,
+    max_total_bytes: int,
+    max_download_bytes: int,
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[Dict[str, str], Set[str]]:
+    """
+    Download a repository tarball once and extract only the wanted files.
+
+    The archive is streamed into a spooled temporary file (memory first, disk
+    beyond a few MB) and then read sequentially with ``tarfile``. Spool writes
+    and extraction both run in worker threads, so disk I/O never blocks the
+    event loop and the whole archive is never held in memory.
+
+    Args:
+        client: HTTP client used for the download (redirects must be followed)
+        url: Tarball URL, e.g. ``{api}/repos/{owner}/{repo}/tarball/{sha}``
+        wanted: Predicate selecting repository-relative paths to extract
+        max_file_bytes: Files larger than this are skipped
+        max_total_bytes: Extraction stops adding files past this total
+        max_download_bytes: The download is aborted past this size
+        headers: Extra request headers (e.g. Authorization)
+
+    Returns:
+        Dictionary mapping repository paths to decoded UTF-8 contents, and
+        the wanted paths left out because of the byte caps
+    """
+    with tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY_BYTES) as spool:
+        downloaded = 0
+        pending: List[bytes] = []
+        pending_bytes = 0
+        async with client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                downloaded += len(chunk)
+                if downloaded > max_download_bytes:
+                    raise ArchiveTooLargeError(f"Archive exceeds {max_download_bytes} bytes")
+                pending.append(chunk)
+                pending_bytes += len(chunk)
+                if pending_bytes >= _SPOOL_WRITE_BATCH_BYTES:
+                    await asyncio.to_thread(spool.writelines, pending)
+                    pending, pending_bytes = [], 0
+        if pending:
+            await asyncio.to_thread(spool.writelines, pending)
+        spool.seek(0)
+        return await asyncio.to_thread(_extract_members, spool, wanted, max_file_bytes, max_total_bytes)
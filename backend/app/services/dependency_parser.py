@@ -0,0 +1,317 @@
+import json
+import posixpath
+import re
+import sys
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..models.schemas import DependencyInfo
+from .config_scorer import is_excluded_directory
+from .tree_index import TreeIndex
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+MANIFEST_NAMES = ("pyproject.toml", "Pipfile", "package.json", "go.mod", "Cargo.toml", "pom.xml", "build.gradle", "build.gradle.kts")
+
+# Optional dependency groups with these names hold development tooling.
+_DEV_GROUPS = frozenset({"dev", "develop", "development", "test", "tests", "testing", "lint", "linting", "docs", "doc", "typing", "types", "style", "format"})
+
+# Names and versions shown per scope of a manifest in the prompt summary.
+_SUMMARY_MAX_PER_SCOPE = 25
+
+_REQUIREMENT = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(\(?[^;#@]*\)?)?")
+_GO_REQUIRE = re.compile(r"^\s*(?:require\s+)?([^\s()]+)\s+(v[^\s]+)(\s*//\s*indirect)?")
+_GRADLE_DEPENDENCY = re.compile(
+    r"\b(implementation|api|compile|compileOnly|runtimeOnly|testImplementation|testCompileOnly|testRuntimeOnly|"
+    r"androidTestImplementation|annotationProcessor|kapt|ksp|developmentOnly|classpath)\s*\(?\s*[\"']([^\"':\s]+):([^\"':\s]+)(?::([^\"'\s]+))?[\"']"
+)
+_GRADLE_SCOPES = {"testImplementation": "dev", "testCompileOnly": "dev", "testRuntimeOnly": "dev", "androidTestImplementation": "dev", "compileOnly": "build", "annotationProcessor": "build", "kapt": "build", "ksp": "build", "classpath": "build", "developmentOnly": "dev"}
+_MAVEN_SCOPES = {"test": "dev", "provided": "build", "compile": "runtime", "runtime": "runtime", "system": "runtime", "import": "build"}
+_PNPM_PACKAGE = re.compile(r"^\s*-\s*['\"]?([^'\"#\s]+)['\"]?")
+
+
+def is_manifest_name(name: str) -> bool:
+    """Return True for a dependency manifest file name the parsers understand."""
+    return name in MANIFEST_NAMES or (name.startswith("requirements") and name.endswith(".txt"))
+
+
+def find_manifests(tree_index: TreeIndex, limit: int) -> Tuple[List[str], bool]:
+    """
+    Paths of the dependency manifests in a tree, shallowest first, outside vendored directories.
+
+    Returns at most ``limit`` paths and whether more were found.
+    """
+    tree = tree_index.tree
+    paths = []
+    for name in tree_index.names():
+        if is_manifest_name(name):
+            for index in tree_index.find_name(name):
+                path = tree.path(index)
+                if tree.is_blob(index) and not any(is_excluded_directory(segment) for segment in path.split("/")[:-1]):
+                    paths.append(path)
+    paths.sort(key=lambda path: (path.count("/"), path))
+    return paths[:limit], len(paths) > limit
+
+
+def workspace_manifests(file_contents: Dict[str, str], tree_index: TreeIndex) -> List[str]:
+    """
+    The package.json files of the workspace members declared at the repository root.
+
+    Reads the ``workspaces`` field of the root package.json (a list of globs
+    or ``{"packages": [...]}``) and the package list of pnpm-workspace.yaml.
+    """
+    patterns: List[str] = []
+    if "package.json" in file_contents:
+        try:
+            workspaces = json.loads(file_contents["package.json"]).get("workspaces") or []
+            patterns += workspaces.get("packages") or [] if isinstance(workspaces, dict) else workspaces
+        except (ValueError, AttributeError):
+            pass
+    if "pnpm-workspace.yaml" in file_contents:
+        in_packages = False
+        for line in file_contents["pnpm-workspace.yaml"].splitlines():
+            if not line.startswith((" ", "-", "\t")):
+                in_packages = line.strip().startswith("packages:")
+            elif in_packages:
+                match = _PNPM_PACKAGE.match(line)
+                if match:
+                    patterns.append(match.group(1))
+    members: Dict[str, None] = OrderedDict()
+    for pattern in patterns:
+        if isinstance(pattern, str) and not pattern.startswith("!"):
+            for index in tree_index.glob(pattern.rstrip("/") + "/package.json"):
+                members[tree_index.tree.path(index)] = None
+    return list(members)
+
+
+def parse_manifest(path: str, content: str) -> List[DependencyInfo]:
+    """
+    Parse one manifest into normalised dependencies.
+
+    Unknown file names yield nothing; a manifest that fails to parse is
+    reported and skipped rather than failing the caller.
+    """
+    name = posixpath.basename(path)
+    parser = _PARSERS.get(name)
+    if parser is None and name.startswith("requirements") and name.endswith(".txt"):
+        parser = _requirements
+    if parser is None:
+        return []
+    try:
+        return [DependencyInfo(name=dependency, version_spec=spec or None, scope=scope, ecosystem=ecosystem, manifest=path) for dependency, spec, scope, ecosystem in parser(path, content)]
+    except Exception as e:
+        print(f"[DEPENDENCIES] Could not parse {path}: {str(e)}")
+        return []
+
+
+def parse_manifests(file_contents: Dict[str, str]) -> List[DependencyInfo]:
+    """Parse every manifest among ``file_contents``, shallowest first."""
+    dependencies: List[DependencyInfo] = []
+    for path in sorted(file_contents, key=lambda p: (p.count("/"), p)):
+        dependencies.extend(parse_manifest(path, file_contents[path]))
+    return dependencies
+
+
+def summarize_dependencies(dependencies: Iterable[DependencyInfo]) -> str:
+    """
+    A compact text listing of dependencies for prompts: one line per manifest and scope.
+
+    Each line names at most a couple of dozen packages with their version
+    specs and says how many more there are.
+    """
+    grouped: Dict[Tuple[str, str, str], List[DependencyInfo]] = OrderedDict()
+    for dependency in dependencies:
+        grouped.setdefault((dependency.manifest, dependency.ecosystem, dependency.scope), []).append(dependency)
+    lines = []
+    for (manifest, ecosystem, scope), group in grouped.items():
+        shown = ", ".join(f"{d.name} {d.version_spec}" if d.version_spec else d.name for d in group[:_SUMMARY_MAX_PER_SCOPE])
+        more = f" (+{len(group) - _SUMMARY_MAX_PER_SCOPE} more)" if len(group) > _SUMMARY_MAX_PER_SCOPE else ""
+        lines.append(f"{manifest} ({ecosystem}) {scope}: {shown}{more}")
+    return "\n".join(lines)
+
+
+Parsed = List[Tuple[str, Optional[str], str, str]]  # (name, version spec, scope, ecosystem)
+
+
+def _pep508(requirement: str) -> Optional[Tuple[str, Optional[str]]]:
+    match = _REQUIREMENT.match(requirement)
+    if not match:
+        return None
+    spec = (match.group(3) or "").strip().strip("()").strip()
+    return match.group(1), spec or None
+
+
+def _requirements(path: str, content: str) -> Parsed:
+    name = posixpath.basename(path).lower()
+    scope = "dev" if any(word in name for word in ("dev", "test", "lint", "doc", "typing")) else "runtime"
+    parsed: Parsed = []
+    for line in content.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if not line or line.startswith(("#", "-", "git+", "http:", "https:", ".")):
+            continue
+        requirement = _pep508(line)
+        if requirement:
+            parsed.append((requirement[0], requirement[1], scope, "pypi"))
+    return parsed
+
+
+def _poetry_spec(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return None if value == "*" else value
+    if isinstance(value, dict):
+        if "version" in value:
+            return _poetry_spec(value["version"])
+        for source in ("path", "git", "url"):
+            if source in value:
+                return f"{source}:{value[source]}"
+    if isinstance(value, list):
+        return " || ".join(filter(None, (_poetry_spec(item) for item in value))) or None
+    return None
+
+
+def _optional_scope(value: Any, scope: str) -> str:
+    # Poetry and Cargo mark dependencies only installed through an extra or feature with optional = true
+    return "optional" if scope == "runtime" and isinstance(value, dict) and value.get("optional") else scope
+
+
+def _pyproject(path: str, content: str) -> Parsed:
+    data = tomllib.loads(content)
+    project = data.get("project") or {}
+    tool = data.get("tool") or {}
+    parsed: Parsed = []
+
+    def add(requirements: Iterable[Any], scope: str) -> None:
+        for requirement in requirements:
+            if isinstance(requirement, str):
+                dependency = _pep508(requirement)
+                if dependency:
+                    parsed.append((dependency[0], dependency[1], scope, "pypi"))
+
+    add(project.get("dependencies") or [], "runtime")
+    for group, requirements in (project.get("optional-dependencies") or {}).items():
+        add(requirements, "dev" if group.lower() in _DEV_GROUPS else "optional")
+    for group, requirements in (data.get("dependency-groups") or {}).items():
+        add(requirements, "dev")
+    add((data.get("build-system") or {}).get("requires") or [], "build")
+
+    poetry = tool.get("poetry") or {}
+    poetry_groups = [("runtime", poetry.get("dependencies") or {}), ("dev", poetry.get("dev-dependencies") or {})]
+    for group, settings in (poetry.get("group") or {}).items():
+        poetry_groups.append(("dev" if group.lower() in _DEV_GROUPS else "optional", settings.get("dependencies") or {}))
+    for scope, dependencies in poetry_groups:
+        for name, value in dependencies.items():
+            if name.lower() != "python":
+                parsed.append((name, _poetry_spec(value), _optional_scope(value, scope), "pypi"))
+    return parsed
+
+
+def _pipfile(path: str, content: str) -> Parsed:
+    data = tomllib.loads(content)
+    parsed: Parsed = []
+    for section, scope in (("packages", "runtime"), ("dev-packages", "dev")):
+        for name, value in (data.get(section) or {}).items():
+            parsed.append((name, _poetry_spec(value), scope, "pypi"))
+    return parsed
+
+
+def _package_json(path: str, content: str) -> Parsed:
+    data = json.loads(content)
+    parsed: Parsed = []
+    for section, scope in (("dependencies", "runtime"), ("devDependencies", "dev"), ("peerDependencies", "peer"), ("optionalDependencies", "optional")):
+        for name, spec in (data.get(section) or {}).items():
+            parsed.append((name, spec if isinstance(spec, str) else None, scope, "npm"))
+    return parsed
+
+
+def _go_mod(path: str, content: str) -> Parsed:
+    parsed: Parsed = []
+    in_require = False
+    for line in content.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("require ("):
+            in_require = True
+            continue
+        if in_require and stripped == ")":
+            in_require = False
+            continue
+        if in_require or stripped.startswith("require "):
+            match = _GO_REQUIRE.match(stripped)
+            if match:
+                parsed.append((match.group(1), match.group(2), "indirect" if match.group(3) else "runtime", "go"))
+    return parsed
+
+
+def _cargo_toml(path: str, content: str) -> Parsed:
+    data = tomllib.loads(content)
+    tables = [data, data.get("workspace") or {}] + [target for target in (data.get("target") or {}).values() if isinstance(target, dict)]
+    parsed: Parsed = []
+    for table in tables:
+        for section, scope in (("dependencies", "runtime"), ("dev-dependencies", "dev"), ("build-dependencies", "build")):
+            for name, value in (table.get(section) or {}).items():
+                spec: Optional[str]
+                if isinstance(value, dict) and value.get("workspace"):
+                    spec = "workspace"
+                else:
+                    spec = _poetry_spec(value)
+                parsed.append((value.get("package", name) if isinstance(value, dict) else name, spec, _optional_scope(value, scope), "cargo"))
+    return parsed
+
+
+def _pom_xml(path: str, content: str) -> Parsed:
+    root = ElementTree.fromstring(content)
+
+    def local(element: ElementTree.Element) -> str:
+        return element.tag.rsplit("}", 1)[-1]
+
+    def child(element: ElementTree.Element, name: str) -> Optional[str]:
+        for item in element:
+            if local(item) == name:
+                return (item.text or "").strip() or None
+        return None
+
+    properties: Dict[str, str] = {}
+    for element in root:
+        if local(element) == "properties":
+            properties = {local(item): (item.text or "").strip() for item in element}
+    project_version = child(root, "version")
+    if project_version:
+        properties.setdefault("project.version", project_version)
+
+    parsed: Parsed = []
+    for section in root:
+        # dependencyManagement only pins versions; it declares no dependencies
+        if local(section) != "dependencies":
+            continue
+        for dependency in section:
+            group, artifact = child(dependency, "groupId"), child(dependency, "artifactId")
+            if not artifact:
+                continue
+            version = child(dependency, "version")
+            if version:
+                version = re.sub(r"\$\{([^}]+)\}", lambda m: properties.get(m.group(1), m.group(0)), version)
+            scope = _MAVEN_SCOPES.get(child(dependency, "scope") or "compile", "runtime")
+            parsed.append((f"{group}:{artifact}" if group else artifact, version, scope, "maven"))
+    return parsed
+
+
+def _gradle(path: str, content: str) -> Parsed:
+    return [
+        (f"{group}:{artifact}", version, _GRADLE_SCOPES.get(configuration, "runtime"), "maven")
+        for configuration, group, artifact, version in _GRADLE_DEPENDENCY.findall(content)
+    ]
+
+
+_PARSERS: Dict[str, Callable[[str, str], Parsed]] = {
+    "pyproject.toml": _pyproject,
+    "Pipfile": _pipfile,
+    "package.json": _package_json,
+    "go.mod": _go_mod,
+    "Cargo.toml": _cargo_toml,
+    "pom.xml": _pom_xml,
+    "build.gradle": _gradle,
+    "build.gradle.kts": _gradle,
+}
@@ -0,0 +1,205 @@
+import json
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, overload
+
+TYPE_BLOB = 1
+TYPE_TREE = 2
+TYPE_COMMIT = 4
+
+_TYPE_BITS = {"blob": TYPE_BLOB, "tree": TYPE_TREE, "commit": TYPE_COMMIT}
+_TYPE_NAMES = {bit: name for name, bit in _TYPE_BITS.items()}
+
+_UNKNOWN_SIZE = -1
+
+
+class FileTree(Sequence):
+    """
+    Compact, columnar representation of a repository file tree.
+
+    Each entry is stored as four parallel arrays: the id of its parent
+    directory, the id of its interned name segment, a type bitmask and its size
+    in an ``array('q')`` (-1 when unknown). Directory paths and name segments
+    are interned once, so a 100k-entry monorepo costs a few bytes per entry
+    instead of one pydantic object and one dict each.
+
+    The tree behaves as a read-only sequence of ``{"path", "type", "size"}``
+    dicts (built on access), so existing code that indexes, slices or iterates
+    a list of file dicts keeps working. Hot paths should use ``paths()``,
+    ``entries()``, ``iter_prefix()`` or ``to_json()``, which never build
+    per-entry objects.
+    """
+
+    def __init__(self) -> None:
+        self._segments: List[str] = []
+        self._segment_ids: Dict[str, int] = {}
+        self._dirs: List[str] = [""]
+        self._dir_ids: Dict[str, int] = {"": 0}
+        self._dir_entries: List[array] = [array("i")]
+        self._parents = array("i")
+        self._names = array("i")
+        self._types = array("B")
+        self._sizes = array("q")
+        self._escaped_dirs: Dict[int, str] = {}
+        self._escaped_names: Dict[int, str] = {}
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[str, str, Optional[int]]]) -> "FileTree":
+        """Build a tree from ``(path, type, size)`` tuples."""
+        tree = cls()
+        for path, entry_type, size in entries:
+            tree.append(path, entry_type, size)
+        return tree
+
+    def append(self, path: str, entry_type: str, size: Optional[int] = None) -> None:
+        directory, _, name = path.rpartition("/")
+        self._parents.append(self._dir_id(directory))
+        self._names.append(self._segment_id(name))
+        self._types.append(_TYPE_BITS.get(entry_type, 0))
+        self._sizes.append(_UNKNOWN_SIZE if size is None else size)
+        self._dir_entries[self._parents[-1]].append(len(self._parents) - 1)
+
+    def __len__(self) -> int:
+        return len(self._parents)
+
+    @overload
+    def __getitem__(self, index: int) -> Dict[str, Any]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Dict[str, Any]]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [self._entry_dict(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("FileTree index out of range")
+        return self._entry_dict(index)
+
+    def path(self, index: int) -> str:
+        directory = self._dirs[self._parents[index]]
+        name = self._segments[self._names[index]]
+        return f"{directory}/{name}" if directory else name
+
+    def name(self, index: int) -> str:
+        """Return the last path segment of an entry."""
+        return self._segments[self._names[index]]
+
+    def type(self, index: int) -> str:
+        return _TYPE_NAMES.get(self._types[index], "unknown")
+
+    def size(self, index: int) -> Optional[int]:
+        size = self._sizes[index]
+        return None if size == _UNKNOWN_SIZE else size
+
+    def is_blob(self, index: int) -> bool:
+        return bool(self._types[index] & TYPE_BLOB)
+
+    def paths(self) -> Iterator[str]:
+        """Iterate over all entry paths in tree order."""
+        dirs, segments = self._dirs, self._segments
+        for parent, name in zip(self._parents, self._names):
+            directory = dirs[parent]
+            yield f"{directory}/{segments[name]}" if directory else segments[name]
+
+    def entries(self) -> Iterator[Tuple[str, str, Optional[int]]]:
+        """Iterate over ``(path, type, size)`` tuples in tree order."""
+        for index, path in enumerate(self.paths()):
+            yield path, self.type(index), self.size(index)
+
+    def children(self, directory: str) -> Optional[List[int]]:
+        """
+        Return the indices of the direct children of ``directory`` in tree order.
+
+        Returns None when no entry lives under ``directory``. Git does not
+        track empty directories, so that means it is not a directory.
+        """
+        dir_id = self._dir_ids.get(directory.strip("/"))
+        if dir_id is None:
+            return None
+        return list(self._dir_entries[dir_id])
+
+    def iter_prefix(self, prefix: str) -> Iterator[int]:
+        """
+        Yield the indices of entries at or below ``prefix``, in tree order.
+
+        Only the directory table is scanned; entries are reached through the
+        per-directory index, so the cost is proportional to the result size.
+        """
+        prefix = prefix.strip("/")
+        if not prefix:
+            yield from range(len(self))
+            return
+        matched: List[int] = []
+        for dir_id, directory in enumerate(self._dirs):
+            if directory == prefix or directory.startswith(prefix + "/"):
+                matched.extend(self._dir_entries[dir_id])
+        parent, _, name = prefix.rpartition("/")
+        parent_id = self._dir_ids.get(parent)
+        if parent_id is not None and name in self._segment_ids:
+            name_id = self._segment_ids[name]
+            matched.extend(i for i in self._dir_entries[parent_id] if self._names[i] == name_id)
+        yield from sorted(matched)
+
+    def to_json(self, indices: Optional[Iterable[int]] = None) -> str:
+        """
+        Encode entries as a JSON array of ``{"path", "type", "size"}`` objects.
+
+        Escaped directory and name strings are cached per interned id, so
+        encoding does not allocate an object per entry.
+
+        Args:
+            indices: Entries to encode (defaults to all, in tree order)
+        """
+        return "[" + ",".join(self.iter_json(indices)) + "]"
+
+    def iter_json(self, indices: Optional[Iterable[int]] = None) -> Iterator[str]:
+        """Yield the JSON object text of each entry."""
+        escaped_dirs, escaped_names = self._escaped_dirs, self._escaped_names
+        for index in range(len(self)) if indices is None else indices:
+            parent, name = self._parents[index], self._names[index]
+            directory = escaped_dirs.get(parent)
+            if directory is None:
+                directory = escaped_dirs[parent] = json.dumps(self._dirs[parent])[1:-1]
+            escaped_name = escaped_names.get(name)
+            if escaped_name is None:
+                escaped_name = escaped_names[name] = json.dumps(self._segments[name])[1:-1]
+            size = self._sizes[index]
+            yield '{"path":"%s%s%s","type":"%s","size":%s}' % (
+                directory,
+                "/" if directory else "",
+                escaped_name,
+                _TYPE_NAMES.get(self._types[index], "unknown"),
+                "null" if size == _UNKNOWN_SIZE else size,
+            )
+
+    def estimated_size(self) -> int:
+        """Approximate memory footprint in bytes, for cache accounting."""
+        arrays = (self._parents, self._names, self._types, self._sizes)
+        total = sum(a.itemsize * len(a) for a in arrays)
+        total += sum(a.itemsize * len(a) for a in self._dir_entries)
+        total += sum(sys.getsizeof(s) for s in self._segments)
+        total += sum(sys.getsizeof(d) for d in self._dirs)
+        # Interning dictionaries hold one slot per key.
+        return total + 100 * (len(self._segments) + len(self._dirs))
+
+    def _segment_id(self, segment: str) -> int:
+        segment_id = self._segment_ids.get(segment)
+        if segment_id is None:
+            segment_id = len(self._segments)
+            self._segments.append(sys.intern(segment))
+            self._segment_ids[segment] = segment_id
+        return segment_id
+
+    def _dir_id(self, directory: str) -> int:
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dirs.append(directory)
+            self._dir_ids[directory] = dir_id
+            self._dir_entries.append(array("i"))
+        return dir_id
+
+    def _entry_dict(self, index: int) -> Dict[str, Any]:
+        return {"path": self.path(index), "type": self.type(index), "size": self.size(index)}
@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+_SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+
+class GitMirrorError(RuntimeError):
+    """Raised when a git command against a mirror fails."""
+
+
+def is_commit_sha(value: Optional[str]) -> bool:
+    return bool(value and _SHA_PATTERN.match(value))
+
+
+class GitMirror:
+    """
+    Local bare, blob-filtered mirrors of GitHub repositories.
+
+    Each repository is cloned once with ``--filter=blob:none`` so only commits
+    and trees are transferred; blobs are fetched lazily from the promisor
+    remote the first time ``git cat-file`` reads them. Mirrors are refreshed
+    with an incremental ``git fetch`` only when a requested commit is not
+    present yet. Tree listings come from ``git ls-tree`` and therefore are not
+    subject to the 100k-entry truncation of the recursive Git Trees API.
+    """
+
+    def __init__(self, root: str, remote_template: str, token: Optional[str] = None) -> None:
+        self.root = root
+        self.remote_template = remote_template
+        self._token = token
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def mirror_path(self, owner: str, repo: str) -> str:
+        for name in (owner, repo):
+            if not _NAME_PATTERN.match(name) or name in (".", ".."):
+                raise GitMirrorError(f"Invalid repository name: {owner}/{repo}")
+        return os.path.join(self.root, owner.lower(), f"{repo.lower()}.git")
+
+    async def ensure_commit(self, owner: str, repo: str, sha: str) -> str:
+        """
+        Make sure ``sha`` is available in the local mirror, cloning or fetching as needed.
+
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            sha: Commit SHA that must be present
+
+        Returns:
+            Path of the bare mirror
+        """
+        path = self.mirror_path(owner, repo)
+        lock = self._locks.setdefault(path, asyncio.Lock())
+        async with lock:
+            if not os.path.isdir(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                print(f"Cloning blobless mirror of {owner}/{repo}...")
+                await self._git(
+                    None, "clone", "--bare", "--filter=blob:none", "--quiet",
+                    self.remote_template.format(owner=owner, repo=repo), path,
+                )
+            if sha not in await self._ref_tips(path):
+                print(f"Fetching {owner}/{repo} into mirror for {sha[:7]}...")
+                await self._git(
+                    path, "fetch", "--quiet", "--prune", "--filter=blob:none", "origin",
+                    "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*",
+                )
+                # Older commits are not ref tips; fall back to an object lookup,
+                # which may lazily fetch the commit from the promisor remote.
+                if sha not in await self._ref_tips(path) and not await self._has_commit(path, sha):
+                    raise GitMirrorError(f"Commit {sha} not found in {owner}/{repo}")
+        return path
+
+    async def list_tree(self, owner: str, repo: str, sha: str) -> List[Tuple[str, str]]:
+        """
+        List every entry of a commit's tree recursively.
+
+        Sizes are not reported: with a blob-less mirror they would require
+        downloading every blob.
+
+        Returns:
+            List of (path, type) tuples where type is "blob", "tree" or "commit"
+        """
+        path = await self.ensure_commit(owner, repo, sha)
+        output = await self._git(path, "ls-tree", "-r", "-t", "-z", sha)
+        entries = []
+        for record in output.split(b"\0"):
+            if not record:
+                continue
+            meta, _, name = record.partition(b"\t")
+            _, object_type, _ = meta.split(b" ", 2)
+            entries.append((name.decode("utf-8", "surrogateescape"), object_type.decode()))
+        return entries
+
+    async def read_files(self, owner: str, repo: str, sha: str, paths: List[str]) -> Dict[str, str]:
+        """
+        Read several files at ``sha`` with a single ``git cat-file --batch`` process.
+
+        Blobs not yet in the mirror are prefetched with one ``git fetch``
+        first; otherwise ``cat-file`` would fetch them lazily, one round trip
+        per blob. Missing paths, non-blob objects and non UTF-8 content are
+        omitted.
+        """
+        if not paths:
+            return {}
+        path = await self.ensure_commit(owner, repo, sha)
+        await self._prefetch_blobs(path, sha, paths)
+        request = "".join(f"{sha}:{file_path}\n" for file_path in paths).encode()
+        output = await self._git(path, "cat-file", "--batch", input=request)
+
+        results: Dict[str, str] = {}
+        offset = 0
+        for file_path in paths:
+            header_end = output.index(b"\n", offset)
+            header = output[offset:header_end].split(b" ")
+            offset = header_end + 1
+            if len(header) != 3 or header[-1] == b"missing":
+                continue
+            size = int(header[2])
+            data = output[offset:offset + size]
+            offset += size + 1  # content is followed by a newline
+            if header[1] != b"blob":
+                continue
+            try:
+                results[file_path] = data.decode("utf-8")
+            except UnicodeDecodeError:
+                continue
+        return results
+
+    async def _prefetch_blobs(self, path: str, sha: str, paths: List[str]) -> None:
+        # rev-list reports absent objects with a "?" prefix instead of fetching
+        # them, and the pathspecs keep it to the requested files' trees.
+        output = await self._git(path, "rev-list", "--objects", "--no-walk", "--missing=print", sha, "--", *paths)
+        missing = [line[1:] for line in output.decode().split() if line.startswith("?")]
+        if not missing:
+            return
+        try:
+            await self._git(
+                path, "fetch", "--quiet", "--no-tags", "--no-write-fetch-head", "--recurse-submodules=no",
+                "--filter=blob:none", "--stdin", "origin",
+                input="".join(f"{oid}\n" for oid in missing).encode(),
+            )
+        except GitMirrorError as e:
+            # cat-file still fetches whatever is missing, one blob at a time.
+            print(f"Could not prefetch {len(missing)} blobs: {str(e)}")
+
+    async def _ref_tips(self, path: str) -> set:
+        # Checking ref tips never touches the object store, so it cannot
+        # trigger a lazy fetch in the partial clone.
+        output = await self._git(path, "for-each-ref", "--format=%(objectname)", "refs/heads", "refs/tags")
+        return set(output.decode().split())
+
+    async def _has_commit(self, path: str, sha: str) -> bool:
+        try:
+            await self._git(path, "cat-file", "-e", f"{sha}^{{commit}}")
+            return True
+        except GitMirrorError:
+            return False
+
+    def _env(self) -> Dict[str, str]:
+        # Repository paths are passed as pathspecs; never treat them as globs.
+        env = dict(os.environ, GIT_TERMINAL_PROMPT="0", GIT_LITERAL_PATHSPECS="1")
+        if self._token:
+            # Pass credentials through the environment rather than the remote
+            # URL so they never end up in the mirror's config or process list.
+            basic = base64.b64encode(f"x-access-token:{self._token}".encode()).decode()
+            env.update({
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraHeader",
+                "GIT_CONFIG_VALUE_0": f"Authorization: Basic {basic}",
+            })
+        return env
+
+    async def _git(self, path: Optional[str], *args: str, input: Optional[bytes] = None) -> bytes:
+        command = ["git"] + (["--git-dir", path] if path else []) + list(args)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self._env(),
+            )
+        except OSError as e:
+            # Typically git is not installed; callers fall back to the REST path.
+            raise GitMirrorError(f"git {args[0]} could not be started: {e}") from e
+        stdout, stderr = await process.communicate(input)
+        if process.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} failed: {stderr.decode(errors='replace').strip()}")
+        return stdout
@@ -1,11 +1,40 @@
+import asyncio
 import base64
 from functools import lru_cache
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, AsyncGenerator, Awaitable, Set, Tuple, TypeVar
+
+import httpx
 from githubkit import GitHub
+from githubkit.exception import RequestFailed
 
-from ..config import GITHUB_TOKEN
+from ..config import (
+    GITHUB_TOKEN,
+    GITHUB_API_URL,
+    GITHUB_HTTP_CACHE_MAX_BYTES,
+    GITHUB_MAX_CONCURRENCY,
+    GITHUB_MAX_CONNECTIONS,
+    SNAPSHOT_CACHE_MAX_BYTES,
+    TREE_INDEX_CACHE_MAX_BYTES,
+    DEFAULT_BRANCH_TTL_SECONDS,
+    GITHUB_FETCH_MODE,
+    ARCHIVE_MAX_FILE_BYTES,
+    ARCHIVE_MAX_TOTAL_BYTES,
+    ARCHIVE_MAX_DOWNLOAD_BYTES,
+    GIT_MIRROR_DIR,
+    GIT_MIRROR_REMOTE_TEMPLATE,
+    DEPENDENCY_MANIFESTS_MAX,
+)
 from ..constants import DEPENDENCY_FILES
 from ..models.schemas import RepositoryFileInfo
+from .archive import fetch_archive_files, is_candidate_path
+from .cache import LRUCache
+from .dependency_parser import find_manifests, workspace_manifests
+from .file_tree import FileTree
+from .git_mirror import GitMirror, GitMirrorError, is_commit_sha
+from .github_http import ConditionalRequestTransport
+from .tree_index import TreeIndex
+
+T = TypeVar("T")
 
 
 def _safe_int_conversion(value, default=0):
@@ -31,12 +60,125 @@ def _safe_int_conversion(value, default=0):
         return default
 
 
+class _SharedAsyncTransport(httpx.AsyncHTTPTransport):
+    """
+    Keep-alive connection pool shared by every githubkit request.
+    
+    githubkit opens and closes a short-lived ``httpx.AsyncClient`` around each
+    call, and closing a client closes its transport. Ignoring ``aclose`` keeps
+    the pool (and its TLS sessions) alive for the life of the process.
+    """
+    
+    async def aclose(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        await super().aclose()
+
+
+@lru_cache
+def _pooled_transport() -> _SharedAsyncTransport:
+    return _SharedAsyncTransport(
+        limits=httpx.Limits(
+            max_connections=GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=GITHUB_MAX_CONNECTIONS,
+        )
+    )
+
+
+@lru_cache
+def github_transport() -> ConditionalRequestTransport:
+    return ConditionalRequestTransport(_pooled_transport(), max_bytes=GITHUB_HTTP_CACHE_MAX_BYTES)
+
+
+async def close_github_transport() -> None:
+    """Close the shared GitHub connection pool (application shutdown)."""
+    await _pooled_transport().shutdown()
+
+
+@lru_cache
+def github_semaphore() -> asyncio.Semaphore:
+    return asyncio.Semaphore(GITHUB_MAX_CONCURRENCY)
+
+
 @lru_cache
 def gh() -> GitHub:
+    # ETag revalidation happens in github_transport(), so githubkit's own
+    # HTTP cache is disabled to avoid caching every response twice.
+    options: Dict[str, Any] = {
+        "base_url": GITHUB_API_URL,
+        "async_transport": github_transport(),
+        "http_cache": False,
+    }
     if not GITHUB_TOKEN:
         print("Warning: GITHUB_TOKEN not set, using anonymous client with rate limits")
-        return GitHub()  # Anonymous client with rate limits
-    return GitHub(GITHUB_TOKEN)
+        return GitHub(**options)  # Anonymous client with rate limits
+    return GitHub(GITHUB_TOKEN, **options)
+
+
+async def _bounded(call: Awaitable[T]) -> T:
+    """Await a GitHub API call while holding a slot of the process-wide semaphore."""
+    async with github_semaphore():
+        return await call
+
+
+@lru_cache
+def snapshot_cache() -> LRUCache:
+    """Process-wide cache of repository data keyed by (owner, repo, commit SHA)."""
+    return LRUCache(SNAPSHOT_CACHE_MAX_BYTES)
+
+
+@lru_cache
+def tree_index_cache() -> LRUCache:
+    """Process-wide cache of file tree query indexes keyed by (owner, repo, commit SHA)."""
+    return LRUCache(TREE_INDEX_CACHE_MAX_BYTES)
+
+
+def tree_index_for(owner: str, repo: str, commit_sha: Optional[str], files: FileTree) -> TreeIndex:
+    """
+    Return the query index for a commit's file tree, building it on first use.
+    
+    The cache key includes the number of entries, so an index is only
+    reused for the same tree. An empty tree (what an uncached, failed tree
+    fetch leaves in a snapshot) is indexed but never cached.
+    """
+    if not commit_sha or not len(files):
+        return TreeIndex(files, commit_sha=commit_sha)
+    cache_key = _repo_key(owner, repo) + (commit_sha, len(files))
+    index = tree_index_cache().get(cache_key)
+    if index is None:
+        index = TreeIndex(files, commit_sha=commit_sha)
+        tree_index_cache().set(cache_key, index)
+    return index
+
+
+@lru_cache
+def default_branch_cache() -> LRUCache:
+    """Short-lived memo of each repository's default branch name."""
+    return LRUCache(4 * 1024 * 1024, ttl_seconds=DEFAULT_BRANCH_TTL_SECONDS)
+
+
+@lru_cache
+def git_mirror() -> GitMirror:
+    """Local blob-filtered mirrors used when GITHUB_FETCH_MODE is "mirror"."""
+    return GitMirror(GIT_MIRROR_DIR, GIT_MIRROR_REMOTE_TEMPLATE, token=GITHUB_TOKEN)
+
+
+class RepositoryNotFoundError(RuntimeError):
+    """Raised when GitHub reports a repository as missing (or private to the token in use)."""
+
+
+def _repo_key(owner: str, repo: str) -> tuple:
+    return (owner.lower(), repo.lower())
+
+
+def _is_not_found(error: BaseException) -> bool:
+    """True for a GitHub 404, the one failure that means a file or README does not exist."""
+    return isinstance(error, RequestFailed) and error.response.status_code == 404
+
+
+# Archive downloads in progress, so concurrent callers share one download.
+_archive_downloads: Dict[tuple, "asyncio.Task[Tuple[Dict[str, str], Set[str]]]"] = {}
 
 
 class GitHubService:
@@ -58,7 +200,7 @@ class GitHubService:
             Repository information as a dictionary or None if not found
         """
         try:
-            meta = gh().rest.repos.get(owner=owner, repo=repo).parsed_data
+            meta = (await _bounded(gh().rest.repos.async_get(owner=owner, repo=repo))).parsed_data
             return {
                 "name": meta.name,
                 "full_name": meta.full_name,
@@ -68,109 +210,244 @@ class GitHubService:
         except Exception:
             return None
     
-    async def get_readme_content(self, owner: str, repo: str) -> Optional[str]:
+    async def get_readme_content(self, owner: str, repo: str, ref: Optional[str] = None) -> Optional[str]:
         """
         Get the README content of a repository.
         
         Args:
             owner: Repository owner/organization
             repo: Repository name
+            ref: Branch, tag, or commit SHA (defaults to the default branch)
             
         Returns:
             README content as a string or None if not found
         """
         try:
-            readme_response = gh().rest.repos.get_readme(owner=owner, repo=repo).parsed_data
-            return base64.b64decode(readme_response.content).decode()
+            return await self._read_readme(owner, repo, ref)
         except Exception:
             return None
     
-    async def get_requirements(self, owner: str, repo: str) -> Dict[str, str]:
+    async def _read_readme(self, owner: str, repo: str, ref: Optional[str] = None) -> Optional[str]:
+        """Like get_readme_content, but only a missing README gives None; other failures raise."""
+        kwargs: Dict[str, Any] = {"owner": owner, "repo": repo}
+        if ref:
+            kwargs["ref"] = ref
+        try:
+            readme_response = (await _bounded(gh().rest.repos.async_get_readme(**kwargs))).parsed_data
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+        try:
+            return base64.b64decode(readme_response.content).decode()
+        except UnicodeDecodeError:
+            return None
+    
+    async def get_requirements(self, owner: str, repo: str, ref: Optional[str] = None) -> Dict[str, str]:
         """
         Try to get requirements.txt or similar dependency files.
         
+        All dependency files are probed concurrently. When ``ref`` is a commit
+        SHA the result is cached alongside the repository snapshot, unless a
+        file could not be read for a reason other than not existing.
+        
         Args:
             owner: Repository owner/organization
             repo: Repository name
-            
+            ref: Branch, tag, or commit SHA (defaults to the default branch)
+        
         Returns:
             Dictionary mapping file names to their contents
         """
-        results: Dict[str, str] = {}
+        cache_key = ("requirements",) + _repo_key(owner, repo) + (ref,) if ref else None
+        if cache_key:
+            cached = snapshot_cache().get(cache_key)
+            if cached is not None:
+                return dict(cached)
         
-        for file in DEPENDENCY_FILES:
-            try:
-                content_response = gh().rest.repos.get_content(
-                    owner=owner,
-                    repo=repo,
-                    path=file
-                ).parsed_data
-                
-                if hasattr(content_response, "content") and hasattr(content_response, "encoding"):
-                    if content_response.encoding == "base64":
-                        results[file] = base64.b64decode(content_response.content).decode("utf-8")
-            except Exception:
-                continue
+        results, complete = await self._get_files_content(owner, repo, DEPENDENCY_FILES, ref=ref)
         
-        return results
+        if cache_key and complete:
+            snapshot_cache().set(cache_key, results)
+        return dict(results)
+    
+    async def get_dependency_manifests(self, owner: str, repo: str, tree_index: TreeIndex, ref: Optional[str] = None) -> Tuple[Dict[str, str], bool]:
+        """
+        Get the dependency manifests found anywhere in a repository's tree.
+        
+        Up to DEPENDENCY_MANIFESTS_MAX manifests outside vendored directories
+        are read, shallowest first, together with the workspace members the
+        root package.json or pnpm-workspace.yaml declares; the latter is
+        included as well when it exists. When ``ref`` is a commit SHA the
+        result is cached alongside the repository snapshot, unless a manifest
+        could not be read or ``tree_index`` is empty (as after a failed tree
+        fetch).
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            tree_index: Query index over the file tree of ``ref``
+            ref: Branch, tag, or commit SHA (defaults to the default branch)
+        
+        Returns:
+            Dictionary mapping manifest paths to their contents, and whether
+            the tree holds more manifests than were read
+        """
+        cache_key = ("dependencies",) + _repo_key(owner, repo) + (ref,) if ref else None
+        if cache_key:
+            cached = snapshot_cache().get(cache_key)
+            if cached is not None:
+                return dict(cached[0]), cached[1]
+        
+        paths, truncated = find_manifests(tree_index, DEPENDENCY_MANIFESTS_MAX)
+        if "pnpm-workspace.yaml" in tree_index:
+            paths.append("pnpm-workspace.yaml")
+        results, complete = await self._get_files_content(owner, repo, paths, ref=ref)
+        # Workspace members beyond the limit are still read; they are the project's own packages
+        members = [path for path in workspace_manifests(results, tree_index) if path not in results]
+        if members:
+            member_results, members_complete = await self._get_files_content(owner, repo, members, ref=ref)
+            results.update(member_results)
+            complete = complete and members_complete
+        
+        if cache_key and complete and len(tree_index):
+            snapshot_cache().set(cache_key, (results, truncated))
+        return dict(results), truncated
+    
+    async def get_default_branch(self, owner: str, repo: str) -> Optional[str]:
+        """
+        Get the default branch of a repository, remembered for DEFAULT_BRANCH_TTL_SECONDS.
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            
+        Returns:
+            Default branch name or None if the repository was not found
+        """
+        key = _repo_key(owner, repo)
+        branch: Optional[str] = default_branch_cache().get(key)
+        if branch:
+            return branch
+        info = await self.get_repository_info(owner, repo)
+        if not info:
+            return None
+        branch = str(info["default_branch"])
+        default_branch_cache().set(key, branch)
+        return branch
+    
+    async def get_head_sha(self, owner: str, repo: str, branch: Optional[str] = None) -> Optional[str]:
+        """
+        Resolve the commit SHA at the head of a branch with a single get_branch call.
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            branch: Branch name (defaults to the repository's default branch)
+        
+        Returns:
+            Commit SHA or None if the repository or branch was not found
+        """
+        try:
+            if not branch:
+                branch = await self.get_default_branch(owner, repo)
+                if not branch:
+                    return None
+            branch_data = (await _bounded(gh().rest.repos.async_get_branch(owner=owner, repo=repo, branch=branch))).parsed_data
+            return branch_data.commit.sha
+        except Exception as e:
+            print(f"Error resolving head commit for {owner}/{repo}: {str(e)}")
+            return None
         
     async def get_repository_files(self, owner: str, repo: str, branch: Optional[str] = None) -> List[RepositoryFileInfo]:
         """
         Get a list of all files in a repository using the Git Tree API.
         
+        Prefer get_file_tree for large repositories; this builds one
+        RepositoryFileInfo object per entry.
+        
         Args:
             owner: Repository owner/organization
             repo: Repository name
-            branch: Branch name (defaults to the repository's default branch)
-            
+            branch: Branch name or commit SHA (defaults to the repository's default branch)
+        
         Returns:
             List of RepositoryFileInfo objects representing files in the repository
         """
+        tree = await self.get_file_tree(owner, repo, branch) or FileTree()
+        return [RepositoryFileInfo(path=path, type=entry_type, size=size) for path, entry_type, size in tree.entries()]
+    
+    async def get_file_tree(self, owner: str, repo: str, branch: Optional[str] = None) -> Optional[FileTree]:
+        """
+        Get all files in a repository as a compact FileTree using the Git Tree API.
+        
+        In mirror fetch mode the tree is listed from the local mirror instead,
+        which has no entry limit; sizes are not available there.
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            branch: Branch name or commit SHA (defaults to the repository's default branch)
+            
+        Returns:
+            FileTree of the repository, or None if it could not be fetched
+        """
         try:
             print(f"Fetching file list for {owner}/{repo}...")
             client = gh()
             
             if not branch:
-                repo_info = client.rest.repos.get(owner=owner, repo=repo).parsed_data
-                branch = repo_info.default_branch
+                branch = await self.get_default_branch(owner, repo)
+                if not branch:
+                    raise RuntimeError("Repository not found")
                 
-            branch_data = client.rest.repos.get_branch(owner=owner, repo=repo, branch=branch).parsed_data
-            commit_sha = branch_data.commit.sha
+            if GITHUB_FETCH_MODE == "mirror":
+                try:
+                    commit_sha = branch if is_commit_sha(branch) else await self.get_head_sha(owner, repo, branch)
+                    if not commit_sha:
+                        raise RuntimeError("Repository not found")
+                    entries = await git_mirror().list_tree(owner, repo, commit_sha)
+                    files = FileTree.from_entries((path, entry_type, None) for path, entry_type in entries)
+                    print(f"Found {len(files)} files in repository mirror")
+                    return files
+                except GitMirrorError as e:
+                    print(f"Mirror unavailable for {owner}/{repo}, using the Trees API: {str(e)}")
             
-            tree_response = client.rest.git.get_tree(
+            # The Trees API resolves a branch name or commit SHA directly, so there
+            # is no need for a separate get_branch round trip here. The raw JSON
+            # is read instead of parsed_data to skip building a pydantic model
+            # per tree entry.
+            tree_response = (await _bounded(client.rest.git.async_get_tree(
                 owner=owner,
                 repo=repo,
-                tree_sha=commit_sha,
+                tree_sha=branch,
                 recursive="1"  # Get all files recursively
-            ).parsed_data
+            ))).json()
+            
+            if tree_response.get("truncated") is True:
+                print(f"Warning: tree for {owner}/{repo} was truncated by the GitHub API; use GITHUB_FETCH_MODE=mirror for the full listing")
             
-            files = []
-            for item in tree_response.tree:
+            files = FileTree()
+            for item in tree_response.get("tree", []):
                 # Handle size field that might contain '<UNSET>' strings
-                size_value = _safe_int_conversion(
-                    getattr(item, "size", None), 
-                    default=None
-                ) if hasattr(item, "size") else None
-                
-                files.append(
-                    RepositoryFileInfo(
-                        path=item.path,
-                        type=item.type,
-                        size=size_value
-                    )
-                )
+                size_value = _safe_int_conversion(item.get("size"), default=None)
+                files.append(item["path"], item["type"], size_value)
             
             print(f"Found {len(files)} files in repository")
             return files
         except Exception as e:
             error_message = str(e)
             print(f"Error fetching repository files for {owner}/{repo}: {error_message}")
-            return []
+            return None
             
     async def get_file_content(self, owner: str, repo: str, path: str, ref: Optional[str] = None) -> Optional[str]:
         """
         Get the content of a specific file in a repository.
         
+        In archive fetch mode the file is served from the commit tarball when
+        it was extracted, and read through the contents API otherwise. In
+        mirror fetch mode it is read from the local mirror.
+        
         Args:
             owner: Repository owner/organization
             repo: Repository name
@@ -180,64 +457,273 @@ class GitHubService:
         Returns:
             File content as a string or None if not found
         """
+        if GITHUB_FETCH_MODE == "mirror":
+            mirror_files = await self._get_files_from_mirror(owner, repo, [path], ref)
+            if mirror_files is not None:
+                return mirror_files.get(path)
+        if GITHUB_FETCH_MODE == "archive" and ref:
+            archive = await self._get_archive_files(owner, repo, ref)
+            if archive and path in archive[0]:
+                return archive[0][path]
+        return await self._get_file_content_from_api(owner, repo, path, ref)
+    
+    async def get_files_content(self, owner: str, repo: str, paths: List[str], ref: Optional[str] = None) -> Dict[str, str]:
+        """
+        Get the contents of several files at once.
+        
+        In archive fetch mode the files come from a single tarball download for
+        ``ref``; anything not extracted from it (too large, not a known
+        configuration file) falls back to the contents API. In mirror fetch
+        mode they are read from the local mirror with one git process. In API
+        mode all files are fetched concurrently.
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            paths: Paths of the files to read
+            ref: Branch, tag, or commit SHA (defaults to the default branch)
+        
+        Returns:
+            Dictionary mapping paths to contents for the files that were found
+        """
+        results, _ = await self._get_files_content(owner, repo, paths, ref)
+        return results
+    
+    async def _get_files_content(self, owner: str, repo: str, paths: List[str], ref: Optional[str] = None) -> Tuple[Dict[str, str], bool]:
+        """Like get_files_content, also returning whether every file was either read or found not to exist."""
+        if GITHUB_FETCH_MODE == "mirror":
+            mirror_files = await self._get_files_from_mirror(owner, repo, paths, ref)
+            if mirror_files is not None:
+                return mirror_files, True
+        
+        results: Dict[str, str] = {}
+        missing = list(paths)
+        if GITHUB_FETCH_MODE == "archive" and ref:
+            archive = await self._get_archive_files(owner, repo, ref)
+            if archive is not None:
+                # Candidate files absent from the archive do not exist unless
+                # they were skipped for the byte caps; those and non-candidate
+                # paths go to the API.
+                archive_files, skipped = archive
+                results = {path: archive_files[path] for path in paths if path in archive_files}
+                missing = [
+                    path for path in paths
+                    if path not in archive_files and (path in skipped or not is_candidate_path(path))
+                ]
+        
+        contents = await asyncio.gather(
+            *(self._read_file_from_api(owner, repo, path, ref) for path in missing),
+            return_exceptions=True,
+        )
+        complete = True
+        for path, content in zip(missing, contents):
+            if isinstance(content, BaseException):
+                print(f"Error reading {path} from {owner}/{repo}: {str(content)}")
+                complete = False
+            elif content is not None:
+                results[path] = content
+        return results, complete
+    
+    async def _get_files_from_mirror(self, owner: str, repo: str, paths: List[str], ref: Optional[str]) -> Optional[Dict[str, str]]:
+        """Read files from the local mirror, or return None if the mirror cannot be used."""
         try:
-            content_response = gh().rest.repos.get_content(
-                owner=owner,
-                repo=repo,
-                path=path,
-                ref=ref
-            ).parsed_data
-            
-            if hasattr(content_response, "content") and hasattr(content_response, "encoding"):
-                if content_response.encoding == "base64":
-                    return base64.b64decode(content_response.content).decode("utf-8")
+            commit_sha = ref if is_commit_sha(ref) else await self.get_head_sha(owner, repo, ref)
+            if not commit_sha:
+                return None
+            return await git_mirror().read_files(owner, repo, commit_sha, list(paths))
+        except GitMirrorError as e:
+            print(f"Mirror unavailable for {owner}/{repo}, using the contents API: {str(e)}")
+            return None
+    
+    async def _get_archive_files(self, owner: str, repo: str, ref: str) -> Optional[Tuple[Dict[str, str], Set[str]]]:
+        """
+        Return the configuration files extracted from the tarball of ``ref``.
+        
+        The archive is downloaded at most once per commit; the extracted files
+        and the paths skipped for the byte caps are kept in the snapshot
+        cache. Returns None if the download fails, so callers fall back to
+        the contents API.
+        """
+        cache_key = ("archive",) + _repo_key(owner, repo) + (ref,)
+        cached: Optional[Tuple[Dict[str, str], Set[str]]] = snapshot_cache().get(cache_key)
+        if cached is not None:
+            return cached
+        
+        task = _archive_downloads.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._download_archive_files(owner, repo, ref))
+            _archive_downloads[cache_key] = task
+            task.add_done_callback(lambda _: _archive_downloads.pop(cache_key, None))
+        try:
+            archive = await asyncio.shield(task)
+        except Exception as e:
+            print(f"Error downloading archive for {owner}/{repo}@{ref}: {str(e)}")
             return None
+        snapshot_cache().set(cache_key, archive)
+        return archive
+    
+    async def _download_archive_files(self, owner: str, repo: str, ref: str) -> Tuple[Dict[str, str], Set[str]]:
+        print(f"Downloading archive for {owner}/{repo}@{ref[:7]}...")
+        headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"} if GITHUB_TOKEN else None
+        # The tarball endpoint redirects to codeload; httpx drops the
+        # Authorization header on the cross-origin hop.
+        async with httpx.AsyncClient(
+            transport=github_transport(),
+            follow_redirects=True,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        ) as client:
+            files, skipped = await _bounded(fetch_archive_files(
+                client,
+                f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{ref}",
+                wanted=is_candidate_path,
+                max_file_bytes=ARCHIVE_MAX_FILE_BYTES,
+                max_total_bytes=ARCHIVE_MAX_TOTAL_BYTES,
+                max_download_bytes=ARCHIVE_MAX_DOWNLOAD_BYTES,
+                headers=headers,
+            ))
+        print(f"Extracted {len(files)} files from archive for {owner}/{repo}, {len(skipped)} left to the contents API")
+        return files, skipped
+    
+    async def _get_file_content_from_api(self, owner: str, repo: str, path: str, ref: Optional[str] = None) -> Optional[str]:
+        """Read a single file through the contents API, or return None if it cannot be read."""
+        try:
+            return await self._read_file_from_api(owner, repo, path, ref)
         except Exception:
             return None
-            
-    async def get_repository_snapshot(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+    
+    async def _read_file_from_api(self, owner: str, repo: str, path: str, ref: Optional[str] = None) -> Optional[str]:
+        """Read a single file through the contents API. Returns None if it does not exist or is not a text file; other failures raise."""
+        kwargs: Dict[str, Any] = {"owner": owner, "repo": repo, "path": path}
+        if ref:
+            kwargs["ref"] = ref
+        try:
+            content_response = (await _bounded(gh().rest.repos.async_get_content(**kwargs))).parsed_data
+        except Exception as e:
+            if _is_not_found(e):
+                return None
+            raise
+        
+        if hasattr(content_response, "content") and hasattr(content_response, "encoding"):
+            if content_response.encoding == "base64":
+                try:
+                    return base64.b64decode(content_response.content).decode("utf-8")
+                except UnicodeDecodeError:
+                    return None
+        return None
+    
+    async def _get_primary_language(self, owner: str, repo: str) -> Optional[str]:
+        """Return the language with the most bytes in the repository, "Unknown" if there is none, or None if the lookup failed."""
+        try:
+            languages_response = (await _bounded(gh().rest.repos.async_list_languages(owner=owner, repo=repo))).parsed_data
+            languages_dict = dict(languages_response)
+            if languages_dict:
+                primary_language = max(languages_dict.items(), key=lambda x: x[1])[0]
+                print(f"Primary language detected: {primary_language}")
+                return primary_language
+            print("No language information available")
+        except Exception as e:
+            print(f"Error fetching languages: {str(e)}")
+            return None
+        return "Unknown"
+    
+    async def get_repository_snapshot(self, owner: str, repo: str, commit_sha: Optional[str] = None) -> Dict[str, Any]:
         """
         Get comprehensive repository information from GitHub API.
         
+        The snapshot is keyed by the head commit SHA and served from an
+        in-process LRU cache while the branch has not moved. On a miss,
+        metadata, README, languages and the file tree are fetched concurrently.
+        
         Args:
             owner: Repository owner/organization
             repo: Repository name
+            commit_sha: Head commit SHA if already resolved by the caller
             
         Returns:
-            Repository information as a dictionary or None if not found
+            Repository information as a dictionary
+        
+        Raises:
+            RepositoryNotFoundError: GitHub reports the repository as missing
+            RuntimeError: The repository metadata could not be fetched
+        """
+        snapshot: Dict[str, Any] = {}
+        async for snapshot in self.iter_repository_snapshot(owner, repo, commit_sha=commit_sha):
+            pass
+        return snapshot
+    
+    async def iter_repository_snapshot(self, owner: str, repo: str, commit_sha: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Yield repository metadata as soon as it is available, then the full snapshot.
+        
+        The first item has every snapshot key except "files"; the second is the
+        complete snapshot including the FileTree. The file tree is fetched
+        concurrently with the metadata, so callers can start sending the
+        metadata while a large tree is still being downloaded.
+        
+        A snapshot is only cached when every part of it was fetched: if the
+        file tree, README or languages lookup failed, the snapshot is served
+        with what was available (an empty tree, no README, "Unknown") and the
+        next request for the commit fetches it again. The full snapshot's
+        "complete" key tells callers which case they got, so results derived
+        from it are not cached either.
+        
+        Args:
+            owner: Repository owner/organization
+            repo: Repository name
+            commit_sha: Head commit SHA if already resolved by the caller
         """
+        commit_sha = commit_sha or await self.get_head_sha(owner, repo)
+        cache_key = ("snapshot",) + _repo_key(owner, repo) + (commit_sha,) if commit_sha else None
+        if commit_sha:
+            cached = snapshot_cache().get(cache_key)
+            if cached is not None:
+                print(f"Repository snapshot cache hit for {owner}/{repo}@{commit_sha[:7]}")
+                yield {key: value for key, value in cached.items() if key != "files"}
+                yield dict(cached)
+                return
+        
+        print(f"Fetching repository data for {owner}/{repo}...")
+        files_task = asyncio.create_task(self.get_file_tree(owner, repo, branch=commit_sha))
+        try:
+            metadata, complete = await self._get_snapshot_metadata(owner, repo, commit_sha)
+            yield dict(metadata)
+            files = await files_task
+            complete = complete and files is not None
+            snapshot = dict(metadata, files=files if files is not None else FileTree(), complete=complete)
+        finally:
+            if not files_task.done():
+                files_task.cancel()
+        
+        if cache_key and complete:
+            snapshot_cache().set(cache_key, snapshot)
+        elif commit_sha:
+            print(f"Not caching incomplete snapshot of {owner}/{repo}@{commit_sha[:7]}")
+        yield dict(snapshot)
+    
+    async def _get_snapshot_metadata(self, owner: str, repo: str, commit_sha: Optional[str]) -> Tuple[Dict[str, Any], bool]:
+        """Fetch everything in a snapshot except the file tree, and whether the README and languages lookups succeeded."""
         try:
-            print(f"Fetching repository data for {owner}/{repo}...")
-            
             token_preview = GITHUB_TOKEN[:5] if GITHUB_TOKEN else "None"
             print(f"Creating GitHub client with token: {token_preview}...")
             client = gh()
             
-            meta = client.rest.repos.get(owner=owner, repo=repo).parsed_data
+            meta_response, readme, primary_language = await asyncio.gather(
+                _bounded(client.rest.repos.async_get(owner=owner, repo=repo)),
+                self._read_readme(owner, repo, ref=commit_sha),
+                self._get_primary_language(owner, repo),
+                return_exceptions=True,
+            )
+            if isinstance(meta_response, BaseException):
+                if _is_not_found(meta_response):
+                    raise RepositoryNotFoundError(f"Repository {owner}/{repo} not found")
+                raise meta_response
+            complete = not isinstance(readme, BaseException) and primary_language is not None
+            if isinstance(readme, BaseException):
+                print(f"Error fetching README for {owner}/{repo}: {str(readme)}")
+                readme = None
+            meta = meta_response.parsed_data
             print(f"Repository metadata fetched successfully")
-            
-            readme = ""
-            try:
-                readme_response = client.rest.repos.get_readme(owner=owner, repo=repo).parsed_data
-                readme = base64.b64decode(readme_response.content).decode()
-                print(f"README content fetched successfully")
-            except Exception as e:
-                print(f"Error fetching README: {str(e)}")
-                readme = ""
-            
-            primary_language = "Unknown"
-            try:
-                languages_response = client.rest.repos.list_languages(owner=owner, repo=repo).parsed_data
-                languages_dict = dict(languages_response)
-                if languages_dict:
-                    primary_language = max(languages_dict.items(), key=lambda x: x[1])[0]
-                    print(f"Primary language detected: {primary_language}")
-                else:
-                    print("No language information available")
-            except Exception as e:
-                print(f"Error fetching languages: {str(e)}")
-            
-            files = await self.get_repository_files(owner, repo)
+            print(f"README content fetched: {readme is not None}")
             
             # Handle stargazers_count that might contain '<UNSET>' strings
             stars_count = _safe_int_conversion(
@@ -249,11 +735,13 @@ class GitHubService:
                 "full_name": meta.full_name,
                 "description": meta.description or "No description available",
                 "stars": stars_count,
-                "language": primary_language,
+                "language": primary_language or "Unknown",
                 "default_branch": meta.default_branch,
-                "readme": readme,
-                "files": files
-            }
+                "commit_sha": commit_sha,
+                "readme": readme or "",
+            }, complete
+        except RepositoryNotFoundError:
+            raise
         except Exception as e:
             error_message = str(e)
             print(f"Error in get_repository_snapshot for {owner}/{repo}: {error_message}")
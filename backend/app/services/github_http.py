@@ -0,0 +1,161 @@
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .cache import LRUCache
+
+# GET endpoints whose responses are revalidated with If-None-Match /
+# If-Modified-Since: repos.get, get_readme, get_content, list_languages and
+# get_branch. The optional prefix covers GitHub Enterprise's /api/v3.
+_CACHEABLE_PATH = re.compile(
+    r"/repos/[^/]+/[^/]+(?:/readme(?:/.*)?|/contents(?:/.*)?|/languages|/branches/.+)?$"
+)
+
+# Branch lookups resolve the head commit that snapshot and analysis cache keys
+# are built from, so they are revalidated even while max-age says fresh;
+# otherwise a push would go unnoticed for up to a minute.
+_ALWAYS_REVALIDATE_PATH = re.compile(r"/repos/[^/]+/[^/]+/branches/.+$")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class _CachedResponse:
+    status_code: int
+    headers: httpx.Headers
+    body: bytes
+    stored_at: float
+    max_age: float
+
+    def estimated_size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.raw) + 200
+
+
+def _max_age(headers: httpx.Headers) -> float:
+    match = _MAX_AGE.search(headers.get("cache-control", ""))
+    return float(match.group(1)) if match else 0.0
+
+
+class ConditionalRequestTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that revalidates selected GitHub REST calls with ETags.
+
+    The first response for a cacheable URL is stored together with its ETag
+    and Last-Modified headers. Later requests are served straight from the
+    store while the response is still fresh per ``Cache-Control: max-age``
+    (except branch lookups, which always revalidate), and otherwise sent
+    with ``If-None-Match``/``If-Modified-Since``. GitHub
+    answers unchanged resources with ``304 Not Modified``, which does not
+    count against the rate limit, and the stored body is replayed.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_bytes: int, honor_max_age: bool = True) -> None:
+        self._transport = transport
+        self._store: LRUCache = LRUCache(max_bytes)
+        self._honor_max_age = honor_max_age
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or not _CACHEABLE_PATH.search(request.url.path):
+            return await self._transport.handle_async_request(request)
+
+        key = self._cache_key(request)
+        entry: Optional[_CachedResponse] = self._store.get(key)
+
+        if entry is not None:
+            if (
+                self._honor_max_age
+                and time.monotonic() - entry.stored_at < entry.max_age
+                and not _ALWAYS_REVALIDATE_PATH.search(request.url.path)
+            ):
+                self.hits += 1
+                return self._replay(request, entry, entry.headers)
+            if "etag" in entry.headers:
+                request.headers["If-None-Match"] = entry.headers["etag"]
+            if "last-modified" in entry.headers:
+                request.headers["If-Modified-Since"] = entry.headers["last-modified"]
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.not_modified += 1
+            # Keep the stored representation but take the fresh rate-limit and
+            # caching headers from the 304.
+            headers = httpx.Headers(entry.headers)
+            for name, value in response.headers.items():
+                if name.startswith("x-ratelimit-") or name in ("cache-control", "date", "etag", "last-modified"):
+                    headers[name] = value
+            entry.headers = headers
+            entry.stored_at = time.monotonic()
+            entry.max_age = _max_age(headers)
+            return self._replay(request, entry, headers)
+
+        self.misses += 1
+        if response.status_code != 200 or not (
+            "etag" in response.headers or "last-modified" in response.headers
+        ):
+            return response
+
+        # Read the raw (still content-encoded) body so it can be replayed
+        # byte-for-byte; the client decodes it as usual.
+        try:
+            body = b"".join([chunk async for chunk in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        self._store.set(
+            key,
+            _CachedResponse(
+                status_code=response.status_code,
+                headers=response.headers,
+                body=body,
+                stored_at=time.monotonic(),
+                max_age=_max_age(response.headers),
+            ),
+        )
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/304 counts and the number of requests that did not use rate-limit quota."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "quota_saved": self.hits + self.not_modified,
+            "store": self._store.stats(),
+        }
+
+    @staticmethod
+    def _cache_key(request: httpx.Request) -> Tuple[str, str, str]:
+        # Different tokens can see different content, so the credential is part
+        # of the key (hashed, never stored).
+        auth = request.headers.get("authorization", "")
+        return (
+            str(request.url),
+            request.headers.get("accept", ""),
+            hashlib.sha256(auth.encode()).hexdigest() if auth else "",
+        )
+
+    @staticmethod
+    def _replay(request: httpx.Request, entry: _CachedResponse, headers: httpx.Headers) -> httpx.Response:
+        return httpx.Response(
+            status_code=entry.status_code,
+            headers=headers,
+            content=entry.body,
+            request=request,
+        )
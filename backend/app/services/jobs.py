@@ -0,0 +1,218 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache, partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from ..config import JOB_MAX_QUEUE, JOB_MAX_WORKERS, JOB_RETENTION_SECONDS, JOB_HISTORY_MAX
+from ..metrics import latency_metrics
+from .single_flight import Flight
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its configured depth."""
+
+
+class Job:
+    """
+    One unit of background work and its lifecycle.
+
+    Status moves from "queued" (waiting for a worker) to "running" and then
+    to "completed", "failed" or "cancelled". The job's ``flight`` carries its
+    progress events to any number of subscribers.
+    """
+
+    def __init__(self, key: str, kind: str, params: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.flight = Flight(key)
+        # True once the manager itself holds the flight, so the job keeps
+        # running after every subscriber has gone.
+        self.held = False
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def queue_wait_seconds(self) -> Optional[float]:
+        if self.started_at is not None:
+            return self.started_at - self.created_at
+        if self.done:
+            return None
+        return time.time() - self.created_at
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded pool of workers.
+
+    At most ``max_workers`` jobs run at once; further jobs wait in FIFO order
+    for a free worker, and once ``max_queue`` jobs are waiting new submissions
+    are rejected with JobQueueFull instead of piling up. Submitting a job
+    whose key matches a queued or running job returns that job, so identical
+    concurrent requests share one run.
+
+    Finished jobs stay queryable for ``retention_seconds`` (and at most
+    ``history_max`` of them are kept).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        max_queue: int = JOB_MAX_QUEUE,
+        retention_seconds: float = JOB_RETENTION_SECONDS,
+        history_max: int = JOB_HISTORY_MAX,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self.history_max = history_max
+        self._workers = asyncio.Semaphore(max_workers)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._queued = 0
+        self._running = 0
+
+    def submit(
+        self,
+        key: str,
+        kind: str,
+        params: Dict[str, Any],
+        run: Callable[[Flight], Awaitable[Any]],
+        background: bool = False,
+    ) -> Tuple[Job, bool]:
+        """
+        Queue ``run(flight)`` as a job, or return the active job with the same key.
+
+        The second value is True when an existing job was joined. A job is
+        cancelled once nobody holds its flight any more; with ``background``
+        the job holds itself until it finishes, so it runs to completion
+        whether or not anyone is watching.
+        """
+        self._prune()
+        job = self._active.get(key)
+        # A job cancelled by its last holder is forgotten only once the
+        # cancellation has run, so it must not be joined in the meantime
+        if job is not None and not job.flight.abandoned:
+            if background:
+                self._hold(job)
+            latency_metrics().increment("jobs.joined")
+            return job, True
+        if self._queued >= self.max_queue:
+            latency_metrics().increment("jobs.rejected")
+            raise JobQueueFull(f"Job queue is full ({self._queued} jobs waiting)")
+
+        job = Job(key, kind, params)
+        self._queued += 1
+        job.flight.task = asyncio.create_task(self._execute(job, run))
+        job.flight.task.add_done_callback(partial(self._finish, job))
+        job.flight.task.add_done_callback(job.flight._finish)
+        if background:
+            self._hold(job)
+        self._jobs[job.id] = job
+        self._active[key] = job
+        latency_metrics().increment("jobs.submitted")
+        job.flight.publish({"type": "job", "job_id": job.id, "status": "queued", "queued_jobs": self._queued})
+        return job, False
+
+    def record(self, key: str, kind: str, params: Dict[str, Any], result: Any, events: Iterable[Any] = ()) -> Job:
+        """
+        Register a job that is already finished, e.g. one answered from a cache.
+
+        It needs no worker; ``events`` are kept as its progress history so
+        subscribers see the same event sequence as for a job that ran.
+        """
+        self._prune()
+        job = Job(key, kind, params)
+        for event in events:
+            job.flight.publish(event)
+        job.flight.task = asyncio.get_running_loop().create_future()
+        job.flight.task.set_result(result)
+        job.status = "completed"
+        job.result = result
+        job.started_at = job.finished_at = job.created_at
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": self._queued,
+            "tracked_jobs": len(self._jobs),
+        }
+
+    async def _execute(self, job: Job, run: Callable[[Flight], Awaitable[Any]]) -> Any:
+        async with self._workers:
+            self._queued -= 1
+            self._running += 1
+            try:
+                job.started_at = time.time()
+                job.status = "running"
+                queue_wait = job.started_at - job.created_at
+                latency_metrics().observe("jobs.queue_wait", queue_wait)
+                job.flight.publish({"type": "job", "job_id": job.id, "status": "running", "queue_wait_seconds": round(queue_wait, 3)})
+                return await run(job.flight)
+            finally:
+                self._running -= 1
+
+    def _finish(self, job: Job, task: "asyncio.Task[Any]") -> None:
+        # Runs even if the job was cancelled before it reached a worker
+        if job.started_at is None:
+            self._queued -= 1
+        job.finished_at = time.time()
+        if task.cancelled():
+            job.status = "cancelled"
+            latency_metrics().increment("jobs.cancelled")
+        elif task.exception() is not None:
+            job.status = "failed"
+            job.error = str(task.exception())
+            latency_metrics().increment("jobs.failed")
+        else:
+            job.status = "completed"
+            job.result = task.result()
+        if self._active.get(job.key) is job:
+            del self._active[job.key]
+
+    def _hold(self, job: Job) -> None:
+        if job.held:
+            return
+        job.held = True
+        job.flight.attach()
+        job.flight.task.add_done_callback(lambda _: job.flight.detach())
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = len(finished) - self.history_max
+        for job in finished:
+            if excess > 0 or (job.finished_at is not None and job.finished_at < cutoff):
+                del self._jobs[job.id]
+                excess -= 1
+
+
+@lru_cache
+def analysis_jobs() -> JobManager:
+    """Process-wide job manager for repository analyses."""
+    return JobManager()
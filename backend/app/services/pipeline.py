@@ -0,0 +1,87 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Sequence, Tuple
+
+from ..models.schemas import AnalysisProgressUpdate
+
+ProgressCallback = Callable[[AnalysisProgressUpdate], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One unit of work in a pipeline.
+
+    ``run`` receives the results of the stages listed in ``depends_on``,
+    keyed by stage name, and returns this stage's result.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Coroutine[Any, Any, Any]]
+    depends_on: Tuple[str, ...] = ()
+
+
+async def run_stages(stages: Sequence[Stage]) -> Dict[str, Any]:
+    """
+    Run stages as a dependency graph.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. If a stage raises, or the caller is
+    cancelled, the stages still running are cancelled and awaited before the
+    exception propagates; stages that should degrade gracefully must handle
+    their own errors.
+
+    Args:
+        stages: Stages to run; names must be unique
+
+    Returns:
+        Dictionary mapping each stage name to its result
+    """
+    names = {stage.name for stage in stages}
+    if len(names) != len(stages):
+        raise ValueError("Stage names must be unique")
+    for stage in stages:
+        unknown = set(stage.depends_on) - names
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(sorted(unknown))}")
+
+    results: Dict[str, Any] = {}
+    pending = list(stages)
+    running: Dict["asyncio.Task[Any]", str] = {}
+    try:
+        while pending or running:
+            for stage in [s for s in pending if all(d in results for d in s.depends_on)]:
+                pending.remove(stage)
+                inputs = {name: results[name] for name in stage.depends_on}
+                running[asyncio.create_task(stage.run(inputs))] = stage.name
+            if not running:
+                raise ValueError(f"Stage dependency cycle among: {', '.join(s.name for s in pending)}")
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[running.pop(task)] = task.result()
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    return results
+
+
+def monotonic_progress(callback: Optional[ProgressCallback]) -> Optional[ProgressCallback]:
+    """
+    Wrap a progress callback so the overall percentage never goes backwards.
+
+    Concurrent stages report their own fixed percentages; interleaved, a
+    later update from an earlier step would otherwise move the progress bar
+    back.
+    """
+    if callback is None:
+        return None
+    highest = 0
+
+    async def report(update: AnalysisProgressUpdate) -> None:
+        nonlocal highest
+        highest = max(highest, update.progress_percentage)
+        await callback(update.model_copy(update={"progress_percentage": highest}))
+
+    return report
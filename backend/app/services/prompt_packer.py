@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..metrics import latency_metrics
+from .config_scorer import name_weight
+from .readme_compactor import compact_readme, split_sections
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts are estimated without it
+    tiktoken = None  # type: ignore[assignment]
+
+# Packing priorities, lowest first: the parts of a prompt that explain how to
+# set up a repository are kept whole before anything else gets budget.
+PRIORITY_README_KEY = 0
+PRIORITY_MANIFEST = 1
+PRIORITY_CONFIG = 2
+PRIORITY_TREE = 3
+PRIORITY_README_OTHER = 4
+PRIORITY_FILE_LIST = 5
+
+# Without tiktoken a token is taken to be this many characters, which is
+# close for English prose and code under the GPT-4o tokenizer.
+_CHARS_PER_TOKEN = 4
+
+# A part that would be cut below this many tokens is dropped instead.
+_MIN_PART_TOKENS = 64
+
+# Configuration file names weighted at least this much by the scorer are
+# dependency manifests (package.json, pyproject.toml, go.mod, ...).
+_MANIFEST_WEIGHT = 8
+
+_TRUNCATED = "\n... [truncated]"
+
+
+@lru_cache
+def _encoding() -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding is downloaded on first use, which fails offline
+        print(f"[PROMPT] Warning: Could not load the o200k_base encoding, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text``, estimated from its length when tiktoken is unavailable."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of ``text`` within ``max_tokens``, cut at a line break where one is near."""
+    encoding = _encoding()
+    if encoding is None:
+        prefix = text[:max_tokens * _CHARS_PER_TOKEN]
+    else:
+        prefix = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    if len(prefix) == len(text):
+        return text
+    line_end = prefix.rfind("\n")
+    return prefix[:line_end] if line_end > len(prefix) // 2 else prefix
+
+
+@dataclass
+class PromptPart:
+    """
+    One block of a prompt, rendered as ``title`` followed by ``body`` in a code fence.
+
+    Parts with a lower ``priority`` get budget first; ``max_tokens`` caps a
+    single part so one huge file cannot take the whole budget.
+    """
+
+    title: str
+    body: str
+    priority: int
+    max_tokens: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PackedPrompt:
+    text: str
+    tokens: int
+    budget: int
+    included: List[str]
+    truncated: List[str]
+    dropped: List[str]
+
+
+def pack_prompt(step: str, header: str, parts: Sequence[PromptPart], footer: str, budget: int) -> PackedPrompt:
+    """
+    Fill a token budget with prompt parts in priority order.
+
+    ``header`` and ``footer`` are always included. Parts are then taken by
+    priority (input order breaks ties); one that does not fit is cut to the
+    tokens left, or dropped when fewer than a useful minimum remain. The
+    parts kept are rendered in input order, so the prompt reads the same
+    way whatever got cut.
+
+    Packed tokens are counted per step in the "prompt_tokens.<step>"
+    counter, with "prompt_parts_truncated.<step>" and
+    "prompt_parts_dropped.<step>" alongside. A line is only printed when
+    parts were truncated or dropped.
+    """
+    remaining = budget - count_tokens(header) - count_tokens(footer)
+    bodies: Dict[int, str] = {}
+    truncated: List[str] = []
+    dropped: List[str] = []
+    for index in sorted(range(len(parts)), key=lambda i: (parts[i].priority, i)):
+        part = parts[index]
+        overhead = count_tokens(_render(part.title, ""))
+        available = remaining - overhead
+        if part.max_tokens is not None:
+            available = min(available, part.max_tokens)
+        body = part.body
+        tokens = count_tokens(body)
+        if tokens > available:
+            if available < _MIN_PART_TOKENS:
+                dropped.append(part.title)
+                continue
+            body = truncate_to_tokens(body, available - count_tokens(_TRUNCATED)) + _TRUNCATED
+            tokens = count_tokens(body)
+            truncated.append(part.title)
+        bodies[index] = body
+        remaining -= overhead + tokens
+
+    text = header + "".join(_render(parts[index].title, bodies[index]) for index in sorted(bodies)) + footer
+    packed = PackedPrompt(
+        text=text,
+        tokens=budget - remaining,
+        budget=budget,
+        included=[parts[index].title for index in sorted(bodies)],
+        truncated=truncated,
+        dropped=dropped,
+    )
+    metrics = latency_metrics()
+    metrics.increment(f"prompt_tokens.{step}", packed.tokens)
+    if truncated:
+        metrics.increment(f"prompt_parts_truncated.{step}", len(truncated))
+    if dropped:
+        metrics.increment(f"prompt_parts_dropped.{step}", len(dropped))
+    if truncated or dropped:
+        print(f"[PROMPT] Packed {packed.tokens}/{budget} tokens for {step}: {len(bodies)} parts" + (f", {len(truncated)} truncated" if truncated else "") + (f", {len(dropped)} dropped" if dropped else ""))
+    return packed
+
+
+def _render(title: str, body: str) -> str:
+    return f"{title}:\n```\n{body}\n```\n\n"
+
+
+def readme_parts(readme: str, title: str = "README.md") -> List[PromptPart]:
+    """
+    Compact a markdown README and split it into one part per section.
+
+    The introduction and sections about installation, usage, development
+    and testing are packed first; the rest only fill leftover budget.
+    """
+    parts = []
+    for section in split_sections(compact_readme(readme)):
+        body = "\n".join(section.lines).strip()
+        priority = PRIORITY_README_KEY if section.key else PRIORITY_README_OTHER
+        parts.append(PromptPart(f"{title} ({section.heading})" if section.heading else title, body, priority))
+    return parts
+
+
+def file_parts(file_contents: Dict[str, str], max_tokens: Optional[int] = None) -> List[PromptPart]:
+    """One part per file: READMEs split by section, then dependency manifests, then other configuration."""
+    parts: List[PromptPart] = []
+    for path, content in file_contents.items():
+        name = path.rsplit("/", 1)[-1]
+        if name.lower().startswith("readme"):
+            parts.extend(readme_parts(content, path))
+            continue
+        priority = PRIORITY_MANIFEST if (name_weight(name) or 0) >= _MANIFEST_WEIGHT else PRIORITY_CONFIG
+        parts.append(PromptPart(path, content, priority, max_tokens))
+    return parts
@@ -0,0 +1,172 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+from ..config import README_CACHE_MAX_BYTES
+from ..metrics import latency_metrics
+from .cache import LRUCache
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```+|~~~+)")
+
+# Sections about getting the project running come first in a compacted README.
+_KEY_SECTION = re.compile(r"\b(install|setup|set up|getting started|quick ?start|usage|develop|build|test|requirement|prerequisite|running|configur|contribut)", re.IGNORECASE)
+
+# Sections that never help to set up a repository are dropped with their subsections.
+_DROPPED_SECTION = re.compile(r"\b(change ?log|release notes|what'?s new|history|licen[cs]e|contributors|authors|acknowledg|credits|sponsor|backers|supporters|star history|citation|cite|code of conduct|table of contents|^contents$|^toc$)", re.IGNORECASE)
+
+_HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+_HTML_BLOCK = re.compile(r"<(picture|svg|video)\b.*?</\1>", re.DOTALL | re.IGNORECASE)
+_HTML_TAG = re.compile(r"</?[A-Za-z][^>]*>")
+_BADGE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)|\[!\[[^\]]*\]\[[^\]]*\]\]\[[^\]]*\]")
+_IMAGE = re.compile(r"!\[[^\]]*\](\([^)]*\)|\[[^\]]*\])")
+_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_ANCHOR_ITEM = re.compile(r"^\s*(?:[-*+]|\d+\.)\s+\[[^\]]+\]\(#[^)]*\)\s*$")
+_REFERENCE_DEFINITION = re.compile(r"^\s{0,3}\[[^\]]+\]:\s+\S+")
+_RULE = re.compile(r"^\s{0,3}([-*_])(\s*\1){2,}\s*$")
+_TABLE_ROW = re.compile(r"^\s*\|")
+
+# Longer tables (feature matrices, benchmark results) are cut to this many rows.
+_MAX_TABLE_ROWS = 8
+
+
+@dataclass
+class ReadmeSection:
+    """A markdown section: its heading (empty for the text before the first one), level and lines."""
+
+    heading: str
+    level: int
+    lines: List[str]
+    key: bool = False
+
+
+def split_sections(markdown: str) -> List[ReadmeSection]:
+    """
+    Split markdown at its ATX headings, ignoring ``#`` lines inside code fences.
+
+    A section is marked ``key`` when its heading is about installation,
+    usage, development or testing, or when it is nested under such a
+    heading. The introduction is key as well: the text before the first
+    heading, or the first section when the document opens with a title.
+    """
+    sections = [ReadmeSection("", 0, [], key=True)]
+    fence: Optional[str] = None
+    key_level: Optional[int] = None
+    for line in markdown.splitlines():
+        fence_match = _FENCE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)[0] * 3
+            fence = None if fence == marker else fence or marker
+        heading = None if fence else _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            if key_level is not None and level <= key_level:
+                key_level = None
+            if key_level is None and _KEY_SECTION.search(heading.group(2)):
+                key_level = level
+            opens_document = len(sections) == 1 and not any(line.strip() for line in sections[0].lines)
+            sections.append(ReadmeSection(heading.group(2), level, [], key=key_level is not None or opens_document))
+        sections[-1].lines.append(line)
+    return [section for section in sections if any(line.strip() for line in section.lines)]
+
+
+def compact_readme(readme: str) -> str:
+    """
+    Shrink a README to the text that helps explain and set up the project.
+
+    Badges, images, HTML, comments, link targets, reference definitions,
+    anchor-only tables of contents and horizontal rules are removed; long
+    tables are cut; a code block repeating an earlier one is dropped; and
+    changelog, license, contributor and similar sections go entirely.
+    Installation, usage, development and testing sections are moved right
+    after the introduction.
+
+    Results are cached by the README's git blob SHA, so the same README is
+    compacted once however many analyses, commits or forks include it.
+    """
+    cache_key = _blob_sha(readme)
+    cached: Optional[str] = readme_cache().get(cache_key)
+    if cached is not None:
+        return cached
+    with latency_metrics().time("readme.compact"):
+        compacted = _compact(readme)
+    latency_metrics().increment("readme.bytes_in", len(readme))
+    latency_metrics().increment("readme.bytes_out", len(compacted))
+    readme_cache().set(cache_key, compacted)
+    return compacted
+
+
+@lru_cache
+def readme_cache() -> LRUCache:
+    """Process-wide cache of compacted READMEs keyed by git blob SHA."""
+    return LRUCache(README_CACHE_MAX_BYTES)
+
+
+def _blob_sha(text: str) -> str:
+    # The same SHA git (and the GitHub API) reports for the README blob
+    data = text.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _compact(readme: str) -> str:
+    text = _HTML_COMMENT.sub("", readme.replace("\r\n", "\n"))
+    text = _HTML_BLOCK.sub("", text)
+
+    lines: List[str] = []
+    seen_blocks = set()
+    block: Optional[List[str]] = None
+    fence: Optional[str] = None
+    table_rows = 0
+    for line in text.split("\n"):
+        fence_match = _FENCE.match(line)
+        if block is not None:
+            block.append(line)
+            if fence_match and fence_match.group(1)[0] * 3 == fence:
+                body = "\n".join(block[1:-1]).strip()
+                if body and body not in seen_blocks:
+                    seen_blocks.add(body)
+                    lines.extend(block)
+                block = fence = None
+            continue
+        if fence_match:
+            block, fence = [line], fence_match.group(1)[0] * 3
+            continue
+        if _ANCHOR_ITEM.match(line) or _REFERENCE_DEFINITION.match(line) or _RULE.match(line):
+            continue
+        line = _BADGE.sub("", line)
+        line = _IMAGE.sub("", line)
+        line = _HTML_TAG.sub("", line)
+        line = _LINK.sub(r"\1", line).rstrip()
+        if _TABLE_ROW.match(line):
+            table_rows += 1
+            if table_rows == _MAX_TABLE_ROWS + 1:
+                lines.append("| ... |")
+            if table_rows > _MAX_TABLE_ROWS:
+                continue
+        else:
+            table_rows = 0
+        if line.strip() or (lines and lines[-1].strip()):
+            lines.append(line)
+    if block is not None:
+        # Unclosed fence: keep what there is
+        lines.extend(block)
+
+    kept: List[ReadmeSection] = []
+    dropped_level: Optional[int] = None
+    for section in split_sections("\n".join(lines)):
+        if dropped_level is not None and section.level > dropped_level:
+            continue
+        dropped_level = None
+        if section.heading and _DROPPED_SECTION.search(section.heading):
+            dropped_level = section.level
+            continue
+        # A heading left with nothing under it (e.g. "Demo" above a removed GIF) says nothing
+        if section.heading and not section.key and not any(line.strip() for line in section.lines[1:]):
+            continue
+        kept.append(section)
+
+    # The introduction stays first, then the key sections, then the rest
+    ordered = kept[:1] + [section for section in kept[1:] if section.key] + [section for section in kept[1:] if not section.key]
+    return "\n".join("\n".join(section.lines).strip() + "\n" for section in ordered).strip() + "\n"
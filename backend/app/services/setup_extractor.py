@@ -0,0 +1,386 @@
+import configparser
+import json
+import posixpath
+import re
+import sys
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+SETUP_CATEGORIES = ("prerequisites", "dependencies", "run_app", "linting", "testing")
+
+# Task runners name the project's own entry points, so their targets win over
+# commands derived from manifests, which in turn win over CI steps.
+_TIER_TASK_RUNNER = 0
+_TIER_MANIFEST = 1
+_TIER_CI = 2
+
+_MAX_COMMANDS = 3
+_MAX_PREREQUISITES = 6
+
+_MAKE_TARGETS = {
+    "dependencies": ("install", "deps", "setup", "bootstrap", "dev-install", "install-dev"),
+    "run_app": ("run", "start", "serve", "dev", "up"),
+    "linting": ("lint", "check-format", "format-check", "typecheck", "vet", "fmt-check"),
+    "testing": ("test", "tests", "check", "unit", "test-unit"),
+}
+_SCRIPT_NAMES = {
+    "run_app": ("dev", "start", "serve", "develop"),
+    "linting": ("lint", "typecheck", "type-check", "format:check", "lint:check"),
+    "testing": ("test", "test:unit", "test:ci"),
+}
+
+_CI_DEPENDENCIES = re.compile(r"\b(npm (ci|install)|yarn( install)?$|pnpm install|bun install|pip3? install|poetry install|uv sync|pipenv install|pdm install|bundle install|go mod download|composer install|cargo fetch)\b")
+_CI_LINTING = re.compile(r"\b(lint|flake8|ruff|black --check|mypy|eslint|prettier --check|clippy|golangci-lint|go vet|rubocop|pylint|tsc --noEmit|cargo fmt)\b")
+_CI_TESTING = re.compile(r"\b(test|tests|pytest|jest|vitest|tox|nox|rspec|phpunit)\b")
+_CI_TOOL_VERSION = re.compile(r"^\s*(node|python|go|java|dotnet|ruby)-version:\s*['\"]?([^'\"\n#]+?)['\"]?\s*$", re.MULTILINE)
+_CI_RUN = re.compile(r"^(\s*)(?:-\s+)?run:\s*(.*)$")
+_MAKE_TARGET = re.compile(r"^([A-Za-z][\w.-]*)\s*:(?!=)", re.MULTILINE)
+_PREREQUISITE_VERSION = re.compile(r"\s*[\d<>=~^].*$")
+
+_TOOL_NAMES = {"node": "Node.js", "python": "Python", "go": "Go", "java": "Java", "dotnet": ".NET", "ruby": "Ruby"}
+
+Finding = Tuple[str, str, int]  # (category, command or prerequisite, tier)
+
+
+@dataclass(frozen=True)
+class SetupExtraction:
+    """
+    Setup commands read straight from a repository's configuration files.
+
+    ``commands`` holds only the categories something was found for; each
+    value is one command or prerequisite per line. ``sources`` names the
+    files each category came from.
+    """
+
+    commands: Dict[str, str]
+    sources: Dict[str, List[str]]
+
+    @property
+    def missing(self) -> List[str]:
+        return [category for category in SETUP_CATEGORIES if category not in self.commands]
+
+
+def extract_setup_commands(file_contents: Dict[str, str]) -> SetupExtraction:
+    """
+    Derive prerequisites, dependency, run, lint and test commands without a model.
+
+    Reads package.json scripts and engines, pyproject.toml, requirements
+    files, setup.py/setup.cfg, tox.ini, Makefile targets, Cargo.toml,
+    go.mod, Gemfile, composer.json, Dockerfiles, compose files and CI
+    workflow steps. Commands for files below the root are wrapped in a
+    ``cd``. Files that fail to parse are skipped.
+
+    Args:
+        file_contents: Dictionary mapping file paths to their contents
+
+    Returns:
+        The commands found per category and the files they came from
+    """
+    findings: List[Tuple[Finding, str]] = []
+    # Root files first, so their commands come before those of nested packages
+    for path in sorted(file_contents, key=lambda p: (p.count("/"), p)):
+        parser = _parser_for(path)
+        if parser is None:
+            continue
+        directory = posixpath.dirname(path)
+        try:
+            for finding in parser(path, file_contents[path]):
+                category, command, tier = finding
+                if directory and category != "prerequisites" and tier != _TIER_CI:
+                    command = f"cd {directory} && {command}"
+                findings.append(((category, command, tier), path))
+        except Exception as e:
+            print(f"[SETUP] Could not parse {path} for setup commands: {str(e)}")
+
+    commands: Dict[str, str] = {}
+    sources: Dict[str, List[str]] = {}
+    for category in SETUP_CATEGORIES:
+        matches = [(command, tier, path) for (found, command, tier), path in findings if found == category]
+        if not matches:
+            continue
+        if category == "prerequisites":
+            # One entry per tool, from the best-ranked file that names it
+            tools: Dict[str, str] = {}
+            for command, _, _ in sorted(matches, key=lambda match: match[1]):
+                tools.setdefault(_PREREQUISITE_VERSION.sub("", command), command)
+            chosen = list(tools.values())[:_MAX_PREREQUISITES]
+        else:
+            best = min(tier for _, tier, _ in matches)
+            chosen = list(dict.fromkeys(command for command, tier, _ in matches if tier == best))[:_MAX_COMMANDS]
+        commands[category] = "\n".join(chosen)
+        sources[category] = list(dict.fromkeys(path for command, _, path in matches if command in chosen))
+    return SetupExtraction(commands=commands, sources=sources)
+
+
+def _parser_for(path: str) -> Optional[Callable[[str, str], List[Finding]]]:
+    name = posixpath.basename(path)
+    directory = posixpath.dirname(path)
+    if directory == ".github/workflows" and name.endswith((".yml", ".yaml")):
+        return _ci_workflow
+    if name.startswith("requirements") and name.endswith(".txt"):
+        return _requirements
+    if name == "Dockerfile" or name.startswith("Dockerfile.") or name.endswith(".Dockerfile"):
+        return _dockerfile
+    return _PARSERS.get(name)
+
+
+def _package_json(path: str, content: str) -> List[Finding]:
+    data = json.loads(content)
+    scripts = data.get("scripts") or {}
+    manager = (data.get("packageManager") or "npm").split("@")[0]
+
+    def run(script: str) -> str:
+        if script in ("start", "test") or manager in ("yarn", "pnpm"):
+            return f"{manager} {script}"
+        return f"{manager} run {script}"
+
+    node = (data.get("engines") or {}).get("node")
+    findings = [("prerequisites", f"Node.js {node}" if node else "Node.js", _TIER_MANIFEST)]
+    if manager != "npm":
+        findings.append(("prerequisites", manager, _TIER_MANIFEST))
+    findings.append(("dependencies", f"{manager} install", _TIER_MANIFEST))
+    for category, names in _SCRIPT_NAMES.items():
+        present = [name for name in names if name in scripts]
+        # One way to run the app is enough; every lint and test script is useful
+        for name in present[:1] if category == "run_app" else present:
+            findings.append((category, run(name), _TIER_MANIFEST))
+    return findings
+
+
+def _pyproject(path: str, content: str) -> List[Finding]:
+    data = tomllib.loads(content)
+    project = data.get("project") or {}
+    tool = data.get("tool") or {}
+    findings: List[Finding] = []
+    requires = project.get("requires-python") or ((tool.get("poetry") or {}).get("dependencies") or {}).get("python")
+    findings.append(("prerequisites", f"Python {requires}" if requires else "Python", _TIER_MANIFEST))
+
+    prefix = ""
+    if "poetry" in tool:
+        findings += [("prerequisites", "Poetry", _TIER_MANIFEST), ("dependencies", "poetry install", _TIER_MANIFEST)]
+        prefix = "poetry run "
+    elif "uv" in tool:
+        findings += [("prerequisites", "uv", _TIER_MANIFEST), ("dependencies", "uv sync", _TIER_MANIFEST)]
+        prefix = "uv run "
+    elif "pdm" in tool:
+        findings += [("prerequisites", "PDM", _TIER_MANIFEST), ("dependencies", "pdm install", _TIER_MANIFEST)]
+        prefix = "pdm run "
+    elif project:
+        extras = [extra for extra in ("dev", "test", "tests") if extra in (project.get("optional-dependencies") or {})]
+        findings.append(("dependencies", f'pip install -e ".[{",".join(extras)}]"' if extras else "pip install -e .", _TIER_MANIFEST))
+
+    scripts = project.get("scripts") or (tool.get("poetry") or {}).get("scripts") or {}
+    if scripts:
+        findings.append(("run_app", f"{prefix}{next(iter(scripts))}", _TIER_MANIFEST))
+    for section, command in (("ruff", "ruff check ."), ("black", "black --check ."), ("flake8", "flake8"), ("mypy", "mypy .")):
+        if section in tool:
+            findings.append(("linting", prefix + command, _TIER_MANIFEST))
+    if "pytest" in tool:
+        findings.append(("testing", prefix + "pytest", _TIER_MANIFEST))
+    if "tox" in tool:
+        findings.append(("testing", "tox", _TIER_MANIFEST))
+    return findings
+
+
+def _requirements(path: str, content: str) -> List[Finding]:
+    findings: List[Finding] = [("prerequisites", "Python", _TIER_MANIFEST), ("dependencies", f"pip install -r {posixpath.basename(path)}", _TIER_MANIFEST)]
+    packages = {re.split(r"[\s<>=!~\[;]", line.strip(), maxsplit=1)[0].lower() for line in content.splitlines() if line.strip() and not line.lstrip().startswith(("#", "-"))}
+    for package, command in (("ruff", "ruff check ."), ("flake8", "flake8"), ("black", "black --check ."), ("mypy", "mypy .")):
+        if package in packages:
+            findings.append(("linting", command, _TIER_MANIFEST))
+    if "pytest" in packages:
+        findings.append(("testing", "pytest", _TIER_MANIFEST))
+    return findings
+
+
+def _setup_py(path: str, content: str) -> List[Finding]:
+    match = re.search(r"python_requires\s*=\s*['\"]([^'\"]+)['\"]", content)
+    return [
+        ("prerequisites", f"Python {match.group(1)}" if match else "Python", _TIER_MANIFEST),
+        ("dependencies", "pip install -e .", _TIER_MANIFEST),
+    ]
+
+
+def _ini(content: str) -> configparser.ConfigParser:
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.read_string(content)
+    return parser
+
+
+def _setup_cfg(path: str, content: str) -> List[Finding]:
+    config = _ini(content)
+    findings: List[Finding] = []
+    requires = config.get("options", "python_requires", fallback=None)
+    if requires:
+        findings.append(("prerequisites", f"Python {requires.strip()}", _TIER_MANIFEST))
+    if config.has_section("metadata") or config.has_section("options"):
+        findings.append(("dependencies", "pip install -e .", _TIER_MANIFEST))
+    if config.has_section("flake8"):
+        findings.append(("linting", "flake8", _TIER_MANIFEST))
+    if config.has_section("mypy"):
+        findings.append(("linting", "mypy .", _TIER_MANIFEST))
+    if config.has_section("tool:pytest"):
+        findings.append(("testing", "pytest", _TIER_MANIFEST))
+    return findings
+
+
+def _tox_ini(path: str, content: str) -> List[Finding]:
+    config = _ini(content)
+    findings: List[Finding] = []
+    lint_envs = [section[len("testenv:"):] for section in config.sections() if section.startswith("testenv:") and any(word in section for word in ("lint", "flake8", "style", "type", "mypy"))]
+    findings += [("linting", f"tox -e {env}", _TIER_MANIFEST) for env in lint_envs]
+    if config.has_section("flake8"):
+        findings.append(("linting", "flake8", _TIER_MANIFEST))
+    if config.has_section("tox") or config.has_section("testenv"):
+        findings.append(("testing", "tox", _TIER_MANIFEST))
+    if config.has_section("pytest"):
+        findings.append(("testing", "pytest", _TIER_MANIFEST))
+    return findings
+
+
+def _makefile(path: str, content: str) -> List[Finding]:
+    targets = set(_MAKE_TARGET.findall(content))
+    findings: List[Finding] = [("prerequisites", "make", _TIER_TASK_RUNNER)] if targets else []
+    for category, names in _MAKE_TARGETS.items():
+        present = [name for name in names if name in targets]
+        for name in present[:1] if category in ("dependencies", "run_app") else present:
+            findings.append((category, f"make {name}", _TIER_TASK_RUNNER))
+    return findings
+
+
+def _cargo_toml(path: str, content: str) -> List[Finding]:
+    data = tomllib.loads(content)
+    package = data.get("package") or {}
+    version = package.get("rust-version")
+    workspace = " --workspace" if "workspace" in data else ""
+    findings: List[Finding] = [
+        ("prerequisites", f"Rust {version}" if version else "Rust (cargo)", _TIER_MANIFEST),
+        ("dependencies", f"cargo build{workspace}", _TIER_MANIFEST),
+        ("linting", f"cargo clippy{workspace} --all-targets", _TIER_MANIFEST),
+        ("linting", "cargo fmt --check", _TIER_MANIFEST),
+        ("testing", f"cargo test{workspace}", _TIER_MANIFEST),
+    ]
+    if package and ("bin" in data or "lib" not in data):
+        findings.append(("run_app", "cargo run", _TIER_MANIFEST))
+    return findings
+
+
+def _go_mod(path: str, content: str) -> List[Finding]:
+    match = re.search(r"^go\s+(\S+)", content, re.MULTILINE)
+    return [
+        ("prerequisites", f"Go {match.group(1)}+" if match else "Go", _TIER_MANIFEST),
+        ("dependencies", "go mod download", _TIER_MANIFEST),
+        ("run_app", "go run .", _TIER_MANIFEST),
+        ("linting", "go vet ./...", _TIER_MANIFEST),
+        ("testing", "go test ./...", _TIER_MANIFEST),
+    ]
+
+
+def _gemfile(path: str, content: str) -> List[Finding]:
+    match = re.search(r"^ruby\s+['\"]([^'\"]+)['\"]", content, re.MULTILINE)
+    findings: List[Finding] = [
+        ("prerequisites", f"Ruby {match.group(1)}" if match else "Ruby", _TIER_MANIFEST),
+        ("prerequisites", "Bundler", _TIER_MANIFEST),
+        ("dependencies", "bundle install", _TIER_MANIFEST),
+    ]
+    if "rubocop" in content:
+        findings.append(("linting", "bundle exec rubocop", _TIER_MANIFEST))
+    if "rspec" in content:
+        findings.append(("testing", "bundle exec rspec", _TIER_MANIFEST))
+    if "rails" in content:
+        findings.append(("run_app", "bin/rails server", _TIER_MANIFEST))
+    return findings
+
+
+def _composer_json(path: str, content: str) -> List[Finding]:
+    data = json.loads(content)
+    scripts = data.get("scripts") or {}
+    php = (data.get("require") or {}).get("php")
+    findings: List[Finding] = [
+        ("prerequisites", f"PHP {php}" if php else "PHP", _TIER_MANIFEST),
+        ("prerequisites", "Composer", _TIER_MANIFEST),
+        ("dependencies", "composer install", _TIER_MANIFEST),
+    ]
+    for category, names in _SCRIPT_NAMES.items():
+        findings += [(category, f"composer {name}", _TIER_MANIFEST) for name in names if name in scripts]
+    return findings
+
+
+def _dockerfile(path: str, content: str) -> List[Finding]:
+    directory = posixpath.dirname(path) or "."
+    ports = re.findall(r"^\s*EXPOSE\s+(\d+)", content, re.MULTILINE | re.IGNORECASE)
+    publish = f" -p {ports[0]}:{ports[0]}" if ports else ""
+    name = posixpath.basename(path)
+    file_flag = f" -f {path}" if name != "Dockerfile" else ""
+    # Ranked like a CI step: running in a container is the fallback when the
+    # manifests name no entry point. Being CI-tier it is built from the root
+    # rather than wrapped in a cd.
+    return [
+        ("prerequisites", "Docker", _TIER_MANIFEST),
+        ("run_app", f"docker build{file_flag} -t app {directory} && docker run{publish} app", _TIER_CI),
+    ]
+
+
+def _compose(path: str, content: str) -> List[Finding]:
+    return [("prerequisites", "Docker Compose", _TIER_MANIFEST), ("run_app", "docker compose up", _TIER_MANIFEST)]
+
+
+def _ci_workflow(path: str, content: str) -> List[Finding]:
+    findings: List[Finding] = []
+    for tool, version in _CI_TOOL_VERSION.findall(content):
+        if "${{" not in version:
+            findings.append(("prerequisites", f"{_TOOL_NAMES[tool]} {version.strip()}", _TIER_CI))
+    for command in _ci_run_commands(content):
+        if _CI_LINTING.search(command):
+            findings.append(("linting", command, _TIER_CI))
+        elif _CI_TESTING.search(command):
+            findings.append(("testing", command, _TIER_CI))
+        elif _CI_DEPENDENCIES.search(command):
+            findings.append(("dependencies", command, _TIER_CI))
+    return findings
+
+
+def _ci_run_commands(content: str) -> List[str]:
+    """The shell lines of every ``run:`` step, single-line or block scalar."""
+    commands: List[str] = []
+    lines = content.splitlines()
+    i = 0
+    while i < len(lines):
+        match = _CI_RUN.match(lines[i])
+        i += 1
+        if not match:
+            continue
+        value = match.group(2).strip()
+        if value and value[0] not in "|>":
+            commands.append(value.strip("'\""))
+            continue
+        indent = len(match.group(1))
+        while i < len(lines) and (not lines[i].strip() or len(lines[i]) - len(lines[i].lstrip()) > indent + 2):
+            commands.append(lines[i].strip())
+            i += 1
+    return [command for command in commands if command and not command.startswith(("#", "echo ", "cd "))]
+
+
+_PARSERS: Dict[str, Callable[[str, str], List[Finding]]] = {
+    "package.json": _package_json,
+    "pyproject.toml": _pyproject,
+    "setup.py": _setup_py,
+    "setup.cfg": _setup_cfg,
+    "tox.ini": _tox_ini,
+    "Makefile": _makefile,
+    "makefile": _makefile,
+    "GNUmakefile": _makefile,
+    "Cargo.toml": _cargo_toml,
+    "go.mod": _go_mod,
+    "Gemfile": _gemfile,
+    "composer.json": _composer_json,
+    "docker-compose.yml": _compose,
+    "docker-compose.yaml": _compose,
+    "compose.yml": _compose,
+    "compose.yaml": _compose,
+}
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Any, List, Set
+
+from ..metrics import latency_metrics
+
+# Put on a subscriber's queue after the flight's last event.
+FLIGHT_END = object()
+
+
+class Flight:
+    """
+    One in-flight computation shared by every caller with the same key.
+
+    Events published by the computation are fanned out to all subscriber
+    queues. A subscriber that joins late first receives the events emitted
+    so far; consecutive text deltas of the same type are merged in that
+    history, so a late joiner gets the text so far as one event rather than
+    one event per fragment.
+
+    The computation is cancelled when its last holder detaches before it
+    finishes, so work nobody waits for any more does not keep running.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.task: "asyncio.Future[Any]"
+        self._history: List[Any] = []
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._holders = 0
+        self.abandoned = False
+
+    def publish(self, event: Any) -> None:
+        """Send an event to every subscriber and record it for late joiners."""
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+        previous: Any = self._history[-1] if self._history else None
+        if _is_delta(event) and _is_delta(previous) and previous["type"] == event["type"]:
+            self._history[-1] = {**previous, "delta": previous["delta"] + event["delta"]}
+        else:
+            self._history.append(event)
+
+    def attach(self) -> None:
+        self._holders += 1
+
+    def detach(self) -> None:
+        """Release a hold; cancels the computation if nobody else is waiting for it."""
+        self._holders -= 1
+        if self._holders == 0 and not self.task.done():
+            self.abandoned = True
+            self.task.cancel()
+            latency_metrics().increment("single_flight.cancelled")
+
+    def subscribe(self) -> asyncio.Queue:
+        """Attach and return a queue holding the replayed history, then live events and FLIGHT_END."""
+        self.attach()
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self._history:
+            queue.put_nowait(event)
+        if self.task.done():
+            queue.put_nowait(FLIGHT_END)
+        else:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        self.detach()
+
+    async def wait(self) -> Any:
+        """
+        Wait for the result while holding the flight.
+
+        Cancelling one waiter does not cancel the computation for the others.
+        """
+        self.attach()
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.detach()
+
+    def _finish(self, _: "asyncio.Task[Any]") -> None:
+        for queue in self._subscribers:
+            queue.put_nowait(FLIGHT_END)
+        self._subscribers.clear()
+
+
+def _is_delta(event: Any) -> bool:
+    return isinstance(event, dict) and "delta" in event
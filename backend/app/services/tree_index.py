@@ -0,0 +1,170 @@
+import posixpath
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Pattern
+
+from .file_tree import FileTree
+
+
+@lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> Pattern[str]:
+    """
+    Translate a path glob into an anchored regular expression.
+
+    ``*`` and ``?`` never cross a ``/``, ``**`` matches any number of whole
+    directories (including none), and ``[...]`` is a character class.
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            regex.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            regex.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex.append(f"[{body}]")
+            i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(regex) + r"\Z")
+
+
+def _extension(name: str) -> str:
+    return posixpath.splitext(name)[1][1:].lower()
+
+
+class TreeIndex:
+    """
+    Query index over a FileTree, built once per commit.
+
+    Directory listings use the tree's per-directory entry table. On top of
+    that the index keeps the entries grouped by exact basename and by
+    lowercase file extension, and one newline-joined lowercase copy of all
+    paths for substring search. All query methods return entry indices in
+    tree order, so results can be encoded with ``FileTree.to_json``.
+    """
+
+    def __init__(self, tree: FileTree, commit_sha: Optional[str] = None) -> None:
+        self.tree = tree
+        self.commit_sha = commit_sha
+        self._by_name: Dict[str, array] = {}
+        self._by_extension: Dict[str, array] = {}
+        self._starts = array("q")
+
+        parts: List[str] = []
+        position = 0
+        for index, path in enumerate(tree.paths()):
+            name = tree.name(index)
+            self._by_name.setdefault(name, array("i")).append(index)
+            if tree.is_blob(index):
+                extension = _extension(name)
+                if extension:
+                    self._by_extension.setdefault(extension, array("i")).append(index)
+            # Lowercase per path: some characters change length when lowered,
+            # which would shift the offsets of a lowercased joined string.
+            lowered = path.lower()
+            self._starts.append(position)
+            parts.append(lowered)
+            position += len(lowered) + 1
+        self._haystack = "\n".join(parts)
+
+    def __len__(self) -> int:
+        return len(self.tree)
+
+    def __contains__(self, path: object) -> bool:
+        if not isinstance(path, str):
+            return False
+        path = path.strip("/")
+        directory, _, name = path.rpartition("/")
+        candidates = self._by_name.get(name, ())
+        if len(candidates) > 8:
+            children = self.tree.children(directory) or ()
+            return any(self.tree.name(i) == name for i in children)
+        return any(self.tree.path(i) == path for i in candidates)
+
+    def list_dir(self, path: str = "") -> Optional[List[int]]:
+        """
+        Return the direct children of a directory, directories first, then by name.
+
+        Returns None if ``path`` is not a directory in the tree.
+        """
+        children = self.tree.children(path)
+        if children is None:
+            return None
+        tree = self.tree
+        return sorted(children, key=lambda i: (tree.is_blob(i), tree.name(i)))
+
+    def names(self) -> Iterable[str]:
+        """Return the distinct basenames in the tree."""
+        return self._by_name.keys()
+
+    def find_name(self, name: str) -> List[int]:
+        """Return every entry whose basename is exactly ``name``."""
+        return list(self._by_name.get(name, ()))
+
+    def find_extension(self, extension: str) -> List[int]:
+        """Return every file with the given extension (case-insensitive, with or without the dot)."""
+        return list(self._by_extension.get(extension.lstrip(".").lower(), ()))
+
+    def glob(self, pattern: str) -> List[int]:
+        """
+        Return entries whose full path matches ``pattern``, e.g. ``**/package.json``.
+
+        A literal basename is looked up in the name index and a ``*.ext``
+        basename in the extension index, so only the candidates are matched
+        against the full pattern; other patterns scan every path.
+        """
+        pattern = pattern.strip("/")
+        regex = _compile_glob(pattern)
+        basename = pattern.rpartition("/")[2]
+        candidates: Iterable[int]
+        if basename and not any(char in basename for char in "*?["):
+            candidates = self._by_name.get(basename, ())
+        elif basename.startswith("*.") and not any(char in basename[2:] for char in "*?[/"):
+            # The extension index only has files and lowercases extensions; the
+            # regex below still enforces the exact case.
+            candidates = self._by_extension.get(basename[2:].lower(), ())
+        else:
+            candidates = range(len(self.tree))
+        tree = self.tree
+        return [i for i in candidates if regex.match(tree.path(i))]
+
+    def search(self, query: str) -> List[int]:
+        """Return entries whose path contains ``query`` (case-insensitive)."""
+        query = query.lower()
+        if not query or "\n" in query:
+            return []
+        haystack, starts = self._haystack, self._starts
+        results: List[int] = []
+        position = haystack.find(query)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            results.append(index)
+            # Continue at the next path so each entry is reported once.
+            next_start = starts[index + 1] if index + 1 < len(starts) else len(haystack)
+            position = haystack.find(query, next_start)
+        return results
+
+    def estimated_size(self) -> int:
+        """Approximate memory footprint in bytes, including the underlying tree."""
+        total = self.tree.estimated_size() + sys.getsizeof(self._haystack)
+        total += self._starts.itemsize * len(self._starts)
+        for groups in (self._by_name, self._by_extension):
+            total += sum(64 + a.itemsize * len(a) for a in groups.values()) + 100 * len(groups)
+        return total
@@ -0,0 +1,167 @@
+import asyncio
+import posixpath
+from collections import Counter
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Union
+from weakref import WeakKeyDictionary
+
+from ..config import TREE_SUMMARY_TOKEN_BUDGET
+from ..metrics import latency_metrics
+from .config_scorer import CI_DIRECTORIES, is_config_path, is_excluded_directory, name_weight
+from .file_tree import FileTree
+from .prompt_packer import count_tokens, truncate_to_tokens
+from .tree_index import TreeIndex
+
+# Deepest outline level tried first; shallower outlines are used until one fits.
+_MAX_DEPTH = 4
+
+# Subdirectories listed per directory, largest first; the rest are summed up.
+_MAX_CHILDREN = 10
+
+# Extensions shown per directory in its histogram.
+_TOP_EXTENSIONS = 4
+
+# Share of the budget for the directory outline; configuration file paths get the rest.
+_OUTLINE_SHARE = 0.6
+
+# Summaries by token budget, kept as long as the tree index (one per commit)
+# is cached. The task is stored while it runs, so concurrent steps share it.
+_summaries: "WeakKeyDictionary[TreeIndex, Dict[int, asyncio.Future]]" = WeakKeyDictionary()
+
+
+class _Directory:
+    __slots__ = ("files", "extensions", "children", "collapsed")
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.extensions: Counter = Counter()
+        self.children: Set[str] = set()
+        self.collapsed = False
+
+
+def summarize_tree(files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex] = None, max_tokens: int = TREE_SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Outline a repository tree within a token budget.
+
+    Each directory is shown with its recursive file count and most common
+    extensions, largest subdirectories first, as deep as the budget allows.
+    Vendored and generated directories (node_modules, dist, vendor, ...)
+    are shown as one collapsed line. The outline is followed by the full
+    paths of the configuration files found anywhere outside those
+    directories, shallowest first.
+
+    Args:
+        files: The repository file tree
+        tree_index: Query index over ``files``; built here if not given (optional)
+        max_tokens: Token budget of the whole summary
+
+    Returns:
+        The outline as plain text
+    """
+    if tree_index is None:
+        tree = files if isinstance(files, FileTree) else FileTree.from_entries((f["path"], f["type"], f.get("size")) for f in files)
+        tree_index = TreeIndex(tree)
+    tree = tree_index.tree
+
+    direct: Dict[str, Counter] = {}
+    for index, path in enumerate(tree.paths()):
+        if tree.is_blob(index):
+            directory, _, name = path.rpartition("/")
+            extension = posixpath.splitext(name)[1][1:].lower() or name
+            direct.setdefault(directory, Counter())[extension] += 1
+
+    directories: Dict[str, _Directory] = {"": _Directory()}
+    for directory, extensions in direct.items():
+        segments = directory.split("/") if directory else []
+        collapsed = False
+        for depth, segment in enumerate(segments):
+            if is_excluded_directory(segment):
+                directory = "/".join(segments[:depth + 1])
+                collapsed = True
+                break
+        count = sum(extensions.values())
+        node = directories.setdefault(directory, _Directory())
+        node.files += count
+        node.extensions.update(extensions)
+        node.collapsed = collapsed
+        # Files below a vendored directory count towards it and nothing above
+        while directory:
+            parent = posixpath.dirname(directory)
+            node = directories.setdefault(parent, _Directory())
+            node.children.add(directory)
+            if not collapsed:
+                node.files += count
+                node.extensions.update(extensions)
+            directory = parent
+
+    vendored = sum(node.files for path, node in directories.items() if node.collapsed)
+    root = directories[""]
+    header = f"{root.files} files in {len(directories) - 1} directories"
+    if vendored:
+        header += f", plus {vendored} files in vendored or generated directories"
+    header += "\n"
+
+    outline_budget = int(max_tokens * _OUTLINE_SHARE) - count_tokens(header)
+    outline = ""
+    for max_depth in range(_MAX_DEPTH, 0, -1):
+        outline = "\n".join(_outline(directories, "", 0, max_depth)) + "\n"
+        if count_tokens(outline) <= outline_budget:
+            break
+    else:
+        outline = truncate_to_tokens(outline, outline_budget) + "\n"
+
+    config_paths = _config_paths(tree, tree_index)
+    listing = "\n".join(config_paths)
+    remaining = max_tokens - count_tokens(header) - count_tokens(outline) - count_tokens("\nConfiguration files:\n")
+    shown = truncate_to_tokens(listing, max(0, remaining - 10))
+    omitted = len(config_paths) - (shown.count("\n") + 1 if shown else 0)
+    if omitted > 0:
+        shown += f"\n... {omitted} more"
+    return header + outline + ("\nConfiguration files:\n" + shown + "\n" if config_paths else "")
+
+
+async def tree_summary_for(files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex] = None, max_tokens: int = TREE_SUMMARY_TOKEN_BUDGET) -> str:
+    """Run summarize_tree in a worker thread, reusing an earlier or in-progress summary of the same tree index."""
+    if tree_index is None:
+        return await _summarize_in_thread(files, None, max_tokens)
+    summaries = _summaries.setdefault(tree_index, {})
+    summary = summaries.get(max_tokens)
+    if summary is None:
+        summary = summaries[max_tokens] = asyncio.ensure_future(_summarize_in_thread(files, tree_index, max_tokens))
+        summary.add_done_callback(partial(_forget_failed, summaries, max_tokens))
+    return await asyncio.shield(summary)
+
+
+def _forget_failed(summaries: Dict[int, asyncio.Future], max_tokens: int, task: asyncio.Future) -> None:
+    if task.cancelled() or task.exception() is not None:
+        summaries.pop(max_tokens, None)
+
+
+async def _summarize_in_thread(files: Union[FileTree, List[Dict[str, Any]]], tree_index: Optional[TreeIndex], max_tokens: int) -> str:
+    with latency_metrics().time("tree_summary"):
+        return await asyncio.to_thread(summarize_tree, files, tree_index, max_tokens)
+
+
+def _outline(directories: Dict[str, _Directory], path: str, depth: int, max_depth: int) -> List[str]:
+    node = directories[path]
+    extensions = ", ".join(f"{extension} {count}" for extension, count in node.extensions.most_common(_TOP_EXTENSIONS))
+    line = f"{'  ' * depth}{path + '/' if path else './'} {node.files} files"
+    if node.collapsed:
+        return [line + " (vendored or generated, not expanded)"]
+    lines = [line + (f": {extensions}" if extensions else "")]
+    if depth + 1 >= max_depth or not node.children:
+        return lines
+    children = sorted(node.children, key=lambda child: (-directories[child].files, child))
+    for child in children[:_MAX_CHILDREN]:
+        lines.extend(_outline(directories, child, depth + 1, max_depth))
+    if len(children) > _MAX_CHILDREN:
+        rest = children[_MAX_CHILDREN:]
+        lines.append(f"{'  ' * (depth + 1)}... {len(rest)} more directories, {sum(directories[child].files for child in rest)} files")
+    return lines
+
+
+def _config_paths(tree: FileTree, tree_index: TreeIndex) -> List[str]:
+    paths = [tree.path(index) for name in tree_index.names() if name_weight(name) is not None for index in tree_index.find_name(name) if tree.is_blob(index)]
+    for directory in CI_DIRECTORIES:
+        paths.extend(tree.path(index) for index in tree.children(directory) or () if tree.name(index).endswith((".yml", ".yaml")))
+    return sorted((path for path in set(paths) if is_config_path(path)), key=lambda path: (path.count("/"), path))
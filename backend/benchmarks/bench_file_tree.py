@@ -0,0 +1,93 @@
+"""
+Compare the memory and CPU cost of the file tree representations.
+
+"list" is the previous path: one RepositoryFileInfo per entry, a list of
+dicts for the agent service (files_dict) and pydantic serialisation of the
+RepositoryInfoResponse. "filetree" is the columnar FileTree, handed to the
+agent service as-is and encoded with FileTree.to_json().
+
+Usage (from the backend directory):
+    python benchmarks/bench_file_tree.py --entries 150000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.schemas import RepositoryFileInfo, RepositoryInfoResponse  # noqa: E402
+from app.services.file_tree import FileTree  # noqa: E402
+
+
+def synthetic_tree(entries: int) -> list:
+    """Build a monorepo-shaped Trees API payload: packages/<n>/src/<m>/file_<k>.ts."""
+    items = []
+    package = 0
+    while len(items) < entries:
+        base = f"packages/pkg-{package:04d}"
+        items.append({"path": base, "type": "tree"})
+        items.append({"path": f"{base}/package.json", "type": "blob", "size": 812})
+        for module in range(8):
+            directory = f"{base}/src/module_{module}"
+            items.append({"path": directory, "type": "tree"})
+            for k in range(12):
+                items.append({"path": f"{directory}/file_{k}.ts", "type": "blob", "size": 1000 + k})
+        package += 1
+    return items[:entries]
+
+
+def run_list(items: list) -> tuple:
+    files = [RepositoryFileInfo(path=i["path"], type=i["type"], size=i.get("size")) for i in items]
+    files_dict = [{"path": f.path, "type": f.type, "size": f.size} for f in files]
+    response = RepositoryInfoResponse(
+        full_name="o/r", description="", language="TypeScript", stars=0, default_branch="main", files=files
+    )
+    return (files, files_dict), response.model_dump_json()
+
+
+def run_filetree(items: list) -> tuple:
+    tree = FileTree()
+    for i in items:
+        tree.append(i["path"], i["type"], i.get("size"))
+    return tree, tree.to_json()
+
+
+def measure(name: str, fn, items: list, repeat: int = 3) -> None:
+    # Time without tracemalloc (it slows every allocation down), then take a
+    # separate traced run for memory.
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(items)
+        timings.append(time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    retained, encoded = fn(items)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:<9} build+encode {min(timings) * 1000:8.1f} ms   "
+        f"retained {current / 1e6:8.1f} MB   peak {peak / 1e6:8.1f} MB   json {len(encoded) / 1e6:6.1f} MB"
+    )
+    del retained, encoded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=150_000)
+    args = parser.parse_args()
+
+    items = synthetic_tree(args.entries)
+    print(f"{len(items)} tree entries")
+    measure("list", run_list, items)
+    measure("filetree", run_filetree, items)
+
+
+if __name__ == "__main__":
+    main()
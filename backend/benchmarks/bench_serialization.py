@@ -0,0 +1,126 @@
+"""
+Compare JSON encoders and compression for the API's large payloads.
+
+Encoders:
+  stdlib     jsonable_encoder + json.dumps, FastAPI's path for dicts and for
+             routes without the pydantic fast path (older FastAPI releases)
+  pydantic   model_dump_json, FastAPI's fast path for response_model routes
+  dumps      app.serialization.dumps (pydantic for models, orjson otherwise)
+
+Payloads are a repository analysis with a long markdown body, repository
+info with a large README and file tree, and one streamed progress frame.
+Compression ratios and times are reported for gzip and, when installed,
+brotli.
+
+Usage (from the backend directory):
+    python benchmarks/bench_serialization.py --files 20000 --readme-kb 40
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.models.schemas import (  # noqa: E402
+    AnalysisProgressUpdate,
+    RepositoryAnalysisResponse,
+    RepositoryFileInfo,
+    RepositoryInfoResponse,
+)
+from app.serialization import dumps, sse_event  # noqa: E402
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+MARKDOWN = (
+    "## Setup\n\nInstall the dependencies with `npm install` and run `npm test`. "
+    "The project uses **TypeScript** with strict mode — see [docs](https://example.com/docs).\n\n"
+    "```bash\npip install -r requirements.txt\nuvicorn app.main:app --reload\n```\n\n"
+    "- Configure `.env` from `.env.example`\n- Run migrations\n\n"
+)
+
+
+def payloads(files: int, readme_kb: int) -> dict:
+    readme = (MARKDOWN * (readme_kb * 1024 // len(MARKDOWN) + 1))[: readme_kb * 1024]
+    tree = [
+        RepositoryFileInfo(path=f"packages/pkg-{i // 100:04d}/src/module_{i % 10}/file_{i}.ts", type="blob", size=1000 + i)
+        for i in range(files)
+    ]
+    return {
+        "analysis": RepositoryAnalysisResponse(
+            agent_id="github-copilot-agent",
+            repo_name="octo/monorepo",
+            analysis=MARKDOWN * 60,
+            setup_commands={"install": "npm install", "test": "npm test", "run": "npm start"},
+        ),
+        "repo-info": RepositoryInfoResponse(
+            full_name="octo/monorepo",
+            description="A large monorepo",
+            language="TypeScript",
+            stars=12345,
+            default_branch="main",
+            readme=readme,
+            files=tree,
+        ),
+        "progress": AnalysisProgressUpdate(
+            step=2,
+            step_name="Identifying Configuration Files",
+            status="completed",
+            message="Identified 8 configuration files in 4.2 seconds",
+            progress_percentage=66,
+            elapsed_time=4.2,
+            details={"config_files_count": 8, "config_files": ["package.json", "tsconfig.json", "Dockerfile"]},
+        ),
+    }
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--readme-kb", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'payload':<12}{'bytes':>11}{'stdlib ms':>11}{'pydantic ms':>13}{'dumps ms':>10}{'sse dict ms':>13}{'sse dumps ms':>14}")
+    bodies = {}
+    for name, model in payloads(args.files, args.readme_kb).items():
+        body = dumps(model)
+        bodies[name] = body
+        stdlib = best_of(lambda: json.dumps(jsonable_encoder(model)).encode(), args.repeat)
+        pydantic = best_of(lambda: model.model_dump_json().encode(), args.repeat)
+        fast = best_of(lambda: dumps(model), args.repeat)
+        # The SSE stream used to frame model_dump() dicts with json.dumps.
+        as_dict = model.model_dump()
+        sse_stdlib = best_of(lambda: f"data: {json.dumps(as_dict)}\n\n".encode(), args.repeat)
+        sse_fast = best_of(lambda: sse_event(as_dict), args.repeat)
+        print(f"{name:<12}{len(body):>11}{stdlib:>11.3f}{pydantic:>13.3f}{fast:>10.3f}{sse_stdlib:>13.3f}{sse_fast:>14.3f}")
+
+    print()
+    print(f"{'payload':<12}{'encoding':<14}{'bytes':>11}{'ratio':>8}{'ms':>10}")
+    for name, body in bodies.items():
+        encoders = [("gzip-6", lambda: gzip.compress(body, compresslevel=6))]
+        if brotli is not None:
+            encoders.append(("br-4", lambda: brotli.compress(body, quality=4)))
+        for encoding, compress in encoders:
+            size = len(compress())
+            print(f"{name:<12}{encoding:<14}{size:>11}{len(body) / size:>8.1f}{best_of(compress, args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare tree queries answered by TreeIndex with linear scans over the file list.
+
+The linear scans are what a client (or the agent service) had to do with the
+full list of {"path", "type", "size"} dicts: a directory listing, a
+``**/package.json`` glob, an extension filter, a substring search and a path
+membership test.
+
+Usage (from the backend directory):
+    python benchmarks/bench_tree_index.py --entries 150000
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.file_tree import FileTree  # noqa: E402
+from app.services.tree_index import TreeIndex  # noqa: E402
+from bench_file_tree import synthetic_tree  # noqa: E402
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--entries", type=int, default=150_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    items = synthetic_tree(args.entries)
+    files = [{"path": i["path"], "type": i["type"], "size": i.get("size")} for i in items]
+    tree = FileTree.from_entries((i["path"], i["type"], i.get("size")) for i in items)
+    start = time.perf_counter()
+    index = TreeIndex(tree)
+    print(f"{len(tree)} entries, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    directory = "packages/pkg-0100/src/module_3"
+    target = f"{directory}/file_7.ts"
+    queries = [
+        (
+            "list_dir",
+            lambda: [f for f in files if f["path"].rpartition("/")[0] == directory],
+            lambda: index.list_dir(directory),
+        ),
+        (
+            "glob **/package.json",
+            lambda: [f for f in files if fnmatch.fnmatch("/" + f["path"], "*/package.json")],
+            lambda: index.glob("**/package.json"),
+        ),
+        (
+            "ext .json",
+            lambda: [f for f in files if f["type"] == "blob" and f["path"].lower().endswith(".json")],
+            lambda: index.find_extension("json"),
+        ),
+        (
+            "search 'pkg-0100/src/module_3'",
+            lambda: [f for f in files if "pkg-0100/src/module_3" in f["path"].lower()],
+            lambda: index.search("pkg-0100/src/module_3"),
+        ),
+        (
+            "contains",
+            lambda: target in [f["path"] for f in files],
+            lambda: target in index,
+        ),
+    ]
+    print(f"{'query':<34}{'scan ms':>10}{'index ms':>10}")
+    for name, scan, indexed in queries:
+        print(f"{name:<34}{best_of(scan, args.repeat):>10.3f}{best_of(indexed, args.repeat):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.services.agent import AzureAgentService
+
+FILES = [{"path": "package.json", "type": "blob", "size": 10}]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AzureAgentService.__new__(AzureAgentService)
+    service.endpoint = "https://example.test"
+    service.credential = object()
+    calls = Counter()
+
+    async def config_step(repo_name, files, tree_index, progress_callback):
+        calls["config"] += 1
+        return ["package.json"]
+
+    async def config_contents(config_files, readme_content, dependencies, fetch_file_contents):
+        return {"package.json": "{}"}
+
+    async def manifests(dependencies, files, tree_index, fetch_file_contents):
+        return dependencies
+
+    async def analysis_step(agent_id, repo_name, readme_content, dependencies, progress_callback, on_delta=None, tree_summary=None):
+        calls[f"analysis:{agent_id}"] += 1
+        return f"analysis for {agent_id}", False
+
+    async def setup_step(agent_id, repo_name, file_contents, analysis_start_time, progress_callback, on_delta=None):
+        calls["setup"] += 1
+        return {"dependencies": "npm ci"}, False
+
+    monkeypatch.setattr(service, "_run_config_step", config_step)
+    monkeypatch.setattr(service, "_load_config_contents", config_contents)
+    monkeypatch.setattr(service, "_load_dependency_manifests", manifests)
+    monkeypatch.setattr(service, "_run_analysis_step", analysis_step)
+    monkeypatch.setattr(service, "_run_setup_step", setup_step)
+    service.calls = calls
+    return service
+
+
+def test_batch_runs_shared_steps_once(service):
+    delivered = []
+
+    async def result_callback(agent_id, result):
+        delivered.append(agent_id)
+
+    results = asyncio.run(service.analyze_repository_batch(
+        ["devin", "github-copilot", "codex-cli"], "octo/demo", "# demo", {}, FILES,
+        result_callback=result_callback,
+    ))
+
+    assert service.calls["config"] == 1
+    assert service.calls["setup"] == 1
+    assert all(service.calls[f"analysis:{agent_id}"] == 1 for agent_id in results)
+    assert sorted(delivered) == ["codex-cli", "devin", "github-copilot"]
+    assert results["devin"] == {
+        "analysis": "analysis for devin",
+        "setup_commands": {"dependencies": "npm ci"},
+        "fallback_used": False,
+    }
+    assert results["devin"]["setup_commands"] is not results["codex-cli"]["setup_commands"]
@@ -0,0 +1,43 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.agent_registry import REGISTRY_METADATA, AgentRegistry
+
+
+class FakeAgentsClient:
+    def __init__(self, agents):
+        self.agents = {agent.id: agent for agent in agents}
+        self.deleted = []
+
+    async def create_agent(self, model, name, instructions, metadata):
+        agent = SimpleNamespace(id=f"asst_{len(self.agents)}", metadata=metadata)
+        self.agents[agent.id] = agent
+        return agent
+
+    async def list_agents(self):
+        for agent in list(self.agents.values()):
+            yield agent
+
+    async def delete_agent(self, agent_id):
+        self.deleted.append(agent_id)
+        del self.agents[agent_id]
+
+
+def test_delete_stale_removes_only_foreign_registry_agents():
+    client = FakeAgentsClient([
+        SimpleNamespace(id="asst_left_behind", metadata={**REGISTRY_METADATA, "instructions_sha256": "abc"}),
+        SimpleNamespace(id="asst_by_hand", metadata={}),
+        SimpleNamespace(id="asst_untagged", metadata=None),
+    ])
+    registry = AgentRegistry(idle_ttl_seconds=None)
+
+    async def run():
+        own = await registry._get_agent_id(client, ("config-file-identifier", "hash", "gpt"), "instructions")
+        return own, await registry.delete_stale(client)
+
+    own, deleted = asyncio.run(run())
+
+    assert deleted == 1
+    assert client.deleted == ["asst_left_behind"]
+    assert set(client.agents) == {own, "asst_by_hand", "asst_untagged"}
+    assert registry.stats()["stale_deleted"] == 1
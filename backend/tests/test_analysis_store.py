@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app import main
+from app.services.analysis_cache import MemoryAnalysisCache
+
+SHA = "a" * 40
+RESULT = {"analysis": "Use npm", "setup_commands": {"install": "npm ci"}, "fallback_used": False}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = MemoryAnalysisCache(1024 * 1024, None)
+    monkeypatch.setattr(main, "analysis_cache", lambda: cache)
+    return cache
+
+
+def test_stores_analysis_of_complete_snapshot(cache):
+    asyncio.run(main._store_analysis("key", SHA, RESULT, True))
+
+    stored = asyncio.run(cache.get("key"))
+    assert stored["analysis"] == "Use npm"
+    assert stored["commit_sha"] == SHA
+
+
+def test_skips_analysis_of_incomplete_snapshot(cache):
+    asyncio.run(main._store_analysis("key", SHA, RESULT, False))
+
+    assert asyncio.run(cache.get("key")) is None
+
+
+def test_skips_fallback_analysis(cache):
+    asyncio.run(main._store_analysis("key", SHA, dict(RESULT, fallback_used=True), True))
+
+    assert asyncio.run(cache.get("key")) is None
+
+
+def test_failed_snapshot_is_incomplete(monkeypatch):
+    async def failing_snapshot(self, owner, repo, commit_sha=None):
+        raise RuntimeError("Failed to fetch repository data")
+
+    async def requirements(self, owner, repo, ref=None):
+        return {}
+
+    monkeypatch.setattr(main.GitHubService, "get_repository_snapshot", failing_snapshot)
+    monkeypatch.setattr(main.GitHubService, "get_requirements", requirements)
+
+    *_, complete = asyncio.run(main._fetch_analysis_inputs(main.GitHubService(), "octo", "demo", SHA))
+
+    assert complete is False
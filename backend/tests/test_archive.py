@@ -0,0 +1,71 @@
+import asyncio
+import io
+import tarfile
+
+import httpx
+
+from app.services import github
+from app.services.archive import fetch_archive_files, is_candidate_path
+
+
+def tarball(files):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for path, data in files.items():
+            info = tarfile.TarInfo(f"octo-demo-abc1234/{path}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def fetch(body, **caps):
+    async def run():
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=httpx.ByteStream(body)))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await fetch_archive_files(
+                client, "https://api.github.test/tarball", wanted=is_candidate_path,
+                max_file_bytes=caps.get("max_file_bytes", 1024),
+                max_total_bytes=caps.get("max_total_bytes", 4096),
+                max_download_bytes=1024 * 1024,
+            )
+    return asyncio.run(run())
+
+
+def test_extracts_only_candidate_files():
+    files, skipped = fetch(tarball({"package.json": b"{}", "src/index.js": b"x", "go.mod": b"module x"}))
+
+    assert files == {"package.json": "{}", "go.mod": "module x"}
+    assert skipped == set()
+
+
+def test_reports_files_skipped_for_byte_caps():
+    body = tarball({"package.json": b"x" * 2000, "go.mod": b"y" * 900, "Cargo.toml": b"z" * 900})
+
+    files, skipped = fetch(body, max_file_bytes=1000, max_total_bytes=1000)
+
+    assert files == {"go.mod": "y" * 900}
+    assert skipped == {"package.json", "Cargo.toml"}
+
+
+def test_skipped_candidates_are_read_through_the_contents_api(monkeypatch):
+    monkeypatch.setattr(github, "GITHUB_FETCH_MODE", "archive")
+    requested = []
+
+    async def archive_files(self, owner, repo, ref):
+        return {"go.mod": "module x"}, {"package.json"}
+
+    async def read_from_api(self, owner, repo, path, ref=None):
+        requested.append(path)
+        return '{"name": "big"}' if path == "package.json" else None
+
+    monkeypatch.setattr(github.GitHubService, "_get_archive_files", archive_files)
+    monkeypatch.setattr(github.GitHubService, "_read_file_from_api", read_from_api)
+
+    results, complete = asyncio.run(github.GitHubService()._get_files_content(
+        "octo", "demo", ["go.mod", "package.json", "Cargo.toml"], "a" * 40,
+    ))
+
+    # Cargo.toml is a candidate that was not in the archive, so it does not exist.
+    assert requested == ["package.json"]
+    assert results == {"go.mod": "module x", "package.json": '{"name": "big"}'}
+    assert complete
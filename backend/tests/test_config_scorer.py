@@ -0,0 +1,62 @@
+from app.services.config_scorer import is_config_path, name_weight, score_config_files
+
+
+def blobs(*paths):
+    return [{"path": path, "type": "blob"} for path in paths]
+
+
+def test_name_weight_matches_names_then_globs():
+    assert name_weight("package.json") == 10
+    assert name_weight("requirements-dev.txt") == 7
+    assert name_weight("App.csproj") == 9
+    assert name_weight("notes.txt") is None
+
+
+def test_score_decays_with_depth():
+    selection = score_config_files(blobs("package.json", "web/package.json", "apps/web/package.json"))
+
+    assert selection.paths == ["package.json", "web/package.json", "apps/web/package.json"]
+    assert selection.scores == {"package.json": 10, "web/package.json": 6.667, "apps/web/package.json": 5}
+
+
+def test_workspace_manifest_slows_depth_decay():
+    selection = score_config_files(blobs("pnpm-workspace.yaml", "package.json", "web/package.json"))
+
+    assert selection.scores["web/package.json"] == 8
+
+
+def test_excluded_directories_are_skipped():
+    selection = score_config_files(blobs("package.json", "node_modules/left-pad/package.json", "dist/Dockerfile"))
+
+    assert selection.paths == ["package.json"]
+    assert not is_config_path("node_modules/left-pad/package.json")
+
+
+def test_penalized_directories_are_demoted():
+    selection = score_config_files(blobs("examples/package.json", "Makefile"))
+
+    assert selection.paths == ["Makefile", "examples/package.json"]
+    assert selection.scores["examples/package.json"] == 2
+
+
+def test_files_sharing_a_name_are_capped():
+    packages = [f"packages/p{i}/package.json" for i in range(5)]
+    selection = score_config_files(blobs(*packages))
+
+    assert selection.paths == packages[:3]
+
+
+def test_ci_workflows_are_capped_and_not_decayed():
+    workflows = [f".github/workflows/w{i}.yml" for i in range(5)]
+    selection = score_config_files(blobs(*workflows, ".github/workflows/notes.md"))
+
+    assert selection.paths == workflows[:3]
+    assert set(selection.scores.values()) == {5}
+
+
+def test_limit_and_confidence():
+    selection = score_config_files(blobs("package.json", "README.md", "Dockerfile", "tsconfig.json"), limit=2)
+
+    assert selection.paths == ["package.json", "Dockerfile"]
+    assert selection.confidence == 0.85
+    assert score_config_files(blobs("docs/notes.txt")).confidence == 0
@@ -0,0 +1,176 @@
+import json
+
+from app.services.dependency_parser import find_manifests, parse_manifest, parse_manifests, summarize_dependencies, workspace_manifests
+from app.services.file_tree import FileTree
+from app.services.tree_index import TreeIndex
+
+
+def parsed(path, content):
+    return [(d.name, d.version_spec, d.scope, d.ecosystem) for d in parse_manifest(path, content)]
+
+
+def index(*paths):
+    return TreeIndex(FileTree.from_entries((path, "blob", None) for path in paths))
+
+
+def test_requirements_txt():
+    content = "requests>=2.31  # http\nuvicorn[standard]==0.30\n-r base.txt\n# comment\ngit+https://example.com/x.git\nrich\n"
+
+    assert parsed("requirements.txt", content) == [
+        ("requests", ">=2.31", "runtime", "pypi"),
+        ("uvicorn", "==0.30", "runtime", "pypi"),
+        ("rich", None, "runtime", "pypi"),
+    ]
+    assert parsed("requirements-dev.txt", "pytest\n") == [("pytest", None, "dev", "pypi")]
+
+
+def test_pyproject_project_and_poetry_tables():
+    content = """
+[build-system]
+requires = ["hatchling"]
+
+[project]
+dependencies = ["httpx>=0.27"]
+optional-dependencies = { test = ["pytest"], s3 = ["boto3"] }
+
+[tool.poetry.dependencies]
+python = "^3.10"
+fastapi = "*"
+uvloop = { version = "^0.19", optional = true }
+
+[tool.poetry.group.lint.dependencies]
+ruff = "^0.5"
+"""
+
+    assert parsed("pyproject.toml", content) == [
+        ("httpx", ">=0.27", "runtime", "pypi"),
+        ("pytest", None, "dev", "pypi"),
+        ("boto3", None, "optional", "pypi"),
+        ("hatchling", None, "build", "pypi"),
+        ("fastapi", None, "runtime", "pypi"),
+        ("uvloop", "^0.19", "optional", "pypi"),
+        ("ruff", "^0.5", "dev", "pypi"),
+    ]
+
+
+def test_pipfile():
+    content = '[packages]\nflask = "*"\n\n[dev-packages]\npytest = ">=8"\n'
+
+    assert parsed("Pipfile", content) == [("flask", None, "runtime", "pypi"), ("pytest", ">=8", "dev", "pypi")]
+
+
+def test_package_json():
+    content = json.dumps({"dependencies": {"react": "^18.0.0"}, "devDependencies": {"vite": "^5"}, "peerDependencies": {"react-dom": "*"}})
+
+    assert parsed("web/package.json", content) == [
+        ("react", "^18.0.0", "runtime", "npm"),
+        ("vite", "^5", "dev", "npm"),
+        ("react-dom", "*", "peer", "npm"),
+    ]
+
+
+def test_go_mod():
+    content = "module example.com/demo\n\ngo 1.22\n\nrequire github.com/a/b v1.0.0\n\nrequire (\n\tgithub.com/c/d v0.2.0\n\tgolang.org/x/e v0.1.0 // indirect\n)\n"
+
+    assert parsed("go.mod", content) == [
+        ("github.com/a/b", "v1.0.0", "runtime", "go"),
+        ("github.com/c/d", "v0.2.0", "runtime", "go"),
+        ("golang.org/x/e", "v0.1.0", "indirect", "go"),
+    ]
+
+
+def test_cargo_toml():
+    content = """
+[dependencies]
+serde = { version = "1", features = ["derive"] }
+tokio = { workspace = true }
+rand = { package = "rand_core", version = "0.6", optional = true }
+
+[dev-dependencies]
+insta = "1.39"
+
+[target.'cfg(unix)'.build-dependencies]
+cc = "1.0"
+"""
+
+    assert parsed("Cargo.toml", content) == [
+        ("serde", "1", "runtime", "cargo"),
+        ("tokio", "workspace", "runtime", "cargo"),
+        ("rand_core", "0.6", "optional", "cargo"),
+        ("insta", "1.39", "dev", "cargo"),
+        ("cc", "1.0", "build", "cargo"),
+    ]
+
+
+def test_pom_xml_substitutes_properties():
+    content = """<?xml version="1.0"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <version>2.1.0</version>
+  <properties>
+    <spring.version>6.1.3</spring.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency><groupId>org.managed</groupId><artifactId>pinned</artifactId><version>1.0</version></dependency>
+    </dependencies>
+  </dependencyManagement>
+  <dependencies>
+    <dependency><groupId>org.springframework</groupId><artifactId>spring-core</artifactId><version>${spring.version}</version></dependency>
+    <dependency><groupId>com.example</groupId><artifactId>sibling</artifactId><version>${project.version}</version></dependency>
+    <dependency><groupId>junit</groupId><artifactId>junit</artifactId><version>${junit.version}</version><scope>test</scope></dependency>
+    <dependency><groupId>javax.servlet</groupId><artifactId>servlet-api</artifactId><scope>provided</scope></dependency>
+  </dependencies>
+</project>
+"""
+
+    assert parsed("pom.xml", content) == [
+        ("org.springframework:spring-core", "6.1.3", "runtime", "maven"),
+        ("com.example:sibling", "2.1.0", "runtime", "maven"),
+        ("junit:junit", "${junit.version}", "dev", "maven"),
+        ("javax.servlet:servlet-api", None, "build", "maven"),
+    ]
+
+
+def test_gradle():
+    content = 'dependencies {\n    implementation("com.squareup.okhttp3:okhttp:4.12.0")\n    testImplementation \'junit:junit:4.13.2\'\n    kapt "com.google.dagger:dagger-compiler"\n}\n'
+
+    assert parsed("build.gradle.kts", content) == [
+        ("com.squareup.okhttp3:okhttp", "4.12.0", "runtime", "maven"),
+        ("junit:junit", "4.13.2", "dev", "maven"),
+        ("com.google.dagger:dagger-compiler", None, "build", "maven"),
+    ]
+
+
+def test_unparseable_and_unknown_manifests_yield_nothing():
+    assert parsed("package.json", "{not json") == []
+    assert parsed("Gemfile", "gem 'rails'") == []
+
+
+def test_parse_manifests_goes_shallowest_first():
+    dependencies = parse_manifests({"web/package.json": json.dumps({"dependencies": {"react": "18"}}), "requirements.txt": "flask\n"})
+
+    assert [d.manifest for d in dependencies] == ["requirements.txt", "web/package.json"]
+    assert summarize_dependencies(dependencies) == "requirements.txt (pypi) runtime: flask\nweb/package.json (npm) runtime: react 18"
+
+
+def test_find_manifests_skips_vendored_directories():
+    tree_index = index("package.json", "web/package.json", "node_modules/x/package.json", "api/requirements-dev.txt", "README.md")
+
+    assert find_manifests(tree_index, 10) == (["package.json", "api/requirements-dev.txt", "web/package.json"], False)
+    assert find_manifests(tree_index, 1) == (["package.json"], True)
+
+
+def test_npm_workspace_members():
+    tree_index = index("package.json", "packages/a/package.json", "packages/b/package.json", "packages/b/src/index.js", "tools/package.json")
+    root = json.dumps({"workspaces": ["packages/*"]})
+
+    assert workspace_manifests({"package.json": root}, tree_index) == ["packages/a/package.json", "packages/b/package.json"]
+    yarn_root = json.dumps({"workspaces": {"packages": ["tools"]}})
+    assert workspace_manifests({"package.json": yarn_root}, tree_index) == ["tools/package.json"]
+
+
+def test_pnpm_workspace_members():
+    tree_index = index("package.json", "apps/web/package.json", "libs/ui/package.json", "docs/package.json")
+    workspace = "packages:\n  - 'apps/*'\n  - \"libs/*\"  # shared\n  - '!docs'\ncatalog:\n  - 'docs'\n"
+
+    assert workspace_manifests({"pnpm-workspace.yaml": workspace}, tree_index) == ["apps/web/package.json", "libs/ui/package.json"]
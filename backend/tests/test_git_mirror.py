@@ -0,0 +1,184 @@
+import asyncio
+import os
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import github
+from app.services.file_tree import FileTree
+from app.services.git_mirror import GitMirror, GitMirrorError
+
+OWNER = "octo"
+REPO = "demo"
+
+
+def run_git(cwd, *args: str) -> str:
+    result = subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    )
+    return result.stdout.strip()
+
+
+def commit_files(work, files, message: str) -> str:
+    for path, content in files.items():
+        full_path = os.path.join(work, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(content)
+    run_git(work, "add", "-A")
+    run_git(work, "commit", "--quiet", "-m", message)
+    run_git(work, "push", "--quiet", "origin", "HEAD:refs/heads/main")
+    return run_git(work, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """A bare repository served over file:// with partial clone support, plus a work tree pushing to it."""
+    bare = tmp_path / "remotes" / OWNER / f"{REPO}.git"
+    bare.parent.mkdir(parents=True)
+    run_git(tmp_path, "init", "--quiet", "--bare", str(bare))
+    run_git(bare, "config", "uploadpack.allowFilter", "true")
+    run_git(bare, "config", "uploadpack.allowAnySHA1InWant", "true")
+    work = tmp_path / "work"
+    run_git(tmp_path, "init", "--quiet", str(work))
+    run_git(work, "remote", "add", "origin", str(bare))
+    return SimpleNamespace(
+        work=str(work),
+        template="file://" + str(tmp_path / "remotes") + "/{owner}/{repo}.git",
+    )
+
+
+@pytest.fixture
+def mirror(tmp_path, remote):
+    return GitMirror(str(tmp_path / "mirrors"), remote.template)
+
+
+def test_first_clone_creates_bare_mirror(remote, mirror):
+    sha = commit_files(remote.work, {"README.md": b"# demo\n"}, "initial")
+
+    path = asyncio.run(mirror.ensure_commit(OWNER, REPO, sha))
+
+    assert path == mirror.mirror_path(OWNER, REPO)
+    assert run_git(path, "rev-parse", "--is-bare-repository") == "true"
+    assert run_git(path, "config", "remote.origin.partialclonefilter") == "blob:none"
+
+
+def test_fetches_new_commits_and_older_non_tip_commits(remote, mirror):
+    first = commit_files(remote.work, {"a.txt": b"a\n"}, "first")
+    second = commit_files(remote.work, {"b.txt": b"b\n"}, "second")
+    asyncio.run(mirror.ensure_commit(OWNER, REPO, second))
+
+    # Pushed after the clone: found only after an incremental fetch.
+    third = commit_files(remote.work, {"c.txt": b"c\n"}, "third")
+    asyncio.run(mirror.ensure_commit(OWNER, REPO, third))
+    # Not a ref tip any more, but present in the mirror's history.
+    asyncio.run(mirror.ensure_commit(OWNER, REPO, first))
+
+    with pytest.raises(GitMirrorError):
+        asyncio.run(mirror.ensure_commit(OWNER, REPO, "0" * 40))
+
+
+def test_list_tree_builds_file_tree(remote, mirror):
+    sha = commit_files(remote.work, {"README.md": b"x", "src/app/main.py": b"y"}, "tree")
+
+    entries = asyncio.run(mirror.list_tree(OWNER, REPO, sha))
+    tree = FileTree.from_entries((path, entry_type, None) for path, entry_type in entries)
+
+    assert sorted(entries) == [
+        ("README.md", "blob"),
+        ("src", "tree"),
+        ("src/app", "tree"),
+        ("src/app/main.py", "blob"),
+    ]
+    assert sorted(tree.paths()) == ["README.md", "src", "src/app", "src/app/main.py"]
+
+
+def test_read_files_skips_missing_trees_and_binary(remote, mirror):
+    sha = commit_files(
+        remote.work,
+        {"package.json": b'{"name": "demo"}\n', "src/x.py": b"print(1)\n", "logo.bin": b"\xff\xfe\x00"},
+        "files",
+    )
+
+    files = asyncio.run(mirror.read_files(
+        OWNER, REPO, sha, ["package.json", "missing.txt", "src", "logo.bin", "src/x.py"],
+    ))
+
+    assert files == {"package.json": '{"name": "demo"}\n', "src/x.py": "print(1)\n"}
+
+
+def test_git_not_installed_raises_mirror_error(monkeypatch, tmp_path, mirror):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+
+    with pytest.raises(GitMirrorError):
+        asyncio.run(mirror.ensure_commit(OWNER, REPO, "0" * 40))
+
+
+@pytest.fixture
+def mirror_mode(monkeypatch):
+    monkeypatch.setattr(github, "GITHUB_FETCH_MODE", "mirror")
+
+
+def test_file_reads_fall_back_to_rest_when_git_is_missing(monkeypatch, tmp_path, mirror, mirror_mode):
+    monkeypatch.setattr(github, "git_mirror", lambda: mirror)
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+
+    async def read_from_api(self, owner, repo, path, ref=None):
+        return f"api:{path}"
+
+    monkeypatch.setattr(github.GitHubService, "_read_file_from_api", read_from_api)
+    monkeypatch.setattr(github.GitHubService, "_get_file_content_from_api", read_from_api)
+    service = github.GitHubService()
+    sha = "a" * 40
+
+    assert asyncio.run(service.get_file_content(OWNER, REPO, "package.json", sha)) == "api:package.json"
+    assert asyncio.run(service.get_files_content(OWNER, REPO, ["a", "b"], sha)) == {"a": "api:a", "b": "api:b"}
+
+
+def test_file_tree_falls_back_to_trees_api_when_git_fails(monkeypatch, tmp_path, mirror_mode):
+    # The remote does not exist, so the clone fails.
+    monkeypatch.setattr(github, "git_mirror", lambda: GitMirror(str(tmp_path / "mirrors"), str(tmp_path / "nowhere")))
+
+    async def get_tree(**kwargs):
+        return SimpleNamespace(json=lambda: {"tree": [{"path": "README.md", "type": "blob", "size": 3}]})
+
+    client = SimpleNamespace(rest=SimpleNamespace(git=SimpleNamespace(async_get_tree=get_tree)))
+    monkeypatch.setattr(github, "gh", lambda: client)
+    monkeypatch.setattr(github, "github_semaphore", lambda: asyncio.Semaphore(1))
+
+    tree = asyncio.run(github.GitHubService().get_file_tree(OWNER, REPO, "a" * 40))
+
+    assert tree is not None
+    assert list(tree.entries()) == [("README.md", "blob", 3)]
+
+
+def test_read_files_prefetches_missing_blobs_in_one_fetch(remote, mirror, monkeypatch):
+    sha = commit_files(remote.work, {"a.json": b"1", "b/c.json": b"2", "d[x].txt": b"3", "other.txt": b"4"}, "files")
+    path = asyncio.run(mirror.ensure_commit(OWNER, REPO, sha))
+    commands = []
+    git = mirror._git
+
+    async def recording_git(path, *args, input=None):
+        if args[0] != "for-each-ref":
+            commands.append(args)
+        return await git(path, *args, input=input)
+
+    monkeypatch.setattr(mirror, "_git", recording_git)
+
+    files = asyncio.run(mirror.read_files(OWNER, REPO, sha, ["a.json", "b/c.json", "d[x].txt"]))
+
+    assert files == {"a.json": "1", "b/c.json": "2", "d[x].txt": "3"}
+    assert [args[0] for args in commands] == ["rev-list", "fetch", "cat-file"]
+    assert "--stdin" in commands[1]
+    missing = run_git(path, "rev-list", "--objects", "--no-walk", "--missing=print", sha)
+    # Only the blob that was not asked for is still missing.
+    assert [line for line in missing.split() if line.startswith("?")] == [
+        "?" + run_git(remote.work, "rev-parse", f"{sha}:other.txt"),
+    ]
+
+    commands.clear()
+    asyncio.run(mirror.read_files(OWNER, REPO, sha, ["a.json"]))
+
+    assert [args[0] for args in commands] == ["rev-list", "cat-file"]
@@ -0,0 +1,200 @@
+import asyncio
+import gzip
+import threading
+import time
+from typing import Any, Dict, List
+
+import httpx
+import pytest
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.services.github_http import ConditionalRequestTransport
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class FakeGitHub:
+    """Minimal GitHub REST stand-in that honours If-None-Match and records requests."""
+
+    def __init__(self) -> None:
+        self.requests: List[Dict[str, Any]] = []
+        self.etag = '"v1"'
+        self.body = b'{"full_name": "octo/demo"}'
+        self.cache_control = "private, max-age=0"
+        routes = [
+            Route("/repos/{owner}/{repo}", self.resource),
+            Route("/repos/{owner}/{repo}/contents/{path:path}", self.gzipped),
+            Route("/repos/{owner}/{repo}/branches/{branch}", self.resource),
+            Route("/repos/{owner}/{repo}/languages", self.missing),
+            Route("/rate_limit", self.resource),
+        ]
+        self.app = Starlette(routes=routes)
+
+    def _record(self, request: Request) -> None:
+        self.requests.append({"path": request.url.path, "headers": dict(request.headers)})
+
+    def _headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Last-Modified": LAST_MODIFIED, "Cache-Control": self.cache_control}
+
+    async def resource(self, request: Request) -> Response:
+        self._record(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=self._headers())
+        return Response(self.body, media_type="application/json", headers=self._headers())
+
+    async def gzipped(self, request: Request) -> Response:
+        self._record(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=self._headers())
+        headers = dict(self._headers(), **{"Content-Encoding": "gzip"})
+        return Response(gzip.compress(self.body), media_type="application/json", headers=headers)
+
+    async def missing(self, request: Request) -> Response:
+        self._record(request)
+        return Response(b'{"message": "Not Found"}', status_code=404, headers=self._headers())
+
+
+@pytest.fixture(scope="module")
+def server():
+    fake = FakeGitHub()
+    uv = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=uv.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not uv.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake GitHub server did not start")
+        time.sleep(0.01)
+    port = uv.servers[0].sockets[0].getsockname()[1]
+    fake.base_url = f"http://127.0.0.1:{port}"
+    yield fake
+    uv.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def fake(server):
+    server.requests.clear()
+    server.etag = '"v1"'
+    server.body = b'{"full_name": "octo/demo"}'
+    server.cache_control = "private, max-age=0"
+    return server
+
+
+def fetch(fake: FakeGitHub, transport: ConditionalRequestTransport, *paths: str) -> List[httpx.Response]:
+    async def run() -> List[httpx.Response]:
+        async with httpx.AsyncClient(base_url=fake.base_url, transport=transport) as client:
+            return [await client.get(path) for path in paths]
+    return asyncio.run(run())
+
+
+def new_transport(**kwargs: Any) -> ConditionalRequestTransport:
+    return ConditionalRequestTransport(httpx.AsyncHTTPTransport(), max_bytes=1024 * 1024, **kwargs)
+
+
+def test_sends_validators_after_first_response(fake):
+    transport = new_transport()
+
+    first, second = fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    assert "if-none-match" not in fake.requests[0]["headers"]
+    assert fake.requests[1]["headers"]["if-none-match"] == '"v1"'
+    assert fake.requests[1]["headers"]["if-modified-since"] == LAST_MODIFIED
+    assert first.json() == second.json() == {"full_name": "octo/demo"}
+
+
+def test_replays_stored_body_on_304(fake):
+    transport = new_transport()
+
+    _, second = fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    assert second.status_code == 200
+    assert second.content == b'{"full_name": "octo/demo"}'
+    assert transport.not_modified == 1
+
+
+def test_replays_gzip_encoded_body_on_304(fake):
+    transport = new_transport()
+
+    first, second = fetch(fake, transport, "/repos/octo/demo/contents/a.json", "/repos/octo/demo/contents/a.json")
+
+    assert first.headers["content-encoding"] == "gzip"
+    assert second.status_code == 200
+    assert second.json() == {"full_name": "octo/demo"}
+    assert transport.not_modified == 1
+
+
+def test_changed_resource_replaces_stored_entry(fake):
+    transport = new_transport()
+    fetch(fake, transport, "/repos/octo/demo")
+    fake.etag = '"v2"'
+    fake.body = b'{"full_name": "octo/renamed"}'
+
+    second, third = fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    assert second.json() == third.json() == {"full_name": "octo/renamed"}
+    assert fake.requests[-1]["headers"]["if-none-match"] == '"v2"'
+
+
+def test_serves_fresh_entries_without_a_request(fake):
+    fake.cache_control = "private, max-age=60"
+    transport = new_transport()
+
+    _, second = fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    assert len(fake.requests) == 1
+    assert second.json() == {"full_name": "octo/demo"}
+    assert transport.hits == 1
+
+
+def test_branch_lookups_always_revalidate(fake):
+    fake.cache_control = "private, max-age=60"
+    transport = new_transport()
+
+    _, second = fetch(fake, transport, "/repos/octo/demo/branches/main", "/repos/octo/demo/branches/main")
+
+    assert len(fake.requests) == 2
+    assert fake.requests[1]["headers"]["if-none-match"] == '"v1"'
+    assert second.json() == {"full_name": "octo/demo"}
+    assert (transport.hits, transport.not_modified) == (0, 1)
+
+
+def test_max_age_can_be_ignored(fake):
+    fake.cache_control = "private, max-age=60"
+    transport = new_transport(honor_max_age=False)
+
+    fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    assert len(fake.requests) == 2
+    assert transport.not_modified == 1
+
+
+def test_does_not_cache_other_paths_or_errors(fake):
+    transport = new_transport()
+
+    fetch(
+        fake, transport,
+        "/rate_limit", "/rate_limit",
+        "/repos/octo/demo/languages", "/repos/octo/demo/languages",
+    )
+
+    assert all("if-none-match" not in request["headers"] for request in fake.requests)
+    assert len(fake.requests) == 4
+    assert transport.stats()["store"]["entries"] == 0
+
+
+def test_counters(fake):
+    transport = new_transport()
+    fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+    fake.cache_control = "private, max-age=60"
+    fetch(fake, transport, "/repos/octo/demo", "/repos/octo/demo")
+
+    stats = transport.stats()
+
+    # miss, 304, 304 (now fresh for 60s), hit
+    assert (stats["hits"], stats["misses"], stats["not_modified"]) == (1, 1, 2)
+    assert stats["quota_saved"] == 3
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.services import jobs
+from app.services.jobs import JobManager, JobQueueFull
+
+
+def test_worker_pool_bounds_running_jobs():
+    running = []
+    peak = []
+
+    async def run(flight):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return "done"
+
+    async def scenario():
+        manager = JobManager(max_workers=2, max_queue=10)
+        submitted = [manager.submit(f"key{i}", "test", {}, run)[0] for i in range(5)]
+        await asyncio.sleep(0)
+        stats = manager.stats()
+        await asyncio.gather(*(job.flight.wait() for job in submitted))
+        return manager, submitted, stats
+
+    manager, submitted, stats = asyncio.run(scenario())
+    assert max(peak) == 2
+    assert (stats["running"], stats["queued"]) == (2, 3)
+    assert [job.status for job in submitted] == ["completed"] * 5
+    assert manager.stats()["running"] == manager.stats()["queued"] == 0
+
+
+def test_full_queue_rejects_new_jobs():
+    async def run(flight):
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queue=2)
+        manager.submit("a", "test", {}, run)
+        manager.submit("b", "test", {}, run)
+        with pytest.raises(JobQueueFull):
+            manager.submit("c", "test", {}, run)
+        # Joining an active job needs no queue slot
+        job, joined = manager.submit("a", "test", {}, run)
+        assert joined
+
+    asyncio.run(scenario())
+
+
+def test_same_key_joins_the_active_job():
+    calls = []
+
+    async def run(flight):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        manager = JobManager(max_workers=2, max_queue=2)
+        first, joined_first = manager.submit("key", "test", {}, run)
+        second, joined_second = manager.submit("key", "test", {}, run)
+        await first.flight.wait()
+        third, joined_third = manager.submit("key", "test", {}, run)
+        await third.flight.wait()
+        return first, second, third, (joined_first, joined_second, joined_third)
+
+    first, second, third, joined = asyncio.run(scenario())
+    assert second is first and third is not first
+    assert joined == (False, True, False)
+    assert len(calls) == 2
+
+
+def test_finished_jobs_are_pruned_by_count_and_age(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queue=10, retention_seconds=60, history_max=2)
+        recorded = [manager.record(f"key{i}", "test", {}, i) for i in range(3)]
+        # The oldest finished job goes once more than history_max are kept
+        kept_by_count = [manager.get(job.id) is not None for job in recorded]
+        now[0] += 61
+        fresh = manager.record("fresh", "test", {}, "fresh")
+        kept_by_age = [manager.get(job.id) is not None for job in recorded + [fresh]]
+        return kept_by_count, kept_by_age
+
+    kept_by_count, kept_by_age = asyncio.run(scenario())
+    assert kept_by_count == [False, True, True]
+    assert kept_by_age == [False, False, False, True]
+
+
+def test_running_jobs_are_never_pruned():
+    async def run(flight):
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queue=10, retention_seconds=0, history_max=0)
+        job, _ = manager.submit("key", "test", {}, run)
+        present_while_running = manager.get(job.id) is job
+        await job.flight.wait()
+        return present_while_running, manager.get(job.id)
+
+    present_while_running, after = asyncio.run(scenario())
+    assert present_while_running
+    assert after is None
+
+
+def test_background_job_survives_its_subscribers_leaving():
+    async def run(flight):
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        manager = JobManager(max_workers=1, max_queue=10)
+        watched, _ = manager.submit("watched", "test", {}, run)
+        background, _ = manager.submit("background", "test", {}, run, background=True)
+        for job in (watched, background):
+            job.flight.unsubscribe(job.flight.subscribe())
+        await asyncio.sleep(0.05)
+        return watched, background
+
+    watched, background = asyncio.run(scenario())
+    assert watched.status == "cancelled"
+    assert background.status == "completed"
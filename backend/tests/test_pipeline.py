@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services.pipeline import Stage, run_stages
+
+
+def test_stages_get_their_dependencies_results():
+    async def run():
+        return await run_stages([
+            Stage("sum", lambda results: asyncio.sleep(0, results["a"] + results["b"]), depends_on=("a", "b")),
+            Stage("a", lambda _: asyncio.sleep(0, 1)),
+            Stage("b", lambda _: asyncio.sleep(0, 2)),
+        ])
+
+    assert asyncio.run(run()) == {"a": 1, "b": 2, "sum": 3}
+
+
+def test_independent_stages_run_concurrently():
+    running = []
+    peak = []
+
+    async def step(_):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    asyncio.run(run_stages([Stage("a", step), Stage("b", step), Stage("c", step)]))
+
+    assert max(peak) == 3
+
+
+def test_failing_stage_cancels_running_stages_and_skips_dependents():
+    events = []
+
+    async def fail(_):
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def slow(_):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("slow cancelled")
+            raise
+
+    async def dependent(_):
+        events.append("dependent started")
+
+    stages = [Stage("fail", fail), Stage("slow", slow), Stage("dependent", dependent, depends_on=("fail",))]
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run_stages(stages))
+
+    assert events == ["slow cancelled"]
+
+
+def test_cancelling_the_caller_cancels_running_stages():
+    cancelled = []
+
+    async def slow(_):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        task = asyncio.create_task(run_stages([Stage("a", slow), Stage("b", slow)]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert cancelled == [True, True]
+
+
+def test_invalid_graphs_are_rejected():
+    async def noop(_):
+        return None
+
+    with pytest.raises(ValueError, match="unique"):
+        asyncio.run(run_stages([Stage("a", noop), Stage("a", noop)]))
+    with pytest.raises(ValueError, match="unknown stages: b"):
+        asyncio.run(run_stages([Stage("a", noop, depends_on=("b",))]))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_stages([Stage("a", noop, depends_on=("b",)), Stage("b", noop, depends_on=("a",))]))
@@ -0,0 +1,77 @@
+import pytest
+
+from app.services import prompt_packer
+from app.services.prompt_packer import PromptPart, pack_prompt
+
+# Token counts are estimated at four characters per token; a part titled
+# "a" or "b" costs four tokens of overhead for its title and code fence.
+OVERHEAD = 4
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    monkeypatch.setattr(prompt_packer, "_encoding", lambda: None)
+
+
+def body(tokens):
+    return "x" * (tokens * 4)
+
+
+def test_parts_fit_in_input_order():
+    packed = pack_prompt("test", "HEAD", [PromptPart("a", body(10), 1), PromptPart("b", body(10), 0)], "", 100)
+
+    assert packed.included == ["a", "b"]
+    assert packed.text.index("a:\n") < packed.text.index("b:\n")
+    assert packed.tokens == 1 + 2 * (OVERHEAD + 10)
+    assert packed.truncated == packed.dropped == []
+
+
+def test_higher_priority_parts_get_budget_first():
+    budget = 1 + OVERHEAD + 100 + OVERHEAD + 30
+    packed = pack_prompt("test", "HEAD", [PromptPart("a", body(100), 1), PromptPart("b", body(100), 0)], "", budget)
+
+    assert packed.included == ["b"]
+    assert packed.dropped == ["a"]
+    assert body(100) in packed.text
+
+
+def test_part_that_does_not_fit_is_truncated():
+    budget = 1 + OVERHEAD + 80
+    packed = pack_prompt("test", "HEAD", [PromptPart("a", body(100), 0)], "", budget)
+
+    assert packed.truncated == ["a"]
+    # Four tokens of the cut part go to the truncation marker
+    assert "x" * (76 * 4) + "\n... [truncated]\n```" in packed.text
+    assert packed.tokens <= budget
+
+
+def test_truncation_prefers_a_line_break():
+    text = "\n".join("y" * 39 for _ in range(20))
+    packed = pack_prompt("test", "", [PromptPart("a", text, 0)], "", OVERHEAD + 100)
+
+    kept = packed.text.split("```\n", 1)[1].split("\n... [truncated]")[0]
+    assert kept.endswith("y" * 39)
+    assert set(kept.split("\n")) == {"y" * 39}
+
+
+def test_max_tokens_caps_a_single_part():
+    packed = pack_prompt("test", "", [PromptPart("a", body(200), 0, max_tokens=70), PromptPart("b", body(50), 1)], "", 1000)
+
+    assert packed.truncated == ["a"]
+    assert packed.included == ["a", "b"]
+    assert body(50) in packed.text
+
+
+def test_header_and_footer_are_always_included():
+    packed = pack_prompt("test", "HEAD\n", [PromptPart("a", body(100), 0)], "FOOT", 10)
+
+    assert packed.text == "HEAD\nFOOT"
+    assert packed.dropped == ["a"]
+
+
+def test_prints_only_when_parts_are_cut(capsys):
+    pack_prompt("test", "", [PromptPart("a", body(10), 0)], "", 100)
+    assert capsys.readouterr().out == ""
+
+    pack_prompt("test", "", [PromptPart("a", body(100), 0)], "", 80)
+    assert "1 truncated" in capsys.readouterr().out
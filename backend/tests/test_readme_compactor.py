@@ -0,0 +1,90 @@
+from app.services.readme_compactor import compact_readme, split_sections
+
+README = """\
+# Demo
+
+[![CI](https://ci.example/badge.svg)](https://ci.example)
+
+A tool for demos. See the [docs](https://docs.example).
+
+## Features
+
+- Fast
+
+## License
+
+MIT
+
+### Third-party notices
+
+Some text
+
+## Installation
+
+```sh
+pip install demo
+```
+
+### From source
+
+```sh
+pip install -e .
+```
+
+## Usage
+
+```sh
+pip install demo
+```
+
+Run `demo`.
+"""
+
+
+def headings(sections):
+    return [(section.heading, section.level, section.key) for section in sections]
+
+
+def test_split_sections_at_headings():
+    sections = split_sections("Intro\n\n# Title\ntext\n## Install\nsteps\n### From source\nmore\n## Other\nrest\n")
+
+    assert headings(sections) == [
+        ("", 0, True),
+        ("Title", 1, False),
+        ("Install", 2, True),
+        ("From source", 3, True),
+        ("Other", 2, False),
+    ]
+    assert sections[2].lines == ["## Install", "steps"]
+
+
+def test_title_opening_the_document_is_key():
+    sections = split_sections("# Demo\nintro\n## Notes\ntext\n")
+
+    assert headings(sections) == [("Demo", 1, True), ("Notes", 2, False)]
+
+
+def test_hash_lines_inside_code_fences_are_not_headings():
+    sections = split_sections("# Demo\n```sh\n# install it\npip install demo\n```\n~~~\n# not a heading\n~~~\n")
+
+    assert headings(sections) == [("Demo", 1, True)]
+
+
+def test_compact_drops_noise_and_reorders_key_sections():
+    compacted = compact_readme(README)
+
+    assert "badge" not in compacted
+    assert "See the docs." in compacted
+    assert "License" not in compacted and "Third-party" not in compacted
+    assert compacted.index("## Installation") < compacted.index("### From source") < compacted.index("## Usage") < compacted.index("## Features")
+    # The repeated code block is kept once
+    assert compacted.count("pip install demo") == 1
+
+
+def test_compact_cuts_long_tables():
+    table = "\n".join(["| a | b |", "|---|---|"] + [f"| {i} | {i} |" for i in range(20)])
+    compacted = compact_readme(f"# Demo\n\n{table}\n")
+
+    rows = [line for line in compacted.splitlines() if line.startswith("|")]
+    assert len(rows) == 9
+    assert rows[-1] == "| ... |"
@@ -0,0 +1,31 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from githubkit import GitHub
+
+from app import main
+from app.services import github
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    api = GitHub(base_url="https://api.github.test", async_transport=httpx.MockTransport(handler), http_cache=False)
+    monkeypatch.setattr(github, "gh", lambda: api)
+    return TestClient(main.app)
+
+
+def test_repo_info_of_unknown_repository_is_404(client):
+    response = client.get("/api/repo-info/octo/missing")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Repository not found"}
+
+
+def test_repo_info_stream_of_unknown_repository_is_404(client):
+    response = client.get("/api/repo-info/octo/missing/stream")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Repository not found"}
@@ -0,0 +1,107 @@
+import json
+
+from app.services.setup_extractor import extract_setup_commands
+
+PACKAGE_JSON = json.dumps({
+    "packageManager": "pnpm@9.0.0",
+    "engines": {"node": ">=20"},
+    "scripts": {"dev": "vite", "start": "node server.js", "lint": "eslint .", "test": "vitest"},
+})
+
+PYPROJECT = """
+[project]
+name = "demo"
+requires-python = ">=3.10"
+optional-dependencies = { dev = ["pytest"] }
+
+[project.scripts]
+demo = "demo.cli:main"
+
+[tool.ruff]
+line-length = 100
+
+[tool.pytest.ini_options]
+addopts = "-q"
+"""
+
+MAKEFILE = """
+install:
+\tpip install -e .
+test:
+\tpytest
+lint:
+\truff check .
+"""
+
+WORKFLOW = """
+jobs:
+  test:
+    steps:
+      - uses: actions/setup-python@v5
+        with:
+          python-version: "3.12"
+      - run: pip install -e .
+      - run: |
+          ruff check .
+          pytest -x
+"""
+
+
+def test_package_json_scripts_and_engines():
+    extraction = extract_setup_commands({"package.json": PACKAGE_JSON})
+
+    assert extraction.commands["prerequisites"] == "Node.js >=20\npnpm"
+    assert extraction.commands["dependencies"] == "pnpm install"
+    assert extraction.commands["run_app"] == "pnpm dev"
+    assert extraction.commands["linting"] == "pnpm lint"
+    assert extraction.commands["testing"] == "pnpm test"
+    assert extraction.missing == []
+
+
+def test_pyproject_tools():
+    extraction = extract_setup_commands({"pyproject.toml": PYPROJECT})
+
+    assert extraction.commands == {
+        "prerequisites": "Python >=3.10",
+        "dependencies": 'pip install -e ".[dev]"',
+        "run_app": "demo",
+        "linting": "ruff check .",
+        "testing": "pytest",
+    }
+
+
+def test_task_runner_targets_win_over_manifests():
+    extraction = extract_setup_commands({"pyproject.toml": PYPROJECT, "Makefile": MAKEFILE})
+
+    assert extraction.commands["dependencies"] == "make install"
+    assert extraction.commands["testing"] == "make test"
+    assert extraction.commands["linting"] == "make lint"
+    assert extraction.sources["testing"] == ["Makefile"]
+
+
+def test_ci_steps_fill_gaps_only():
+    extraction = extract_setup_commands({".github/workflows/ci.yml": WORKFLOW})
+
+    assert extraction.commands["prerequisites"] == "Python 3.12"
+    assert extraction.commands["dependencies"] == "pip install -e ."
+    assert extraction.commands["linting"] == "ruff check ."
+    assert extraction.commands["testing"] == "pytest -x"
+
+    with_manifest = extract_setup_commands({".github/workflows/ci.yml": WORKFLOW, "pyproject.toml": PYPROJECT})
+    assert with_manifest.commands["testing"] == "pytest"
+    assert with_manifest.commands["prerequisites"] == "Python >=3.10"
+
+
+def test_nested_manifests_are_run_from_their_directory():
+    extraction = extract_setup_commands({"web/package.json": json.dumps({"scripts": {"test": "jest"}})})
+
+    assert extraction.commands["dependencies"] == "cd web && npm install"
+    assert extraction.commands["testing"] == "cd web && npm test"
+    assert extraction.commands["prerequisites"] == "Node.js"
+
+
+def test_unparseable_files_are_skipped():
+    extraction = extract_setup_commands({"package.json": "{not json", "go.mod": "module demo\n\ngo 1.22\n"})
+
+    assert extraction.commands["prerequisites"] == "Go 1.22+"
+    assert extraction.sources["testing"] == ["go.mod"]
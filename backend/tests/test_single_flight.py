@@ -0,0 +1,106 @@
+import asyncio
+
+from app.services.single_flight import FLIGHT_END, Flight
+
+
+async def started_flight(computation):
+    flight = Flight("key")
+    flight.task = asyncio.create_task(computation(flight))
+    flight.task.add_done_callback(flight._finish)
+    await asyncio.sleep(0)
+    return flight
+
+
+async def forever(flight):
+    await asyncio.sleep(10)
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+def test_last_subscriber_detaching_cancels_the_flight():
+    async def run():
+        flight = await started_flight(forever)
+        first, second = flight.subscribe(), flight.subscribe()
+
+        flight.unsubscribe(first)
+        await asyncio.sleep(0)
+        assert not flight.task.done()
+
+        flight.unsubscribe(second)
+        await asyncio.sleep(0)
+        return flight
+
+    flight = asyncio.run(run())
+    assert flight.task.cancelled()
+    assert flight.abandoned
+
+
+def test_cancelled_waiter_leaves_the_flight_running_for_others():
+    async def compute(flight):
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        flight = await started_flight(compute)
+        impatient = asyncio.create_task(flight.wait())
+        patient = asyncio.create_task(flight.wait())
+        await asyncio.sleep(0)
+        impatient.cancel()
+        return await patient, flight
+
+    result, flight = asyncio.run(run())
+    assert result == "done"
+    assert not flight.abandoned
+
+
+def test_late_subscriber_gets_history_with_deltas_merged():
+    async def compute(flight):
+        flight.publish({"type": "step", "step": 1})
+        flight.publish({"type": "analysis_delta", "delta": "Hello"})
+        flight.publish({"type": "analysis_delta", "delta": ", world"})
+        flight.publish({"type": "setup_delta", "delta": "npm ci"})
+        await asyncio.sleep(10)
+
+    async def run():
+        flight = await started_flight(compute)
+        early = flight.subscribe()
+        flight.publish({"type": "analysis_delta", "delta": "!"})
+        late = flight.subscribe()
+        events = drain(early), drain(late)
+        flight.unsubscribe(early)
+        flight.unsubscribe(late)
+        return events
+
+    early, late = asyncio.run(run())
+    assert early == [
+        {"type": "step", "step": 1},
+        {"type": "analysis_delta", "delta": "Hello, world"},
+        {"type": "setup_delta", "delta": "npm ci"},
+        {"type": "analysis_delta", "delta": "!"},
+    ]
+    assert late == early
+
+
+def test_subscribers_get_flight_end():
+    async def compute(flight):
+        flight.publish({"type": "step"})
+        return "done"
+
+    async def run():
+        flight = Flight("key")
+        flight.task = asyncio.create_task(compute(flight))
+        flight.task.add_done_callback(flight._finish)
+        live = flight.subscribe()
+        await flight.task
+        await asyncio.sleep(0)
+        finished = flight.subscribe()
+        return drain(live), drain(finished)
+
+    live, finished = asyncio.run(run())
+    assert live == [{"type": "step"}, FLIGHT_END]
+    assert finished == [{"type": "step"}, FLIGHT_END]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.services import prompt_packer
+from app.services.file_tree import FileTree
+from app.services.tree_index import TreeIndex
+from app.services.tree_summary import summarize_tree, tree_summary_for
+
+PATHS = [
+    "package.json",
+    "README.md",
+    "src/index.ts",
+    "src/app.ts",
+    "src/util/strings.ts",
+    "src/util/numbers.ts",
+    "src/util/deep/nested/leaf.ts",
+    "web/package.json",
+    "web/main.js",
+    "node_modules/left-pad/index.js",
+    "node_modules/left-pad/package.json",
+    ".github/workflows/ci.yml",
+]
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    monkeypatch.setattr(prompt_packer, "_encoding", lambda: None)
+
+
+def tree(paths=PATHS):
+    return FileTree.from_entries((path, "blob", None) for path in paths)
+
+
+def test_outline_counts_files_and_extensions():
+    summary = summarize_tree(tree())
+    lines = summary.splitlines()
+
+    assert lines[0] == "10 files in 8 directories, plus 2 files in vendored or generated directories"
+    assert "./ 10 files: ts 5, json 2, md 1, js 1" in lines
+    # Largest subdirectory first
+    assert lines.index("  src/ 5 files: ts 5") < lines.index("  web/ 2 files: json 1, js 1")
+    assert "    src/util/ 3 files: ts 3" in lines
+
+
+def test_vendored_directories_are_collapsed():
+    summary = summarize_tree(tree())
+
+    assert "  node_modules/ 2 files (vendored or generated, not expanded)" in summary.splitlines()
+    assert "left-pad" not in summary
+
+
+def test_config_files_are_listed_shallowest_first():
+    summary = summarize_tree(tree())
+    listing = summary.split("\nConfiguration files:\n")[1].splitlines()
+
+    assert listing == ["README.md", "package.json", "web/package.json", ".github/workflows/ci.yml"]
+
+
+def test_outline_gets_shallower_to_fit_the_budget():
+    deep = summarize_tree(tree(), max_tokens=2000)
+    shallow = summarize_tree(tree(), max_tokens=130)
+
+    assert "src/util/deep/" in deep
+    assert "src/util/" not in shallow
+    assert "  src/ 5 files" in shallow
+    assert prompt_packer.count_tokens(shallow) <= 130
+
+
+def test_summary_is_shared_per_tree_index(monkeypatch):
+    calls = []
+    names = TreeIndex.names
+
+    def counting_names(self):
+        calls.append(self)
+        return names(self)
+
+    monkeypatch.setattr(TreeIndex, "names", counting_names)
+
+    async def run():
+        files = tree()
+        index = TreeIndex(files)
+        first, second = await asyncio.gather(tree_summary_for(files, index, 500), tree_summary_for(files, index, 500))
+        return first, second, await tree_summary_for(files, index, 500)
+
+    first, second, third = asyncio.run(run())
+    assert first == second == third
+    assert len(calls) == 1
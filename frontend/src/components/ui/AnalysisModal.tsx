@@ -48,6 +48,7 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({
     progress,
     currentStep,
     progressUpdates,
+    streamingAnalysis,
     results,
     error,
     startAnalysis,
@@ -524,6 +525,21 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({
                   );
                 })}
               </div>
+
+              {streamingAnalysis && (
+                <div style={{ marginTop: '1.5rem' }}>
+                  <MarkdownRenderer 
+                    content={streamingAnalysis}
+                    style={{
+                      background: '#1a1a1a',
+                      padding: '1.5rem',
+                      borderRadius: '12px',
+                      border: '1px solid var(--border-color)',
+                      fontSize: '0.95rem'
+                    }}
+                  />
+                </div>
+              )}
             </div>
           )}
 
@@ -28,6 +28,7 @@ interface StreamingAnalysisState {
   progress: number;
   currentStep: number;
   progressUpdates: AnalysisProgressUpdate[];
+  streamingAnalysis: string;
   results: AnalysisResults | null;
   error: string | null;
 }
@@ -38,6 +39,7 @@ export const useStreamingAnalysis = () => {
     progress: 0,
     currentStep: 0,
     progressUpdates: [],
+    streamingAnalysis: '',
     results: null,
     error: null,
   });
@@ -48,6 +50,7 @@ export const useStreamingAnalysis = () => {
       progress: 0,
       currentStep: 1,
       progressUpdates: [],
+      streamingAnalysis: '',
       results: null,
       error: null,
     });
@@ -111,6 +114,19 @@ export const useStreamingAnalysis = () => {
                 return;
               }
               
+              // Text of the analysis as it is generated; final_result replaces it
+              if (data.type === 'analysis_delta') {
+                setState(prev => ({
+                  ...prev,
+                  streamingAnalysis: prev.streamingAnalysis + data.delta,
+                }));
+                continue;
+              }
+              
+              if (data.type === 'setup_delta' || data.type === 'job') {
+                continue;
+              }
+              
               if (data.type === 'complete') {
                 setState(prev => ({
                   ...prev,
@@ -150,6 +166,7 @@ export const useStreamingAnalysis = () => {
       progress: 0,
       currentStep: 0,
       progressUpdates: [],
+      streamingAnalysis: '',
       results: null,
       error: null,
     });